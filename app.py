@@ -28,16 +28,29 @@ import sys
 import threading
 import queue
 import json
+import asyncio
+import random
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta
 import platform
 import logging
+import logging.handlers
+import atexit
 import socket
 from pathlib import Path
 import psutil  # For system monitoring
+import shutil
+import struct
+import itertools
+from array import array
+from collections import deque
+import math
 import base64
 import io
 import hashlib
+import gzip
+import zlib
+import sqlite3
 import urllib.parse
 from typing import Dict, List, Optional, Any
 
@@ -304,6 +317,12 @@ BASE_TEMPLATE = '''
             box-shadow: 0 0 10px var(--neon-pink);
         }
 
+        .status-indicator.pending {
+            background: var(--neon-yellow);
+            animation: pulse 1s infinite;
+            box-shadow: 0 0 10px var(--neon-yellow);
+        }
+
         @keyframes pulse {
             0% { box-shadow: 0 0 0 0 rgba(0, 255, 0, 0.7), 0 0 10px currentColor; }
             70% { box-shadow: 0 0 0 10px rgba(0, 255, 0, 0), 0 0 20px currentColor; }
@@ -481,8 +500,39 @@ DASHBOARD_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
             </div>
         </div>
         <div class="ping-chart-mini">
+            <select id="ping-range" onchange="setPingRange(this.value)" style="float: right; padding: 2px 6px; border-radius: 5px; background: rgba(0, 0, 0, 0.8); color: var(--neon-cyan); border: 1px solid var(--neon-cyan);">
+                <option value="live">Live</option>
+                <option value="1h">1 hour</option>
+                <option value="24h">24 hours</option>
+                <option value="7d">7 days</option>
+                <option value="30d">30 days</option>
+            </select>
             <canvas id="livePingChart" width="400" height="100"></canvas>
         </div>
+        <div class="tunnel-metrics">
+            <div class="stat-label">Tunnel internals <span id="tunnel-metrics-status"></span></div>
+            <div class="ping-stats">
+                <div class="ping-stat">
+                    <div class="stat-label">Requests/s</div>
+                    <div class="stat-value" id="tunnel-requests">--</div>
+                </div>
+                <div class="ping-stat">
+                    <div class="stat-label">Errors/s</div>
+                    <div class="stat-value" id="tunnel-errors">--</div>
+                </div>
+                <div class="ping-stat">
+                    <div class="stat-label">Edge Connections</div>
+                    <div class="stat-value" id="tunnel-connections">--</div>
+                </div>
+                <div class="ping-stat">
+                    <div class="stat-label">Edge RTT</div>
+                    <div class="stat-value" id="tunnel-rtt">--ms</div>
+                </div>
+            </div>
+            <div class="ping-chart-mini">
+                <canvas id="tunnelMetricsChart" width="400" height="100"></canvas>
+            </div>
+        </div>
     </div>
     
     <!-- Data Transfer Monitor Panel - NEW SECTION -->
@@ -519,6 +569,13 @@ DASHBOARD_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
             </div>
         </div>
         <div class="transfer-chart">
+            <select id="transfer-range" onchange="setTransferRange(this.value)" style="float: right; padding: 2px 6px; border-radius: 5px; background: rgba(0, 0, 0, 0.8); color: var(--neon-cyan); border: 1px solid var(--neon-cyan);">
+                <option value="live">Live</option>
+                <option value="1h">1 hour</option>
+                <option value="24h">24 hours</option>
+                <option value="7d">7 days</option>
+                <option value="30d">30 days</option>
+            </select>
             <canvas id="transferChart" width="400" height="120"></canvas>
         </div>
     </div>
@@ -539,6 +596,18 @@ DASHBOARD_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
         <input type="text" id="tunnel-url" value="Not available" readonly style="width: 100%; padding: 12px; border-radius: 8px; border: 2px solid var(--neon-cyan); background: rgba(0, 0, 0, 0.8); color: var(--neon-cyan); font-size: 1rem; text-shadow: 0 0 5px currentColor;">
         <button class="btn" onclick="copyUrl()" style="margin-top: 15px;"><i class="fas fa-copy"></i> Copy URL</button>
     </div>
+    
+    <div class="panel">
+        <h2><i class="fas fa-stream"></i> Recent Events</h2>
+        <ul id="event-list" style="list-style: none; max-height: 260px; overflow-y: auto; font-size: 0.85rem;">
+            <li style="opacity: 0.7;">No events yet</li>
+        </ul>
+    </div>
+    
+    <div class="panel" id="tunnels-panel" style="display: none;">
+        <h2><i class="fas fa-network-wired"></i> Tunnels</h2>
+        <ul id="tunnel-list" style="list-style: none; max-height: 260px; overflow-y: auto; font-size: 0.85rem;"></ul>
+    </div>
 </div>
 
 <style>
@@ -827,6 +896,10 @@ DASHBOARD_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
     height: 100% !important;
 }
 
+.tunnel-metrics {
+    margin-top: 15px;
+}
+
 /* Enhanced Panel Styles */
 .panel {
     transition: transform 0.3s ease, box-shadow 0.3s ease;
@@ -929,6 +1002,63 @@ function initLivePingChart() {
     });
 }
 
+// Initialize Tunnel Metrics Chart (requests/s and edge RTT from cloudflared's metrics)
+let tunnelMetricsChart = null;
+let tunnelMetricsHistory = [];
+let tunnelMetricsSeq = null;
+
+function initTunnelMetricsChart() {
+    const ctx = document.getElementById('tunnelMetricsChart').getContext('2d');
+    tunnelMetricsChart = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: [],
+            datasets: [
+                {label: 'Requests/s', data: [], borderColor: '#00ffff', borderWidth: 2, fill: false, tension: 0.4, pointRadius: 0, yAxisID: 'y'},
+                {label: 'Edge RTT (ms)', data: [], borderColor: '#ff0080', borderWidth: 2, fill: false, tension: 0.4, pointRadius: 0, yAxisID: 'rtt'}
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            animation: { duration: 300 },
+            scales: {
+                x: { display: false },
+                y: { display: true, grid: { color: 'rgba(255, 255, 255, 0.1)' }, ticks: { color: 'rgba(255, 255, 255, 0.7)', font: { size: 10 } } },
+                rtt: { display: true, position: 'right', grid: { display: false }, ticks: { color: 'rgba(255, 0, 128, 0.7)', font: { size: 10 } } }
+            },
+            plugins: { legend: { display: false } }
+        }
+    });
+}
+
+function applyTunnelMetricsUpdate(data) {
+    if (data.snapshot) {
+        tunnelMetricsHistory = data.history || [];
+    } else if (tunnelMetricsSeq === null || data.base_seq !== tunnelMetricsSeq) {
+        requestResync('tunnel_metrics');
+        return;
+    } else {
+        tunnelMetricsHistory = tunnelMetricsHistory.concat(data.samples).slice(-60);
+    }
+    tunnelMetricsSeq = data.seq;
+    
+    const last = data.last;
+    document.getElementById('tunnel-metrics-status').textContent = data.error ? '(unavailable)' : '';
+    if (last) {
+        document.getElementById('tunnel-requests').textContent = last.requests_per_sec.toFixed(1);
+        document.getElementById('tunnel-errors').textContent = last.errors_per_sec.toFixed(1);
+        document.getElementById('tunnel-connections').textContent = last.ha_connections;
+        document.getElementById('tunnel-rtt').textContent = last.rtt_ms.toFixed(1) + 'ms';
+    }
+    if (tunnelMetricsChart) {
+        tunnelMetricsChart.data.labels = tunnelMetricsHistory.map((_, index) => index);
+        tunnelMetricsChart.data.datasets[0].data = tunnelMetricsHistory.map(entry => entry.requests_per_sec);
+        tunnelMetricsChart.data.datasets[1].data = tunnelMetricsHistory.map(entry => entry.rtt_ms);
+        tunnelMetricsChart.update('none');
+    }
+}
+
 // Initialize Transfer Chart
 function initTransferChart() {
     const ctx = document.getElementById('transferChart').getContext('2d');
@@ -1049,7 +1179,7 @@ function updateDataTransferMonitor(networkData) {
 }
 
 function updateTransferChart(transferHistory) {
-    if (!transferChart || !transferHistory.length) return;
+    if (!transferChart || !transferHistory.length || transferRange !== 'live') return;
     
     // Keep only last 20 data points for the chart
     const recentData = transferHistory.slice(-20);
@@ -1120,7 +1250,7 @@ function getPingStatusText(ping) {
 }
 
 function updateLivePingChart(pingHistory) {
-    if (!livePingChart || !pingHistory.length) return;
+    if (!livePingChart || !pingHistory.length || pingRange !== 'live') return;
     
     // Keep only last 30 data points for the mini chart
     const recentData = pingHistory.slice(-maxDataPoints);
@@ -1130,19 +1260,139 @@ function updateLivePingChart(pingHistory) {
     livePingChart.update('none');
 }
 
-// Socket.IO event listeners for live updates
+// Chart ranges: 'live' follows the pushed updates, the others show persisted
+// history from /api/history (the server picks the raw or rollup tier)
+const chartRanges = {'1h': 3600, '24h': 86400, '7d': 604800, '30d': 2592000};
+const chartRangePoints = 120;
+let pingRange = 'live';
+let transferRange = 'live';
+
+async function fetchHistory(metric, range) {
+    const to = Date.now() / 1000;
+    const from = to - chartRanges[range];
+    const step = Math.max(1, Math.round(chartRanges[range] / chartRangePoints));
+    const response = await fetch(`/api/history?metric=${metric}&from=${from}&to=${to}&step=${step}`);
+    const data = await response.json();
+    if (data.status !== 'success') throw new Error(data.message);
+    return data.points;
+}
+
+function historyLabel(point, range) {
+    const date = new Date(point.timestamp * 1000);
+    return range === '1h' || range === '24h' ? date.toLocaleTimeString() : date.toLocaleString();
+}
+
+function historyValue(point) {
+    // Raw points carry "value", rollup buckets "avg"
+    return point.value !== undefined ? point.value : point.avg;
+}
+
+async function setPingRange(range) {
+    pingRange = range;
+    if (range === 'live') {
+        updateLivePingChart(pingHistory);
+        return;
+    }
+    try {
+        const points = await fetchHistory('ping', range);
+        if (pingRange !== range || !livePingChart) return;
+        livePingChart.data.labels = points.map(point => historyLabel(point, range));
+        livePingChart.data.datasets[0].data = points.map(historyValue);
+        livePingChart.update('none');
+    } catch (error) {
+        showNotification('Could not load ping history: ' + error.message, 'error');
+    }
+}
+
+async function setTransferRange(range) {
+    transferRange = range;
+    if (range === 'live') {
+        updateTransferChart(transferHistory);
+        return;
+    }
+    try {
+        const [upload, download] = await Promise.all([fetchHistory('upload_speed', range), fetchHistory('download_speed', range)]);
+        if (transferRange !== range || !transferChart) return;
+        transferChart.data.labels = upload.map(point => historyLabel(point, range));
+        transferChart.data.datasets[0].data = upload.map(historyValue);
+        const downloads = new Map(download.map(point => [point.timestamp, historyValue(point)]));
+        transferChart.data.datasets[1].data = upload.map(point => downloads.has(point.timestamp) ? downloads.get(point.timestamp) : null);
+        transferChart.update('none');
+    } catch (error) {
+        showNotification('Could not load transfer history: ' + error.message, 'error');
+    }
+}
+
+// Client-side copies of the server histories, kept in sync with sequence numbers.
+// The server sends a snapshot on connect and only new samples afterwards.
+let pingHistory = [];
+let pingSeq = null;
+let transferHistory = [];
+let transferSeq = null;
+let liveSocket = null;
+
+function requestResync(stream) {
+    if (liveSocket) liveSocket.emit('resync', {stream: stream});
+}
+
+function applyPingUpdate(data) {
+    if (data.snapshot) {
+        pingHistory = data.ping_history || [];
+    } else if (pingSeq === null || data.base_seq !== pingSeq) {
+        // Missed an update, ask for a fresh snapshot
+        requestResync('ping');
+        return;
+    } else {
+        pingHistory = pingHistory.concat(data.samples).slice(-60);
+    }
+    pingSeq = data.seq;
+    updateLivePingMonitor(Object.assign({}, data, {ping_history: pingHistory}));
+}
+
+function applyNetworkUpdate(data) {
+    if (data.snapshot) {
+        transferHistory = data.transfer_history || [];
+    } else if (transferSeq === null || data.base_seq !== transferSeq) {
+        requestResync('network');
+        return;
+    } else {
+        transferHistory = transferHistory.concat(data.samples).slice(-20);
+    }
+    transferSeq = data.seq;
+    updateDataTransferMonitor(Object.assign({}, data, {transfer_history: transferHistory}));
+}
+
+// Socket.IO event listeners for live updates (reuses the page's connection)
 if (typeof io !== 'undefined') {
-    const socket = io();
+    const socket = window.socket || io();
+    liveSocket = socket;
+    
+    // Server updates arrive as one combined frame per tick; acknowledge it so the
+    // server can track our queue depth, then dispatch each topic to its handlers
+    socket.on('bus', (frame, ack) => {
+        if (typeof ack === 'function') ack();
+        const topics = JSON.parse(frame);
+        Object.keys(topics).forEach(topic => {
+            socket.listeners(topic).forEach(handler => handler(topics[topic]));
+            socket.listenersAny().forEach(handler => handler(topic, topics[topic]));
+        });
+    });
     
     socket.on('ping_data', (data) => {
-        updateLivePingMonitor(data);
+        applyPingUpdate(data);
     });
     
     socket.on('network_data', (data) => {
-        updateDataTransferMonitor(data);
+        applyNetworkUpdate(data);
+    });
+    
+    socket.on('tunnel_metrics', (data) => {
+        applyTunnelMetricsUpdate(data);
     });
     
     socket.on('connect', () => {
+        // (Re)register for the combined update frames; the server answers with a snapshot
+        socket.emit('subscribe_bus');
         console.log('Connected to live monitoring');
         document.getElementById('live-ping-status').textContent = 'Connecting...';
     });
@@ -1156,6 +1406,7 @@ if (typeof io !== 'undefined') {
 // Initialize when page loads
 document.addEventListener('DOMContentLoaded', () => {
     initLivePingChart();
+    initTunnelMetricsChart();
     initTransferChart();
     
     // Fetch initial ping data
@@ -1163,7 +1414,7 @@ document.addEventListener('DOMContentLoaded', () => {
         .then(response => response.json())
         .then(data => {
             if (data.ping_history && data.ping_history.length > 0) {
-                updateLivePingMonitor(data);
+                applyPingUpdate(data);
             }
         })
         .catch(error => console.error('Error fetching initial ping data:', error));
@@ -1172,16 +1423,24 @@ document.addEventListener('DOMContentLoaded', () => {
     fetch('/api/network-data')
         .then(response => response.json())
         .then(data => {
-            updateDataTransferMonitor(data);
+            applyNetworkUpdate(data);
         })
         .catch(error => console.error('Error fetching initial network data:', error));
+    
+    // Fetch initial tunnel metrics
+    fetch('/api/tunnel-metrics')
+        .then(response => response.json())
+        .then(data => {
+            applyTunnelMetricsUpdate(data);
+        })
+        .catch(error => console.error('Error fetching tunnel metrics:', error));
 });
 
 // Existing tunnel control functions
 async function startTunnel() {
     const response = await fetch('/api/start', {method: 'POST'});
     const data = await response.json();
-    if (data.status === 'success') updateStatus('Running');
+    if (data.status === 'success') updateStatus('Starting');
 }
 
 async function stopTunnel() {
@@ -1191,11 +1450,14 @@ async function stopTunnel() {
 }
 
 function updateStatus(status) {
+    // Stopped, Starting, Running, Restarting or Failed: anything but Stopped can be stopped,
+    // and Failed can also be started again (a manual start clears it)
     document.getElementById('tunnel-text').textContent = status;
     const indicator = document.getElementById('tunnel-status');
-    indicator.className = status === 'Running' ? 'status-indicator running' : 'status-indicator stopped';
-    document.getElementById('start-btn').disabled = status === 'Running';
-    document.getElementById('stop-btn').disabled = status !== 'Running';
+    const indicatorClass = {Running: 'running', Starting: 'pending', Restarting: 'pending'}[status] || 'stopped';
+    indicator.className = 'status-indicator ' + indicatorClass;
+    document.getElementById('start-btn').disabled = !['Stopped', 'Failed'].includes(status);
+    document.getElementById('stop-btn').disabled = status === 'Stopped';
 }
 
 function copyUrl() {
@@ -1220,15 +1482,70 @@ function copyUrl() {
 
 
 
+// Recent events (typed events pushed over the 'events' topic)
+let recentEvents = [];
+const eventColors = {
+    internet_lost: 'var(--neon-pink)', tunnel_error: 'var(--neon-pink)', probe_failed: 'var(--neon-yellow)',
+    internet_restored: 'var(--neon-green)', tunnel_url: 'var(--neon-green)', tunnel_started: 'var(--neon-cyan)'
+};
+
+// Main and additional tunnels, by name (each tunnel has its own 'tunnel:<name>' topic)
+const tunnelStates = {};
+function updateTunnel(name, tunnel) {
+    if (tunnel.removed) delete tunnelStates[name];
+    else tunnelStates[name] = tunnel;
+    const tunnels = Object.values(tunnelStates);
+    document.getElementById('tunnels-panel').style.display = tunnels.length > 1 ? '' : 'none';
+    const list = document.getElementById('tunnel-list');
+    list.innerHTML = '';
+    tunnels.forEach(tunnel => {
+        const item = document.createElement('li');
+        item.style.cssText = `padding: 4px 0; border-bottom: 1px solid rgba(255, 255, 255, 0.1); color: ${tunnel.status === 'running' ? 'var(--neon-green)' : tunnel.status === 'failed' ? 'var(--neon-pink)' : 'var(--text-light)'};`;
+        item.textContent = `${tunnel.name} (${tunnel.local_url}) ${tunnel.status} ${tunnel.url || ''}`;
+        list.appendChild(item);
+    });
+}
+
+function addEvents(events) {
+    const lastSeq = recentEvents.length ? recentEvents[0].seq : 0;
+    events.filter(event => event.seq > lastSeq).forEach(event => recentEvents.unshift(event));
+    recentEvents = recentEvents.slice(0, 15);
+    
+    const list = document.getElementById('event-list');
+    list.innerHTML = '';
+    recentEvents.forEach(event => {
+        const item = document.createElement('li');
+        const details = Object.keys(event)
+            .filter(key => !['seq', 'type', 'ts', 'mono'].includes(key) && event[key] !== null)
+            .map(key => `${key}=${event[key]}`).join(' ');
+        item.style.cssText = `padding: 4px 0; border-bottom: 1px solid rgba(255, 255, 255, 0.1); color: ${eventColors[event.type] || 'var(--text-light)'};`;
+        item.textContent = `${new Date(event.ts * 1000).toLocaleTimeString()} ${event.type} ${details}`;
+        list.appendChild(item);
+    });
+}
+
 // Socket listeners for tunnel status
 if (typeof io !== 'undefined') {
-    const socket = io();
+    const socket = liveSocket || io();
     socket.on('tunnel_url', (data) => {
         document.getElementById('tunnel-url').value = data.url;
     });
     
     socket.on('tunnel_status', (data) => {
-        updateStatus(data.status === 'running' ? 'Running' : 'Stopped');
+        // stopped, starting, running, restarting or failed (see TunnelSupervisor)
+        updateStatus(data.status.charAt(0).toUpperCase() + data.status.slice(1));
+    });
+    
+    socket.on('events', (data) => {
+        addEvents(data.samples);
+        // Show the restart backoff next to the Restarting state
+        data.samples.filter(event => event.type === 'restart_scheduled' && !event.tunnel).forEach(event => {
+            document.getElementById('tunnel-text').textContent = `Restarting (in ${event.delay}s)`;
+        });
+    });
+    
+    socket.onAny((topic, data) => {
+        if (topic.startsWith('tunnel:')) updateTunnel(topic.slice('tunnel:'.length), data);
     });
     
     socket.on('internet_status', (data) => {
@@ -1256,12 +1573,13 @@ SETTINGS_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
         <button class="btn secondary" onclick="clearLogDisplay()"><i class="fas fa-eraser"></i> Clear Display</button>
         <button class="btn warning" onclick="downloadLogs()"><i class="fas fa-download"></i> Download Logs</button>
         <select id="log-level-filter" style="padding: 8px; border-radius: 5px; background: rgba(0, 0, 0, 0.8); color: var(--neon-cyan); border: 2px solid var(--neon-cyan);">
-            <option value="all">All Levels</option>
-            <option value="info">Info</option>
-            <option value="warning">Warning</option>
-            <option value="error">Error</option>
-            <option value="success">Success</option>
+            <option value="debug">All Levels</option>
+            <option value="info">Info and above</option>
+            <option value="success">Success and above</option>
+            <option value="warning">Warning and above</option>
+            <option value="error">Error only</option>
         </select>
+        <input type="text" id="log-query" placeholder="Filter text" style="padding: 8px; border-radius: 5px; background: rgba(0, 0, 0, 0.8); color: var(--neon-cyan); border: 2px solid var(--neon-cyan);">
     </div>
     <div class="log-display" id="log-display" style="background: rgba(0, 0, 0, 0.9); border-radius: 10px; padding: 15px; height: 400px; overflow-y: auto; font-family: 'Courier New', monospace; font-size: 0.9rem; color: var(--neon-green); border: 2px solid var(--neon-cyan); box-shadow: inset 0 0 20px rgba(0, 255, 255, 0.1);">
         <div class="log-entry" style="opacity: 0.7;">Log monitoring stopped. Click 'Start Monitoring' to begin...</div>
@@ -1308,6 +1626,22 @@ SETTINGS_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
                         <option value="false" {{ 'selected' if not config.debug_mode else '' }}>Disabled</option>
                     </select>
                 </div>
+                <div class="input-group" style="margin-top: 15px;">
+                    <label style="color: var(--text-light); display: block; margin-bottom: 5px; font-weight: 500;">Warm Standby Tunnel:</label>
+                    <select name="tunnel_standby" style="width: 100%; padding: 12px; border: 2px solid var(--neon-pink); border-radius: 8px; background: rgba(0, 0, 0, 0.8); color: var(--neon-pink); font-size: 0.95rem;">
+                        <option value="true" {{ 'selected' if config.tunnel_standby else '' }}>Enabled</option>
+                        <option value="false" {{ 'selected' if not config.tunnel_standby else '' }}>Disabled</option>
+                    </select>
+                    <small style="color: var(--text-light); opacity: 0.8; font-size: 0.85rem; margin-top: 5px; display: block;">Runs a second cloudflared that takes over immediately if the tunnel dies (its URL differs)</small>
+                </div>
+                <div class="input-group" style="margin-top: 15px;">
+                    <label style="color: var(--text-light); display: block; margin-bottom: 5px; font-weight: 500;">Restart Policy:</label>
+                    <select name="restart_policy" style="width: 100%; padding: 12px; border: 2px solid var(--neon-pink); border-radius: 8px; background: rgba(0, 0, 0, 0.8); color: var(--neon-pink); font-size: 0.95rem;">
+                        <option value="always" {{ 'selected' if config.restart_policy == 'always' else '' }}>Always restart</option>
+                        <option value="on-failure" {{ 'selected' if config.restart_policy == 'on-failure' else '' }}>Restart on failure (non-zero exit)</option>
+                        <option value="never" {{ 'selected' if config.restart_policy == 'never' else '' }}>Never restart</option>
+                    </select>
+                </div>
             </div>
             <div class="config-section" style="background: rgba(255, 255, 0, 0.05); padding: 20px; border-radius: 15px; border: 1px solid var(--neon-yellow);">
                 <h3 style="color: var(--neon-yellow); margin-bottom: 15px; font-size: 1.1rem;"><i class="fas fa-save"></i> URL Storage Settings</h3>
@@ -1376,8 +1710,7 @@ SETTINGS_TEMPLATE = BASE_TEMPLATE.replace('{% block content %}{% endblock %}',
 </div>''').replace('{% block scripts %}{% endblock %}', 
 '''// Live Log Monitoring
 let logMonitoringActive = false;
-let logSocket;
-let logUpdateInterval;
+let logCursor = null;
 
 function toggleLogMonitoring() {
     const btn = document.getElementById('log-toggle-btn');
@@ -1391,8 +1724,7 @@ function toggleLogMonitoring() {
         
         display.innerHTML = '<div class="log-entry" style="color: var(--neon-green);">📡 Log monitoring started...</div>';
         
-        // Start fetching logs
-        startLogFetching();
+        subscribeLogs();
         showNotification('Live log monitoring started', 'success');
     } else {
         // Stop monitoring
@@ -1400,71 +1732,78 @@ function toggleLogMonitoring() {
         btn.innerHTML = '<i class="fas fa-play"></i> Start Monitoring';
         btn.className = 'btn';
         
-        if (logUpdateInterval) {
-            clearInterval(logUpdateInterval);
-        }
+        window.socket.emit('unsubscribe_logs');
         
         display.innerHTML += '<div class="log-entry" style="color: var(--neon-pink);">📡 Log monitoring stopped.</div>';
         showNotification('Live log monitoring stopped', 'warning');
     }
 }
 
-function startLogFetching() {
-    // Fetch logs every 2 seconds
-    logUpdateInterval = setInterval(function() {
-        if (logMonitoringActive) {
-            fetch('/api/logs')
-                .then(response => response.json())
-                .then(logs => {
-                    updateLogDisplay(logs);
-                })
-                .catch(error => {
-                    console.error('Error fetching logs:', error);
-                });
+function subscribeLogs() {
+    // The server filters and batches the records; we only render what arrives
+    window.socket.emit('subscribe_logs', {
+        level: document.getElementById('log-level-filter').value,
+        query: document.getElementById('log-query').value.trim(),
+        after: logCursor
+    }, function(response) {
+        if (response && response.status === 'error') {
+            showNotification(response.message, 'error');
         }
-    }, 2000);
+    });
 }
 
+window.socket.on('log_stream', function(data) {
+    if (!logMonitoringActive) return;
+    logCursor = data.cursor;
+    if (data.missed || data.suppressed) {
+        const skipped = data.missed + data.suppressed;
+        updateLogDisplay([{level: 'warning', timestamp: new Date().toLocaleTimeString(), message: `${skipped} log records skipped (rate limit or buffer overflow)`}]);
+    }
+    updateLogDisplay(data.logs);
+});
+
+window.socket.on('connect', function() {
+    // Resume the stream after a reconnect
+    if (logMonitoringActive) subscribeLogs();
+});
+
 function updateLogDisplay(logs) {
     const display = document.getElementById('log-display');
-    const filter = document.getElementById('log-level-filter').value;
     
     logs.forEach(log => {
-        if (filter === 'all' || log.level === filter) {
-            const logEntry = document.createElement('div');
-            logEntry.className = 'log-entry';
-            
-            const levelColor = {
-                'info': 'var(--neon-cyan)',
-                'success': 'var(--neon-green)',
-                'warning': 'var(--neon-yellow)',
-                'error': 'var(--neon-pink)',
-                'debug': '#888888'
-            }[log.level] || '#ffffff';
-            
-            const levelIcon = {
-                'info': 'ℹ️',
-                'success': '✅',
-                'warning': '⚠️',
-                'error': '❌',
-                'debug': '🐛'
-            }[log.level] || '📝';
-            
-            logEntry.style.cssText = `
-                color: ${levelColor};
-                margin-bottom: 5px;
-                padding: 8px;
-                border-left: 3px solid ${levelColor};
-                background: rgba(0, 0, 0, 0.3);
-                border-radius: 5px;
-                font-size: 0.85rem;
-                line-height: 1.4;
-                text-shadow: 0 0 5px currentColor;
-            `;
-            
-            logEntry.innerHTML = `${levelIcon} [${log.timestamp}] ${log.message}`;
-            display.appendChild(logEntry);
-        }
+        const logEntry = document.createElement('div');
+        logEntry.className = 'log-entry';
+        
+        const levelColor = {
+            'info': 'var(--neon-cyan)',
+            'success': 'var(--neon-green)',
+            'warning': 'var(--neon-yellow)',
+            'error': 'var(--neon-pink)',
+            'debug': '#888888'
+        }[log.level] || '#ffffff';
+        
+        const levelIcon = {
+            'info': 'ℹ️',
+            'success': '✅',
+            'warning': '⚠️',
+            'error': '❌',
+            'debug': '🐛'
+        }[log.level] || '📝';
+        
+        logEntry.style.cssText = `
+            color: ${levelColor};
+            margin-bottom: 5px;
+            padding: 8px;
+            border-left: 3px solid ${levelColor};
+            background: rgba(0, 0, 0, 0.3);
+            border-radius: 5px;
+            font-size: 0.85rem;
+            line-height: 1.4;
+            text-shadow: 0 0 5px currentColor;
+        `;
+        
+        logEntry.innerHTML = `${levelIcon} [${log.timestamp}] ${log.message}`;
+        display.appendChild(logEntry);
     });
     
     // Auto-scroll to bottom
@@ -1487,23 +1826,14 @@ function clearLogDisplay() {
 }
 
 function downloadLogs() {
-    fetch('/api/download-logs')
-        .then(response => response.blob())
-        .then(blob => {
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = 'tunnel_monitor_logs_' + new Date().toISOString().split('T')[0] + '.txt';
-            document.body.appendChild(a);
-            a.click();
-            window.URL.revokeObjectURL(url);
-            document.body.removeChild(a);
-            showNotification('Logs downloaded successfully', 'success');
-        })
-        .catch(error => {
-            console.error('Error downloading logs:', error);
-            showNotification('Failed to download logs', 'error');
-        });
+    // Let the browser save the streamed response straight to disk instead of buffering it in a blob
+    const a = document.createElement('a');
+    a.href = '/api/download-logs';
+    a.download = '';
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+    showNotification('Log download started', 'success');
 }
 
 // Settings management
@@ -1516,6 +1846,9 @@ async function saveSettings(event) {
     if (settings.debug_mode) {
         settings.debug_mode = settings.debug_mode === 'true';
     }
+    if (settings.tunnel_standby) {
+        settings.tunnel_standby = settings.tunnel_standby === 'true';
+    }
     
     try {
         const response = await fetch('/api/settings', {
@@ -1579,7 +1912,7 @@ async function downloadConfig() {
 }
 
 async function clearLogs() {
-    if (confirm('Are you sure you want to clear all logs?')) {
+    if (confirm('Are you sure you want to clear all logs? The event history (outages, tunnel starts and URLs) is kept.')) {
         try {
             const response = await fetch('/api/clear-logs', { method: 'POST' });
             const result = await response.json();
@@ -1664,7 +1997,7 @@ async function viewTunnelUrls() {
                 let urlsHtml = `
                     <div style="margin-bottom: 15px; display: flex; justify-content: between; align-items: center; flex-wrap: wrap; gap: 10px;">
                         <div style="color: var(--neon-green); font-weight: 600;">
-                            <i class="fas fa-database"></i> Total URLs: ${result.total_count}
+                            <i class="fas fa-database"></i> Total URLs: ${result.total_count !== null ? result.total_count : result.tunnel_urls.length + '+'}${result.next_cursor !== null ? ` (showing latest ${result.tunnel_urls.length})` : ''}
                         </div>
                         <div style="color: var(--text-light); font-size: 0.9rem; opacity: 0.8;">
                             Directory: ${result.save_directory}<br>
@@ -1674,7 +2007,7 @@ async function viewTunnelUrls() {
                     <div style="max-height: 400px; overflow-y: auto; background: rgba(0, 0, 0, 0.5); border-radius: 10px; padding: 15px;">
                 `;
                 
-                result.tunnel_urls.reverse().forEach((entry, index) => {
+                result.tunnel_urls.forEach((entry, index) => {
                     urlsHtml += `
                         <div style="
                             margin-bottom: 15px; 
@@ -1842,28 +2175,484 @@ document.addEventListener('DOMContentLoaded', function() {
         .catch(error => console.error('Error loading system info:', error));
         
     // Set up log level filter change handler
-    document.getElementById('log-level-filter').addEventListener('change', function() {
+    function updateLogFilter() {
         if (logMonitoringActive) {
             clearLogDisplay();
+            logCursor = null;
+            subscribeLogs();
             showNotification('Log filter updated', 'info');
         }
-    });
+    }
+    document.getElementById('log-level-filter').addEventListener('change', updateLogFilter);
+    document.getElementById('log-query').addEventListener('change', updateLogFilter);
 });''')
 
-# Create logs directory if it doesn't exist
-logs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+# Create logs directory if it doesn't exist (TUNNEL_MONITOR_LOGS_DIR moves it, e.g. for the tests)
+logs_dir = os.environ.get('TUNNEL_MONITOR_LOGS_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
 os.makedirs(logs_dir, exist_ok=True)
 
+LOG_RECORD_PREFIX = re.compile(rb"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),(\d{3}) - \S+ - ([A-Z]+) - ")
+
+def _split_log_records(lines):
+    """Group raw log lines into (timestamp, level, text) records
+
+    A record starts at a line with the standard prefix; the lines after it
+    without one (tracebacks) belong to the same record. Lines before the
+    first prefix form a record with no timestamp.
+    """
+    ts, level, parts = None, None, []
+    last_second, last_base = None, 0.0
+    for line in lines:
+        match = LOG_RECORD_PREFIX.match(line)
+        if match:
+            if parts:
+                yield ts, level, b"".join(parts)
+            second = match.group(1)
+            if second != last_second:
+                last_second = second
+                last_base = time.mktime(time.strptime(second.decode(), "%Y-%m-%d %H:%M:%S"))
+            ts = last_base + int(match.group(2)) / 1000
+            level = match.group(3).decode().lower()
+            parts = [line]
+        else:
+            parts.append(line)
+    if parts:
+        yield ts, level, b"".join(parts)
+
+def _new_segment_index(name):
+    # "id" survives rotation and compression, so other indexes can refer to the segment
+    return {"id": f"{name}@{time.time():.6f}", "file": name, "start": None, "end": None, "records": 0, "bytes": 0, "levels": {}, "blocks": []}
+
+def _index_record(index, ts, level, size, block_bytes):
+    """Account one record of `size` bytes appended to a segment"""
+    level = level or "unknown"
+    blocks = index["blocks"]
+    if not blocks or blocks[-1]["length"] >= block_bytes:
+        blocks.append({"offset": index["bytes"], "length": 0, "start": None, "end": None, "levels": {}})
+    for entry in (blocks[-1], index):
+        if ts is not None:
+            if entry["start"] is None:
+                entry["start"] = ts
+            entry["end"] = ts
+        entry["levels"][level] = entry["levels"].get(level, 0) + 1
+    blocks[-1]["length"] += size
+    index["records"] += 1
+    index["bytes"] += size
+
+def _scan_log_file(path, block_bytes):
+    """Build the index of a log segment written before indexing (or by another process)"""
+    index = _new_segment_index(os.path.basename(path))
+    with open(path, 'rb') as f:
+        for ts, level, text in _split_log_records(f):
+            _index_record(index, ts, level, len(text), block_bytes)
+    return index
+
+def _overlaps(entry, start, end):
+    """Whether an index entry's time range intersects [start, end] (None = open)"""
+    if entry["start"] is None:
+        return True
+    return (start is None or entry["end"] >= start) and (end is None or entry["start"] <= end)
+
+class AsyncLogWriter:
+    """Write log records to rotating log segments and the console on a dedicated thread
+
+    Logging calls only put the record on a bounded queue, so slow disk or
+    console I/O never stalls the caller (in particular the cloudflared output
+    reader, whose pipe would otherwise back up). The writer thread drains the
+    queue in batches and writes and flushes each batch once, either when
+    `batch_size` records are waiting or every `flush_interval` seconds.
+
+    When the queue is full, the "drop" policy discards the new record and the
+    "block" policy waits up to `block_timeout` seconds for room before dropping
+    it. Drops are counted and reported by stats().
+
+    The active segment (<prefix>_YYYYMMDD.log) is rotated when it grows past
+    `max_bytes`, is older than `max_age` seconds or the day changes. Rotated
+    segments are gzip-compressed in the background, one gzip member per
+    index block, and get a JSON index with their time range, level counts
+    and the raw and compressed byte range of each block, so readers can skip
+    segments and blocks without decompressing them. Archives older than
+    `retention_days`, or beyond `retention_bytes` in total, are deleted.
+    Raw segments left by earlier runs are only compressed once
+    compress_leftovers() is called (by main()), so importing the module
+    does not rewrite the log directory.
+    """
+    
+    def __init__(self, directory, prefix, stream=None, capacity=10000, policy="drop",
+                 batch_size=500, flush_interval=0.5, block_timeout=1.0,
+                 max_bytes=10 * 1024 * 1024, max_age=86400, retention_days=14,
+                 retention_bytes=200 * 1024 * 1024, block_bytes=64 * 1024):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown log queue policy: {policy}")
+        self.directory = directory
+        self.prefix = prefix
+        self.stream = stream
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.retention_days = retention_days
+        self.retention_bytes = retention_bytes
+        self.block_bytes = block_bytes
+        self.queue = queue.Queue(maxsize=capacity)
+        self.formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        self.started_at = time.monotonic()
+        self.counters = {"enqueued": 0, "written": 0, "dropped": 0, "batches": 0, "bytes": 0, "errors": 0,
+                         "rotations": 0, "compressed": 0, "expired": 0}
+        self.max_batch = 0
+        self.lock = threading.Lock()  # Guards the counters and the segment catalogue
+        self.file_lock = threading.Lock()  # Guards the active file and its index
+        self.archive = {}  # Compressed segment name -> index
+        self.pending = {}  # Rotated raw segment path -> index, until compressed
+        self.compress_queue = queue.Queue()
+        
+        self._open_active()
+        self._load_archive()
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+        self.compress_thread = threading.Thread(target=self._compress_run, name="log-compressor", daemon=True)
+        self.compress_thread.start()
+    
+    def _active_path(self):
+        return os.path.join(self.directory, f"{self.prefix}_{datetime.now().strftime('%Y%m%d')}.log")
+    
+    def _open_active(self):
+        self.path = self._active_path()
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            # Continue today's segment, indexing what an earlier run wrote
+            self.index = _scan_log_file(self.path, self.block_bytes)
+        else:
+            self.index = _new_segment_index(os.path.basename(self.path))
+        self.opened_at = self.index["start"] or time.time()
+        self.file = open(self.path, 'ab')
+    
+    def _load_archive(self):
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.idx.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                if os.path.exists(os.path.join(self.directory, index["file"])):
+                    index.setdefault("id", index["file"])
+                    self.archive[index["file"]] = index
+            except (OSError, ValueError, KeyError):
+                continue
+    
+    def compress_leftovers(self):
+        """Queue the raw segments left by earlier runs (or older versions) for compression, like fresh rotations
+
+        Returns:
+            int: The number of segments queued
+        """
+        leftovers = [os.path.join(self.directory, filename) for filename in os.listdir(self.directory)
+                     if filename.endswith('.log') and os.path.join(self.directory, filename) != self.path]
+        with self.lock:
+            for path in leftovers:
+                self.pending.setdefault(path, None)
+        for path in leftovers:
+            self.compress_queue.put(path)
+        return len(leftovers)
+    
+    def submit(self, record):
+        """Queue a record for writing; never blocks longer than the policy allows"""
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            counter = "enqueued"
+        except queue.Full:
+            counter = "dropped"
+        with self.lock:
+            self.counters[counter] += 1
+    
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            # Take whatever else is already waiting, up to one batch
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = None in batch
+            self._write([record for record in batch if record is not None])
+            if stop:
+                return
+    
+    def _write(self, records):
+        if not records:
+            return
+        lines = [(self.formatter.format(record) + "\n").encode('utf-8') for record in records]
+        data = b"".join(lines)
+        try:
+            with self.file_lock:
+                if self._active_path() != self.path or (
+                        self.index["records"] and time.time() - self.opened_at >= self.max_age):
+                    self._rotate()
+                self.file.write(data)
+                self.file.flush()
+                for record, line in zip(records, lines):
+                    _index_record(self.index, record.created, record.levelname.lower(), len(line), self.block_bytes)
+                if self.index["bytes"] >= self.max_bytes:
+                    self._rotate()
+            if self.stream is not None:
+                self.stream.write(data.decode('utf-8'))
+                self.stream.flush()
+        except (OSError, ValueError):
+            with self.lock:
+                self.counters["errors"] += 1
+        with self.lock:
+            self.counters["written"] += len(records)
+            self.counters["batches"] += 1
+            self.counters["bytes"] += len(data)
+            self.max_batch = max(self.max_batch, len(records))
+    
+    def _rotate(self):
+        """Close the active segment, hand it to the compressor and open a new one (file_lock held)"""
+        self.file.close()
+        if self.index["records"]:
+            started = datetime.fromtimestamp(self.index["start"] or self.opened_at)
+            rotated = os.path.join(self.directory, f"{self.prefix}_{started.strftime('%Y%m%d_%H%M%S')}.log")
+            suffix = 1
+            while os.path.exists(rotated) or os.path.exists(rotated + '.gz'):
+                rotated = os.path.join(self.directory, f"{self.prefix}_{started.strftime('%Y%m%d_%H%M%S')}_{suffix}.log")
+                suffix += 1
+            try:
+                os.replace(self.path, rotated)
+            except OSError:
+                # Held open elsewhere (Windows); keep appending and retry on the next batch
+                self.file = open(self.path, 'ab')
+                return
+            self.index["file"] = os.path.basename(rotated)
+            with self.lock:
+                self.pending[rotated] = self.index
+                self.counters["rotations"] += 1
+            self.compress_queue.put(rotated)
+        
+        self.path = self._active_path()
+        self.index = _new_segment_index(os.path.basename(self.path))
+        self.opened_at = time.time()
+        self.file = open(self.path, 'ab')
+    
+    def _compress_run(self):
+        while True:
+            path = self.compress_queue.get()
+            try:
+                self._compress(path)
+            except Exception as e:
+                with self.lock:
+                    self.counters["errors"] += 1
+                logging.getLogger('tunnel_monitor_web').warning(f"Could not compress log segment {path}: {e}")
+            self._apply_retention()
+    
+    def _compress(self, path):
+        """Gzip a rotated segment block by block and write its index next to it"""
+        with self.lock:
+            index = self.pending.get(path)
+        if not os.path.exists(path):
+            with self.lock:
+                self.pending.pop(path, None)
+            return
+        if index is None:
+            index = _scan_log_file(path, self.block_bytes)
+        
+        gz_path = path + '.gz'
+        offset = 0
+        with open(path, 'rb') as source, open(gz_path + '.tmp', 'wb') as target:
+            for block in index["blocks"]:
+                source.seek(block["offset"])
+                # Each block is its own gzip member: the file is still one valid .gz,
+                # and a reader can seek to a block and inflate only that member
+                member = gzip.compress(source.read(block["length"]), compresslevel=6)
+                target.write(member)
+                block["gz_offset"] = offset
+                block["gz_length"] = len(member)
+                offset += len(member)
+            target.flush()
+            os.fsync(target.fileno())
+        
+        index["file"] = os.path.basename(gz_path)
+        index["compressed_bytes"] = offset
+        index_path = os.path.splitext(path)[0] + '.idx.json'
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(gz_path + '.tmp', gz_path)
+        os.replace(index_path + '.tmp', index_path)
+        os.remove(path)
+        
+        with self.lock:
+            self.pending.pop(path, None)
+            self.archive[index["file"]] = index
+            self.counters["compressed"] += 1
+    
+    def _remove_archive(self, name):
+        """Delete a compressed segment and its index (lock held)"""
+        self.archive.pop(name, None)
+        stem = name[:-len('.log.gz')]
+        for filename in (name, stem + '.idx.json'):
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+    
+    def _apply_retention(self):
+        """Delete archives past the age limit, then the oldest until under the size limit"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self.lock:
+            ordered = sorted(self.archive.values(), key=lambda index: index["end"] or 0)
+            total = sum(index.get("compressed_bytes", 0) for index in ordered)
+            for index in ordered:
+                if (index["end"] or 0) >= cutoff and total <= self.retention_bytes:
+                    break
+                total -= index.get("compressed_bytes", 0)
+                self._remove_archive(index["file"])
+                self.counters["expired"] += 1
+    
+    def segments(self):
+        """Return the index of every segment, oldest first
+
+        Each index carries "path" (the file to read) and "compressed".
+        """
+        with self.lock:
+            archived = [dict(index, path=os.path.join(self.directory, name), compressed=True)
+                        for name, index in self.archive.items()]
+            pending = [dict(index, path=path, compressed=False)
+                       for path, index in self.pending.items() if index is not None]
+        with self.file_lock:
+            active = dict(self.index, levels=dict(self.index["levels"]), blocks=list(self.index["blocks"]),
+                          path=self.path, compressed=False)
+            if active["blocks"]:
+                # The last block is still growing; copy it so its length matches what was flushed
+                active["blocks"][-1] = dict(active["blocks"][-1])
+        segments = sorted(archived + pending, key=lambda index: index["start"] or 0)
+        if active["records"]:
+            segments.append(active)
+        return segments
+    
+    def read_blocks(self, start=None, end=None, levels=None):
+        """Yield (segment, block, raw bytes) for the blocks that may hold matching records
+
+        Segments and blocks outside [start, end] (epoch seconds) or without any
+        record of the given levels are skipped using the index alone.
+        """
+        for segment in self.segments():
+            if not _overlaps(segment, start, end):
+                continue
+            if levels and not any(segment["levels"].get(level) for level in levels):
+                continue
+            try:
+                with open(segment["path"], 'rb') as f:
+                    for block in segment["blocks"]:
+                        if not _overlaps(block, start, end):
+                            continue
+                        if levels and not any(block["levels"].get(level) for level in levels):
+                            continue
+                        yield segment, block, self.read_block(segment, block, f)
+            except (OSError, EOFError, gzip.BadGzipFile):
+                # Rotated, compressed or expired while we were reading
+                continue
+    
+    @staticmethod
+    def read_block(segment, block, f):
+        """Return the raw bytes of one block of a segment, given the segment's open file"""
+        if segment["compressed"]:
+            f.seek(block["gz_offset"])
+            return gzip.decompress(f.read(block["gz_length"]))
+        f.seek(block["offset"])
+        return f.read(block["length"])
+    
+    def records(self, start=None, end=None, levels=None):
+        """Yield (timestamp, level, text) for every record matching the time range and levels"""
+        for segment, block, data in self.read_blocks(start, end, levels):
+            for ts, level, text in _split_log_records(data.splitlines(keepends=True)):
+                if ts is not None and ((start is not None and ts < start) or (end is not None and ts > end)):
+                    continue
+                if levels and level not in levels:
+                    continue
+                yield ts, level, text.decode('utf-8', errors='replace')
+    
+    def clear(self):
+        """Truncate the active segment and delete every rotated segment"""
+        with self.file_lock:
+            self.file.truncate(0)
+            self.index = _new_segment_index(os.path.basename(self.path))
+            self.opened_at = time.time()
+        with self.lock:
+            for name in list(self.archive):
+                self._remove_archive(name)
+            for path in list(self.pending):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.pending.clear()
+    
+    def stop(self, timeout=5):
+        """Write everything still queued and close the file"""
+        if self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=timeout)
+                self.thread.join(timeout)
+            except queue.Full:
+                pass
+        with self.file_lock:
+            self.file.close()
+    
+    def stats(self):
+        """Return log throughput, queue depth, drop counters and segment totals"""
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        with self.lock:
+            stats = dict(self.counters)
+            stats["archived_segments"] = len(self.archive)
+            stats["archived_bytes"] = sum(index.get("compressed_bytes", 0) for index in self.archive.values())
+            stats["pending_segments"] = len(self.pending)
+        stats.update({
+            "policy": self.policy,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "max_batch": self.max_batch,
+            "records_per_sec": round(stats["written"] / uptime, 2),
+            "avg_batch": round(stats["written"] / stats["batches"], 2) if stats["batches"] else 0,
+            "active_segment": os.path.basename(self.path),
+            "active_bytes": self.index["bytes"]
+        })
+        return stats
+
+class AsyncLogHandler(logging.handlers.QueueHandler):
+    """Logging handler that hands prepared records to an AsyncLogWriter"""
+    
+    def __init__(self, writer):
+        super().__init__(writer.queue)
+        self.writer = writer
+        # prepare() only merges the arguments (and traceback) into the message; the writer adds the prefix
+        self.setFormatter(logging.Formatter('%(message)s'))
+    
+    def enqueue(self, record):
+        self.writer.submit(record)
+
 # Configure logging
-log_file = os.path.join(logs_dir, f'tunnel_monitor_web_{datetime.now().strftime("%Y%m%d")}.log')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(log_file)
-    ]
+LOG_QUEUE_POLICY = "drop"  # "drop" or "block" when the log queue is full
+LOG_ROTATE_BYTES = 10 * 1024 * 1024  # Rotate the active segment past this size...
+LOG_ROTATE_AGE = 86400  # ...or age (seconds), and at midnight
+LOG_RETENTION_DAYS = 14  # Compressed segments older than this are deleted
+LOG_RETENTION_BYTES = 200 * 1024 * 1024  # Total size cap for compressed segments
+log_writer = AsyncLogWriter(
+    logs_dir, 'tunnel_monitor_web', stream=sys.stderr, policy=LOG_QUEUE_POLICY,
+    max_bytes=LOG_ROTATE_BYTES, max_age=LOG_ROTATE_AGE,
+    retention_days=LOG_RETENTION_DAYS, retention_bytes=LOG_RETENTION_BYTES
 )
+log_file = log_writer.path
+atexit.register(log_writer.stop)
+logging.basicConfig(level=logging.INFO, handlers=[AsyncLogHandler(log_writer)])
 logger = logging.getLogger('tunnel_monitor_web')
 logger.info(f"Logging to {log_file}")
 
@@ -1878,7 +2667,15 @@ DEFAULT_CONFIG = {
     "github_repo": "https://github.com/MeTariqul/Cloudflare-Tunnel-Monitor.git",  # GitHub repository URL
     "ping_test_url": "1.1.1.1",  # URL to ping for connectivity test
     "tunnel_urls_save_directory": "d:\\Project\\Git Hub\\cloudflare_tunnel_monitor(Windows)",  # Directory to save tunnel URLs
-    "tunnel_urls_filename": "tunnel_urls.txt"  # Filename for saving tunnel URLs
+    "tunnel_urls_filename": "tunnel_urls.txt",  # Filename for saving tunnel URLs
+    "ping_backend": "auto",  # Ping engine: auto, icmp_dgram, icmp_raw, subprocess or tcp
+    "broadcast_rate": 4,  # Live update frames sent to the dashboard per second
+    "history_retention_days": 2,  # Days of raw (1 s) samples kept on disk; rollup tiers keep longer history
+    "tunnel_urls_backend": "sqlite",  # Source of /api/tunnel-urls: sqlite (history store) or file (the text file)
+    "cloudflared_metrics": "127.0.0.1:20241",  # host:port of cloudflared's Prometheus metrics endpoint ("" to disable)
+    "tunnel_standby": False,  # Keep a second, registered cloudflared ready to take over when the tunnel dies
+    "restart_policy": "always",  # Restart cloudflared when it exits on its own: always, on-failure (non-zero exit) or never
+    "tunnels": []  # Additional tunnels run next to tunnel_url: [{"name": "api", "url": "http://localhost:3000"}, ...]
 }
 
 # Statistics
@@ -1889,94 +2686,1673 @@ STATS = {
     "internet_disconnects": 0,  # Number of internet disconnections
     "last_check": None,  # Last time the internet was checked
     "current_status": "Stopped",  # Current status of the tunnel
-    "last_tunnel_url": None  # Last tunnel URL
+    "last_tunnel_url": None,  # Last tunnel URL
+    "failovers": 0,  # Number of times a dead tunnel was replaced (by the standby or a fresh start)
+    "last_failover_latency": None  # Seconds from detecting the dead tunnel to its replacement's URL being published
 }
 
-# Global variables
-tunnel_process = None
-stop_event = threading.Event()
-log_queue = queue.Queue()
-config_file = "tunnel_monitor_config.json"
-
-# Initialize Flask app with enhanced security
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', os.urandom(24))
-app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-
-# Initialize SocketIO with CORS support
-socketio = SocketIO(app, cors_allowed_origins="*", ping_timeout=60, ping_interval=25)
-
-# Auto-open browser flag
-auto_open_browser = True
+class LogBuffer:
+    """Bounded ring of log records with monotonically increasing sequence IDs
 
-# Ping data
-ping_data = {
-    "last_ping_time": None,
-    "ping_history": [],
-    "max_history_points": 60  # Store 1 minute of data (assuming 1 ping per second)
-}
+    Readers keep their own cursor and fetch the records after it without
+    removing them, so any number of clients see the full log. Reading k
+    records costs O(k). When full, the oldest record is overwritten and
+    counted as dropped.
+    """
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.records = [None] * capacity
+        self.next_seq = 1
+        self.first_seq = 1  # Oldest sequence ID still held
+        self.dropped = 0
+        self.lock = threading.Lock()
+    
+    def append(self, record):
+        """Store a record, assigning it the next sequence ID"""
+        with self.lock:
+            seq = self.next_seq
+            record["seq"] = seq
+            self.records[seq % self.capacity] = record
+            self.next_seq += 1
+            if seq - self.first_seq >= self.capacity:
+                self.first_seq += 1
+                self.dropped += 1
+            return seq
+    
+    def since(self, after=None, limit=None):
+        """Return records with a sequence ID above `after`, oldest first
+
+        Args:
+            after (int): Cursor from a previous read; None returns the newest `limit` records
+            limit (int): Maximum number of records
+
+        Returns:
+            tuple: (records, missed) where missed counts records after the
+            cursor that were already overwritten
+        """
+        with self.lock:
+            limit = self.next_seq - self.first_seq if limit is None else limit
+            if after is not None and after >= self.next_seq:
+                # Cursor from before a restart; start over from the newest records
+                after = None
+            if after is None:
+                start = max(self.first_seq, self.next_seq - limit)
+            else:
+                start = max(self.first_seq, after + 1)
+            missed = max(0, self.first_seq - (after + 1)) if after is not None else 0
+            stop = min(self.next_seq, start + limit)
+            return [self.records[seq % self.capacity] for seq in range(start, stop)], missed
+    
+    def last_seq(self):
+        return self.next_seq - 1
+    
+    def clear(self):
+        """Forget all records; sequence IDs keep increasing"""
+        with self.lock:
+            self.first_seq = self.next_seq
+            self.records = [None] * self.capacity
+
+LOG_LEVELS = ("debug", "info", "success", "warning", "error")  # Lowest to highest
+
+class LogStream:
+    """Push new log records to subscribed clients, filtered on the server
+
+    Each subscriber has a minimum level, an optional substring (matched
+    case-insensitively) and its own cursor into the log buffer. The filter
+    is never a regular expression: matching runs on the broadcast thread,
+    where a client-supplied pattern could backtrack for minutes. flush()
+    runs once per broadcast tick and sends each subscriber the matching
+    records since its cursor as one 'log_stream' event. A token bucket caps the records sent to
+    a client per second; records over the limit are counted as suppressed and
+    reported with the next batch instead of being queued.
+    """
 
-# Network data transfer monitoring
-network_data = {
-    "total_bytes_sent": 0,
-    "total_bytes_recv": 0,
-    "current_upload_speed": 0,
-    "current_download_speed": 0,
-    "transfer_history": [],
-    "max_history_points": 60,  # Store 1 minute of data
-    "last_measurement": None
-}
+    def __init__(self, buffer, rate=50, burst=200, batch_limit=500, backlog=100):
+        self.buffer = buffer
+        self.rate = rate  # Records per second per client
+        self.burst = burst
+        self.batch_limit = batch_limit  # Records read per client per tick
+        self.backlog = backlog  # Recent records sent on a fresh subscription
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, sid, level="debug", query=None, after=None):
+        """Start (or change) the stream of a client
+
+        Raises:
+            ValueError: If the level is unknown or the filter is too long
+        """
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level: {level}")
+
+        if query and len(query) > 200:
+            raise ValueError("Filter is too long")
+
+        if after is None:
+            after = max(self.buffer.first_seq - 1, self.buffer.last_seq() - self.backlog)
+
+        with self.lock:
+            self.subscribers[sid] = {
+                "min_level": LOG_LEVELS.index(level),
+                "query": query.lower() if query else None,
+                "cursor": int(after),
+                "tokens": float(self.burst),
+                "refilled_at": time.monotonic(),
+                "suppressed": 0,
+                "sent": 0
+            }
+        return int(after)
+
+    def unsubscribe(self, sid):
+        with self.lock:
+            self.subscribers.pop(sid, None)
+
+    def _take(self, sub, records):
+        """Filter records for one subscriber and apply its rate limit"""
+        min_level, query = sub["min_level"], sub["query"]
+        matched = [
+            record for record in records
+            if (LOG_LEVELS.index(record["level"]) if record["level"] in LOG_LEVELS else 1) >= min_level
+            and (query is None or query in record["message"].lower())
+        ]
+
+        now = time.monotonic()
+        sub["tokens"] = min(self.burst, sub["tokens"] + (now - sub["refilled_at"]) * self.rate)
+        sub["refilled_at"] = now
+
+        allowed = int(sub["tokens"])
+        if len(matched) > allowed:
+            # Keep the newest records, a live tail is about what is happening now
+            sub["suppressed"] += len(matched) - allowed
+            matched = matched[len(matched) - allowed:] if allowed else []
+        sub["tokens"] -= len(matched)
+        return matched
+
+    def flush(self):
+        """Send every subscriber the matching records logged since its last batch"""
+        with self.lock:
+            subscribers = list(self.subscribers.items())
+        if not subscribers:
+            return
+
+        newest = self.buffer.last_seq()
+        for sid, sub in subscribers:
+            if sub["cursor"] >= newest:
+                continue
+            records, missed = self.buffer.since(sub["cursor"], self.batch_limit)
+            if not records:
+                continue
+            sub["cursor"] = records[-1]["seq"]
+            matched = self._take(sub, records)
+            if not matched and not missed and not sub["suppressed"]:
+                continue
+
+            socketio.emit('log_stream', {
+                "logs": matched,
+                "cursor": sub["cursor"],
+                "missed": missed,
+                "suppressed": sub["suppressed"]
+            }, to=sid)
+            sub["sent"] += len(matched)
+            sub["suppressed"] = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                sid: {"cursor": sub["cursor"], "sent": sub["sent"], "level": LOG_LEVELS[sub["min_level"]]}
+                for sid, sub in self.subscribers.items()
+            }
 
-# Determine the base directory
-if getattr(sys, 'frozen', False):
-    # Running as compiled executable
-    BASE_DIR = Path(sys.executable).parent
-else:
-    # Running as script
-    BASE_DIR = Path(__file__).parent
+class EventLog:
+    """Typed application events, kept in a ring for the UI and appended to daily JSON-lines files
 
-# Utility functions
-def log(message, level="info"):
-    """Log a message to the console and the log queue"""
-    log_entry = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "message": message,
-        "level": level
-    }
-    log_queue.put(log_entry)
+    An event is a flat dict: "seq", "type", "ts" (wall clock, epoch seconds),
+    "mono" (time.monotonic(), for durations that survive clock changes) and
+    the fields of its type. Each event is encoded once, with compact
+    separators, and written in batches by a background thread to
+    events_YYYYMMDD.jsonl; files older than `retention_days` are deleted.
+    """
     
-    # Also log to the logger
-    if level == "error":
-        logger.error(message)
-    elif level == "warning":
-        logger.warning(message)
-    elif level == "success":
-        logger.info(f"SUCCESS: {message}")
-    elif level == "debug":
-        logger.debug(message)
-    else:
-        logger.info(message)
+    def __init__(self, directory, prefix="events", capacity=5000, retention_days=14):
+        self.directory = directory
+        self.prefix = prefix
+        self.retention_days = retention_days
+        self.buffer = LogBuffer(capacity)
+        self.queue = queue.Queue(maxsize=10000)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self.thread.start()
+    
+    def emit(self, event_type, **fields):
+        """Record an event and return it"""
+        event = {"type": event_type, "ts": round(time.time(), 3), "mono": round(time.monotonic(), 3)}
+        event.update(fields)
+        self.buffer.append(event)
+        try:
+            self.queue.put_nowait(json.dumps(event, separators=(',', ':'), default=str))
+        except queue.Full:
+            self.dropped += 1
+        return event
+    
+    def _path(self, day):
+        return os.path.join(self.directory, f"{self.prefix}_{day}.jsonl")
+    
+    def _run(self):
+        current_day = None
+        while True:
+            lines = [self.queue.get()]
+            while len(lines) < 1000:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            day = datetime.now().strftime("%Y%m%d")
+            try:
+                with open(self._path(day), 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+                if day != current_day:
+                    current_day = day
+                    self._expire()
+            except OSError as e:
+                logger.warning(f"Could not write events: {e}")
+            time.sleep(0.2)  # Let events arriving together share one write
+    
+    def _expire(self):
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime("%Y%m%d")
+        for filename in os.listdir(self.directory):
+            if filename.startswith(self.prefix + "_") and filename.endswith(".jsonl") and filename[len(self.prefix) + 1:-6] < cutoff:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+    
+    def since(self, after=None, limit=None, types=None):
+        """Return (events, missed) from the in-memory ring, optionally only some types"""
+        events, missed = self.buffer.since(after, limit if types is None else None)
+        if types is not None:
+            events = [event for event in events if event["type"] in types][:limit]
+        return events, missed
+    
+    def read(self, start=None, end=None, types=None):
+        """Yield the events stored on disk between two epoch timestamps, oldest first"""
+        first_day = datetime.fromtimestamp(start).strftime("%Y%m%d") if start is not None else ""
+        last_day = datetime.fromtimestamp(end).strftime("%Y%m%d") if end is not None else "99999999"
+        markers = [f'"type":"{event_type}"' for event_type in types] if types else None
+        for filename in sorted(os.listdir(self.directory)):
+            if not (filename.startswith(self.prefix + "_") and filename.endswith(".jsonl")):
+                continue
+            if not first_day <= filename[len(self.prefix) + 1:-6] <= last_day:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        # Cheap substring test before decoding; the type is a top-level field
+                        if markers and not any(marker in line for marker in markers):
+                            continue
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue
+                        if (start is not None and event["ts"] < start) or (end is not None and event["ts"] > end):
+                            continue
+                        if types and event["type"] not in types:
+                            continue
+                        yield event
+            except OSError:
+                continue
+    
+class TunnelUrlStore:
+    """History of generated tunnel URLs in SQLite, mirrored to the human-readable text file
+
+    add() only queues an entry. Every `flush_interval` seconds a background
+    thread writes the queued entries as one SQLite transaction, then one
+    append per text file, so a burst of restarts costs a single fsync. A
+    failed write keeps the entries queued for the next flush. Reads page
+    newest-first on the primary key, so the latest N entries cost N rows
+    however long the history is; they see entries once the writer has
+    committed them.
+
+    On first use an empty store imports the existing text file from
+    `legacy_source()`.
+    """
+    
+    def __init__(self, path, legacy_source=None, flush_interval=1.0):
+        self.path = path
+        self.legacy_source = legacy_source
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.text_pending = {}  # Text file path -> lines committed to SQLite but not yet appended
+        self.conn = None
+        self.thread = None
+        self.version = f"{time.time():.0f}.0"  # Changes whenever entries are written (see api_tunnel_urls ETags)
+        self.writes = 0
+        self.lock = threading.Lock()  # Serializes flushes and queries on the shared connection
+    
+    def _connect(self):
+        """Open the database on first use (lock held)"""
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # Each (batched) commit is durable
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tunnel_urls ("
+                "id INTEGER PRIMARY KEY, ts REAL NOT NULL, local_url TEXT NOT NULL, "
+                "date TEXT NOT NULL, time TEXT NOT NULL, generated_url TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tunnel_urls_local ON tunnel_urls (local_url, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS tunnel_urls_date ON tunnel_urls (date, id)")
+            if conn.execute("SELECT 1 FROM tunnel_urls LIMIT 1").fetchone() is None and self.legacy_source:
+                self._import_text(conn, self.legacy_source())
+            self.conn = conn
+        return self.conn
+    
+    def _import_text(self, conn, path):
+        if not path or not os.path.exists(path):
+            return
+        rows = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = _parse_tunnel_url_line(line)
+                if entry:
+                    rows.append(self._row(entry))
+        with conn:
+            conn.executemany(
+                "INSERT INTO tunnel_urls (ts, local_url, date, time, generated_url) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        logger.info(f"Imported {len(rows)} tunnel URLs from {path}")
+    
+    @staticmethod
+    def _row(entry):
+        try:
+            ts = datetime.strptime(f"{entry['date']} {entry['time']}", "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            ts = 0.0
+        return (ts, entry["local_url"], entry["date"], entry["time"], entry["generated_url"])
+    
+    def add(self, entry, text_path):
+        """Queue an entry ({"local_url", "date", "time", "generated_url"}) for the store and the text file"""
+        with self.lock:
+            self.pending.append((entry, text_path))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="tunnel-url-writer", daemon=True)
+                self.thread.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error writing tunnel URLs: {e}")
+    
+    def flush(self):
+        """Write the queued entries; returns how many were committed to SQLite
+
+        SQLite is written first and is the source of truth. If it fails the
+        batch goes back on the queue; if a text file append fails its lines
+        stay queued for that file. Either error is re-raised.
+        """
+        with self.lock:
+            batch, self.pending = self.pending, []
+            if batch:
+                try:
+                    # Open first: importing the text file must not see this batch
+                    conn = self._connect()
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO tunnel_urls (ts, local_url, date, time, generated_url) VALUES (?, ?, ?, ?, ?)",
+                            [self._row(entry) for entry, _ in batch]
+                        )
+                except Exception:
+                    self.pending = batch + self.pending
+                    raise
+                self.writes += 1
+                self.version = f"{self.version.split('.')[0]}.{self.writes}"
+                for entry, text_path in batch:
+                    self.text_pending.setdefault(text_path, []).append(entry["full_entry"] + "\n")
+            
+            for text_path in list(self.text_pending):
+                os.makedirs(os.path.dirname(text_path) or ".", exist_ok=True)
+                with open(text_path, 'a', encoding='utf-8') as f:
+                    f.write("".join(self.text_pending[text_path]))
+                    f.flush()
+                    os.fsync(f.fileno())
+                del self.text_pending[text_path]
+            return len(batch)
+    
+    def etag_version(self):
+        """Return a version string that changes whenever entries are queued or committed"""
+        with self.lock:
+            return f"{self.version}+{len(self.pending)}"
+    
+    def page(self, limit=100, cursor=None, local_url=None, date_from=None, date_to=None):
+        """Return a page of entries, newest first
+
+        Args:
+            limit (int): Maximum number of entries
+            cursor (int): next_cursor of the previous page
+            local_url (str): Only entries for this local URL
+            date_from (str): First date (YYYY-MM-DD), inclusive
+            date_to (str): Last date (YYYY-MM-DD), inclusive
+
+        Returns:
+            dict: "entries", "total" (matching entries on all pages) and
+            "next_cursor" (None on the last page)
+        """
+        clauses, params = [], []
+        if local_url:
+            clauses.append("local_url = ?")
+            params.append(local_url)
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(date_to)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        page_where = " WHERE " + " AND ".join(clauses + ["id < ?"]) if cursor is not None else where
+        page_params = params + [cursor] if cursor is not None else params
+        
+        with self.lock:
+            conn = self._connect()
+            rows = conn.execute(
+                f"SELECT id, local_url, date, time, generated_url FROM tunnel_urls{page_where} ORDER BY id DESC LIMIT ?",
+                page_params + [limit + 1]
+            ).fetchall()
+            total = conn.execute(f"SELECT COUNT(*) FROM tunnel_urls{where}", params).fetchone()[0]
+        
+        entries = [{
+            "id": row[0],
+            "local_url": row[1],
+            "date": row[2],
+            "time": row[3],
+            "generated_url": row[4],
+            "full_entry": f"{row[1]} - {row[2]} - {row[3]} - {row[4]}"
+        } for row in rows[:limit]]
+        return {"entries": entries, "total": total, "next_cursor": entries[-1]["id"] if len(rows) > limit else None}
+
+class TunnelUrlFile:
+    """Incrementally parsed view of the tunnel URLs text file
+
+    Remembers the file's identity (device and inode), how far it has been
+    parsed and the entries found so far. refresh() parses only the complete
+    lines appended since the previous call. A new inode (the file was rotated
+    or replaced), a smaller size or different bytes just before the parsed
+    offset (truncated and rewritten) start over from the beginning. tail()
+    answers "latest N" without parsing the whole file by reading backwards
+    from EOF.
+    """
+    
+    BLOCK_SIZE = 8192
+    
+    def __init__(self):
+        self.path = None
+        self.identity = None
+        self.offset = 0
+        self.marker = b""  # Last bytes before offset, to detect rewrites
+        self.entries = []  # Oldest first
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def signature(path):
+        """Return (device, inode, size, mtime_ns) of the file, or None if it does not exist"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    
+    def is_loaded(self, path):
+        return self.path == path
+    
+    def refresh(self, path):
+        """Bring the parsed entries up to date with the file and return them, oldest first"""
+        with self.lock:
+            signature = self.signature(path)
+            if signature is None:
+                self.path, self.identity, self.offset, self.marker, self.entries = path, None, 0, b"", []
+                return self.entries
+            
+            identity, size = signature[:2], signature[2]
+            with open(path, 'rb') as f:
+                if path != self.path or identity != self.identity or size < self.offset or not self._marker_matches(f):
+                    self.path, self.identity, self.offset, self.marker, self.entries = path, identity, 0, b"", []
+                if size > self.offset:
+                    f.seek(self.offset)
+                    data = f.read(size - self.offset)
+                    end = data.rfind(b"\n") + 1  # A partial last line waits for the next refresh
+                    for line in data[:end].decode('utf-8', errors='replace').splitlines():
+                        entry = _parse_tunnel_url_line(line)
+                        if entry:
+                            self.entries.append(entry)
+                    self.offset += end
+                    if end:
+                        f.seek(max(0, self.offset - 64))
+                        self.marker = f.read(self.offset - max(0, self.offset - 64))
+            return self.entries
+    
+    def _marker_matches(self, f):
+        if not self.marker:
+            return True
+        f.seek(self.offset - len(self.marker))
+        return f.read(len(self.marker)) == self.marker
+    
+    def tail(self, path, n):
+        """Return the last n entries, newest first, reading blocks backwards from EOF"""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            cut = b""  # Start of the line cut by the previous block boundary
+            entries = []
+            while position > 0 and len(entries) < n:
+                step = min(self.BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + cut).split(b"\n")
+                # The first line may be cut by this block's boundary too, unless we reached the start
+                cut = lines.pop(0) if position > 0 else b""
+                entries.extend(entry for entry in (_parse_tunnel_url_line(line.decode('utf-8', errors='replace'))
+                                                   for line in reversed(lines)) if entry)
+        return entries[:n]
+
+# cloudflared log lines look like "2024-05-01T10:00:00Z INF message"
+CLOUDFLARED_LOG_RATE = 200  # Plain cloudflared output lines logged per second (bursts up to CLOUDFLARED_LOG_BURST)
+CLOUDFLARED_LOG_BURST = 1000
+CLOUDFLARED_LEVELS = {b"DBG": "debug", b"INF": "info", b"WRN": "warning", b"ERR": "error", b"FTL": "error"}
+# Typed event matchers: (literal the line must contain, ((event type, pattern), ...)).
+# The literal is a cheap substring test so the patterns only run on candidate lines.
+CLOUDFLARED_URL_MATCHER = (b".trycloudflare.com", (("url", re.compile(rb"https://[-\w]+\.trycloudflare\.com")),))
+CLOUDFLARED_MATCHERS = (
+    CLOUDFLARED_URL_MATCHER,
+    (b"onnection", (
+        ("registered", re.compile(rb"(?<!Un)[Rr]egistered tunnel connection")),
+        ("lost", re.compile(rb"Unregistered tunnel connection|Connection terminated|Retrying connection")),
+    )),
+)
+
+class CloudflaredOutput:
+    """Reads cloudflared's output as binary chunks and fans typed events out to subscribers
+
+    Each line is parsed once into an event dict: type ("output", "url",
+    "registered" or "lost"), ts and level from cloudflared's log prefix (None
+    for unstructured lines), message and, for "url", the URL. The URL matcher
+    switches off once a URL has been captured. Subscribers are called once
+    per chunk read with the list of its events; every subscriber receives the
+    same list, so subscribers must not modify it.
+    """
+    
+    def __init__(self, stream, chunk_size=65536):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.subscribers = []
+        self.url = None
+        self.matchers = CLOUDFLARED_MATCHERS
+        self.lines = 0
+        self.bytes = 0
+    
+    def subscribe(self, callback):
+        """Call callback(events) for every chunk of parsed lines; returns the callback"""
+        self.subscribers.append(callback)
+        return callback
+    
+    def run(self, stop=None):
+        """Read until EOF (or until stop is set) and dispatch the events of every chunk"""
+        read = getattr(self.stream, 'read1', self.stream.read)  # read1 returns what is available without waiting to fill
+        pending = b""
+        while stop is None or not stop.is_set():
+            chunk = read(self.chunk_size)
+            if not chunk:
+                break
+            self.bytes += len(chunk)
+            lines = (pending + chunk).split(b"\n") if pending else chunk.split(b"\n")
+            pending = lines.pop()
+            self.dispatch(lines)
+        if pending and (stop is None or not stop.is_set()):
+            self.dispatch([pending])
+    
+    def dispatch(self, lines):
+        events = [event for event in map(self.parse, lines) if event]
+        if events:
+            for callback in self.subscribers:
+                callback(events)
+    
+    def parse(self, line):
+        """Parse one line (bytes, without the newline) into an event, or None if it is blank"""
+        line = line.strip()
+        if not line:
+            return None
+        self.lines += 1
+        space = line.find(b" ", 0, 40)
+        level = CLOUDFLARED_LEVELS.get(line[space + 1:space + 4]) if space > 0 and line[space - 1:space] == b"Z" else None
+        ts = line[:space].decode('ascii', errors='replace') if level else None
+        event = {"type": "output", "ts": ts, "level": level, "message": line.decode('utf-8', errors='replace')}
+        
+        for literal, patterns in self.matchers:
+            if literal in line:
+                for event_type, pattern in patterns:
+                    match = pattern.search(line)
+                    if match:
+                        event["type"] = event_type
+                        break
+                else:
+                    continue
+                if event_type == "url":
+                    self.url = event["url"] = match.group(0).decode('ascii')
+                    self.matchers = tuple(m for m in self.matchers if m is not CLOUDFLARED_URL_MATCHER)
+                break
+        
+        return event
+
+RESTART_POLICIES = ("always", "on-failure", "never")
+RESTART_WINDOW = 60  # Seconds over which unexpected exits count towards the restart backoff
+RESTART_BACKOFF_MAX = 30  # Longest delay before restarting a crash-looping cloudflared
+
+def restart_delay(policy, returncode, crashes):
+    """Seconds to wait before restarting after an unexpected exit, or None if the policy forbids it
+
+    crashes is a deque of the monotonic times of recent unexpected exits;
+    entries older than RESTART_WINDOW are dropped. The delay doubles with
+    every further crash in the window, up to RESTART_BACKOFF_MAX.
+    """
+    if policy == "never" or (policy == "on-failure" and returncode == 0):
+        return None
+    now = time.monotonic()
+    while crashes and crashes[0] < now - RESTART_WINDOW:
+        crashes.popleft()
+    return 0 if len(crashes) <= 1 else min(2 ** (len(crashes) - 2), RESTART_BACKOFF_MAX)
+
+def process_alive(process):
+    """True if the process exists and has not exited (returncode is set by the supervisor's waiter)"""
+    return process is not None and process.returncode is None
+
+class TunnelSupervisor:
+    """Event-driven supervision of every cloudflared process
+
+    watch() starts a waiter thread blocked in process.wait() (waitpid on
+    POSIX, a handle wait on Windows), so an exit is seen within milliseconds
+    instead of at the next poll. Every exit is recorded with its code and,
+    on POSIX, the signal; unexpected ones are announced as tunnel_exited
+    events and wake whoever restarts that process: the monitor loop for the
+    main tunnel and its standby, the TunnelManager for additional tunnels.
+    Crash windows are kept per role ("active", "standby" or "tunnel <name>")
+    and restarts of all of them go through restart_after_exit(). The
+    supervisor is the only writer of the main tunnel state
+    (STATS["current_status"] and the 'tunnel_status' topic).
+    """
+    
+    def __init__(self, history=50):
+        self.status = "stopped"
+        self.exits = deque(maxlen=history)
+        self.crashes = {"active": deque(), "standby": deque()}  # Monotonic times of recent unexpected exits, per role
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+    
+    def watch(self, process):
+        """Wait for the process to exit in a dedicated thread"""
+        thread = threading.Thread(target=self._wait, args=(process,), name=f"waiter-{process.pid}")
+        thread.daemon = True
+        thread.start()
+    
+    def _wait(self, process):
+        returncode = process.wait()
+        now = time.monotonic()
+        role = "active" if process is tunnel_process else "standby" if process is standby_process else process.role
+        expected = process.stopping
+        signal_name = None
+        if returncode < 0:
+            try:
+                signal_name = signal.Signals(-returncode).name
+            except ValueError:
+                signal_name = str(-returncode)
+        exit = {
+            "timestamp": time.time(), "pid": process.pid, "role": role,
+            "returncode": returncode, "signal": signal_name, "expected": expected
+        }
+        self.exits.append(exit)
+        
+        tunnel = getattr(process, "tunnel", None)  # The ManagedTunnel of an additional tunnel
+        if not expected:
+            with self.lock:
+                self.crashes.setdefault(role, deque()).append(now)
+            if role == "active":
+                failover["detected"] = now  # Recovery is timed from here (see publish_tunnel_url)
+                self.set_state("restarting")
+            fields = {"tunnel": tunnel.name} if tunnel else {}
+            emit_event("tunnel_exited", role=role, pid=process.pid, returncode=returncode, signal=signal_name, **fields)
+        if tunnel:
+            tunnel.exited(process, exit)
+        else:
+            self.wakeup.set()
+    
+    def wake(self):
+        """End the monitor loop's current wait() early"""
+        self.wakeup.set()
+    
+    def wait(self, timeout):
+        """Sleep up to timeout seconds; returns True early when a supervised process exited or wake() was called"""
+        woken = self.wakeup.wait(timeout)
+        self.wakeup.clear()
+        return woken
+    
+    def set_state(self, status):
+        """Publish the tunnel state: stopped, starting, running, restarting or failed"""
+        with self.lock:
+            if status == self.status:
+                return
+            self.status = status
+        STATS["current_status"] = status.capitalize()
+        broadcast_bus.publish('tunnel_status', {'status': status})
+        publish_main_tunnel()
+    
+    def restart_delay(self, config, role, returncode):
+        """Restart delay for the process of a role under the configured policy (see restart_delay)"""
+        with self.lock:
+            return restart_delay(config["restart_policy"], returncode, self.crashes.setdefault(role, deque()))
+    
+    def restart_after_exit(self, config, role, returncode, **fields):
+        """Apply the restart policy to an unexpected exit of the process of a role
+
+        Returns:
+            The delay in seconds before restarting, or None if the policy
+            gives up (restart_abandoned is emitted with the given fields)
+        """
+        delay = self.restart_delay(config, role, returncode)
+        if delay is None:
+            emit_event("restart_abandoned", policy=config["restart_policy"], returncode=returncode, **fields)
+        return delay
+    
+    def announce_restart(self, role, delay, **fields):
+        """Emit restart_scheduled for a restart held back by delay seconds"""
+        with self.lock:
+            crashes = len(self.crashes.get(role, ()))
+        emit_event("restart_scheduled", delay=delay, window=RESTART_WINDOW, crashes=crashes, **fields)
+    
+    def reset(self, *roles):
+        """Forget the recent crashes of the given roles (by default the main tunnel and its standby)"""
+        with self.lock:
+            for role in roles or ("active", "standby"):
+                if role in self.crashes:
+                    self.crashes[role].clear()
+    
+    def forget(self, role):
+        """Drop the crash window of a removed additional tunnel"""
+        with self.lock:
+            self.crashes.pop(role, None)
+    
+    def stats(self):
+        with self.lock:
+            recent_crashes = {role: len(crashes) for role, crashes in self.crashes.items()}
+        return {
+            "status": self.status,
+            "recent_crashes": recent_crashes,
+            "exits": list(self.exits)
+        }
+
+TUNNEL_NAME_PATTERN = re.compile(r"[\w-]{1,40}")
+DEFAULT_TUNNEL_NAME = "default"  # Name of the main tunnel (tunnel_url) in the tunnel-scoped APIs
+
+class ManagedTunnel:
+    """One additional cloudflared quick tunnel, owned by the TunnelManager
+
+    Has its own state, counters and URL; discovered URLs go to the shared
+    tunnel URL history under this tunnel's local URL. Its processes are
+    watched by tunnel_supervisor like the main tunnel's (role "tunnel
+    <name>"); a thread per process only reads the output.
+    """
+    
+    def __init__(self, name, local_url, manager):
+        self.name = name
+        self.role = f"tunnel {name}"  # Role in tunnel_supervisor's exits and crash windows
+        self.local_url = local_url
+        self.manager = manager
+        self.process = None
+        self.status = "stopped"  # stopped, starting, running, restarting or failed
+        self.url = None
+        self.starts = 0
+        self.crash_count = 0
+        self.last_exit = None
+        self.started_at = None
+        self.next_start = 0.0  # Monotonic time before which a restart is held back
+        self.output = deque(maxlen=20)  # Recent output lines, for /api/tunnels/<name>
+    
+    def alive(self):
+        return process_alive(self.process)
+    
+    def start(self, config):
+        """Start cloudflared for this tunnel; returns False (and records the error) if it cannot be started"""
+        command = [_cloudflared_executable(config), "tunnel", "--url", self.local_url]
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except OSError as e:
+            self.status = "failed"
+            self.last_exit = {"timestamp": time.time(), "error": str(e)}
+            emit_event("tunnel_error", error=str(e), tunnel=self.name)
+            self.publish()
+            return False
+        process.stopping = False
+        process.role = self.role
+        process.tunnel = self
+        self.process = process
+        self.url = None
+        self.starts += 1
+        self.started_at = time.time()
+        self.status = "starting"
+        emit_event("tunnel_started", local_url=self.local_url, pid=process.pid, command=command[0], tunnel=self.name)
+        self.publish()
+        tunnel_supervisor.watch(process)
+        thread = threading.Thread(target=self._read_output, args=(process, config), name=f"tunnel-{self.name}")
+        thread.daemon = True
+        thread.start()
+        return True
+    
+    def _read_output(self, process, config):
+        output = CloudflaredOutput(process.stdout)
+        output.subscribe(lambda events: self._on_output(process, events, config))
+        output.run()
+    
+    def exited(self, process, exit):
+        """Record an exit seen by tunnel_supervisor; an unexpected one is restarted by the manager"""
+        self.last_exit = exit
+        if exit["expected"]:
+            return
+        self.crash_count += 1
+        if process is self.process:
+            self.status = "restarting"
+        self.publish()
+        self.manager.wake()
+    
+    def _on_output(self, process, events, config):
+        self.output.extend(event["message"] for event in events[-self.output.maxlen:])
+        changed = False
+        for event in events:
+            if event["type"] == "url" and self.url is None:
+                self.url = event["url"]
+                changed = True
+                save_tunnel_url(self.url, dict(config, tunnel_url=self.local_url))
+                emit_event("tunnel_url", url=self.url, local_url=self.local_url, tunnel=self.name)
+            elif event["type"] in ("registered", "lost"):
+                emit_event("tunnel_connection", level="info" if event["type"] == "registered" else "warning",
+                           state=event["type"], line=event["message"], tunnel=self.name)
+        if self.url and self.status == "starting" and process is self.process:
+            self.status = "running"
+            changed = True
+        if changed:  # Plain output lines change nothing the dashboard shows
+            self.publish()
+    
+    def stop(self):
+        process, self.process = self.process, None
+        if self.status not in ("stopped", "failed"):  # Failed stays failed until restart()
+            self.status = "stopped"
+            self.publish()
+        if process is None or process.returncode is not None:
+            return
+        process.stopping = True
+        try:
+            process.terminate()
+            process.wait(timeout=5)
+        except Exception:
+            process.kill()
+        emit_event("tunnel_stopped", pid=process.pid, method="stopped", tunnel=self.name)
+    
+    def snapshot(self):
+        return {
+            "name": self.name,
+            "local_url": self.local_url,
+            "status": self.status,
+            "url": self.url,
+            "pid": self.process.pid if self.alive() else None,
+            "starts": self.starts,
+            "crashes": self.crash_count,
+            "uptime": time.time() - self.started_at if self.alive() and self.started_at else 0,
+            "last_exit": self.last_exit
+        }
+    
+    def publish(self):
+        """Push this tunnel's state on its own 'tunnel:<name>' topic (on state, URL and exit changes only)"""
+        broadcast_bus.publish(f'tunnel:{self.name}', self.snapshot())
+
+class TunnelManager:
+    """Runs the additional tunnels of the "tunnels" setting next to the main tunnel
+
+    tunnel_manager_thread calls reconcile() while the internet is up,
+    independently of the main tunnel's monitor loop: it starts missing
+    tunnels, stops removed or changed ones and restarts dead ones through
+    tunnel_supervisor's restart policy. Exits, settings changes and due
+    restarts end its wait() early. Probing and broadcasting stay shared;
+    each tunnel publishes its own 'tunnel:<name>' topic when it changes.
+    """
+    
+    def __init__(self):
+        self.tunnels = {}  # name -> ManagedTunnel
+        self.lock = threading.RLock()
+        self.wakeup = threading.Event()
+    
+    def reconcile(self, config):
+        desired = {spec["name"]: spec["url"] for spec in config["tunnels"]}
+        now = time.monotonic()
+        with self.lock:
+            for name, tunnel in list(self.tunnels.items()):
+                if desired.get(name) != tunnel.local_url:
+                    tunnel.stop()
+                    tunnel_supervisor.forget(tunnel.role)
+                    del self.tunnels[name]
+                    broadcast_bus.publish(f'tunnel:{name}', {'name': name, 'removed': True})
+            for name, local_url in desired.items():
+                tunnel = self.tunnels.get(name)
+                if tunnel is None:
+                    tunnel = self.tunnels[name] = ManagedTunnel(name, local_url, self)
+                if tunnel.alive() or tunnel.status == "failed" or now < tunnel.next_start:
+                    continue
+                if tunnel.process is not None:
+                    # Exited on its own: hold the restart back as the policy says
+                    returncode = tunnel.process.returncode
+                    tunnel.process = None
+                    delay = tunnel_supervisor.restart_after_exit(config, tunnel.role, returncode, tunnel=name)
+                    if delay is None:
+                        tunnel.status = "failed"
+                        tunnel.publish()
+                        continue
+                    if delay:
+                        tunnel_supervisor.announce_restart(tunnel.role, delay, tunnel=name)
+                        tunnel.next_start = now + delay
+                        continue
+                tunnel.start(config)
+    
+    def wake(self):
+        """End the current wait() early"""
+        self.wakeup.set()
+    
+    def wait(self, timeout):
+        """Sleep up to timeout seconds, or until wake() or the earliest held-back restart is due"""
+        due = self.next_due()
+        if due is not None:
+            timeout = max(0, min(timeout, due - time.monotonic()))
+        woken = self.wakeup.wait(timeout)
+        self.wakeup.clear()
+        return woken
+    
+    def next_due(self):
+        """Monotonic time of the earliest held-back restart, or None"""
+        with self.lock:
+            pending = [tunnel.next_start for tunnel in self.tunnels.values()
+                       if tunnel.status == "restarting" and not tunnel.alive()]
+        return min(pending) if pending else None
+    
+    def stop_all(self):
+        with self.lock:
+            for tunnel in self.tunnels.values():
+                tunnel.stop()
+    
+    def restart(self, name):
+        """Stop a tunnel and clear its failure state; the next reconcile starts it again"""
+        with self.lock:
+            tunnel = self.tunnels[name]
+            tunnel.stop()
+            if tunnel.status == "failed":
+                tunnel.status = "stopped"
+                tunnel.publish()
+            tunnel_supervisor.reset(tunnel.role)
+            tunnel.next_start = 0.0
+        self.wake()
+    
+    def get(self, name):
+        with self.lock:
+            return self.tunnels.get(name)
+    
+    def snapshots(self):
+        with self.lock:
+            return [tunnel.snapshot() for tunnel in self.tunnels.values()]
+
+def main_tunnel_snapshot():
+    """State of the main tunnel, named DEFAULT_TUNNEL_NAME, in the form of ManagedTunnel.snapshot()"""
+    process = tunnel_process
+    exits = [exit for exit in tunnel_supervisor.exits if exit["role"] == "active"]
+    return {
+        "name": DEFAULT_TUNNEL_NAME,
+        "local_url": load_config()["tunnel_url"],
+        "status": tunnel_supervisor.status,
+        "url": STATS["last_tunnel_url"],
+        "pid": process.pid if process_alive(process) else None,
+        "starts": STATS["tunnel_starts"],
+        "crashes": sum(1 for exit in exits if not exit["expected"]),
+        "uptime": STATS["total_uptime"],
+        "last_exit": exits[-1] if exits else None
+    }
+
+def publish_main_tunnel():
+    """Push the main tunnel's state on its 'tunnel:<name>' topic, next to the additional tunnels'"""
+    broadcast_bus.publish(f'tunnel:{DEFAULT_TUNNEL_NAME}', main_tunnel_snapshot())
+
+def all_tunnel_snapshots():
+    """State of the main tunnel followed by every managed tunnel"""
+    return [main_tunnel_snapshot()] + tunnel_manager.snapshots()
+
+# Global variables
+tunnel_process = None
+standby_process = None  # Warm standby cloudflared (see maintain_standby)
+tunnel_lock = threading.Lock()  # Guards promotion against the output threads publishing URLs
+failover = {"detected": None, "mode": None}  # Pending failover: monotonic detection time and "standby" or "cold"
+failover_history = deque(maxlen=100)  # (timestamp, mode, latency seconds) of recent failovers
+tunnel_supervisor = TunnelSupervisor()  # Owns the tunnel state; restarts are done by monitor_thread_func
+tunnel_manager = TunnelManager()  # Additional tunnels from the "tunnels" setting
+tunnel_manager_running = False
+tunnel_manager_thread_instance = None
+stop_event = threading.Event()
+monitor_thread_instance = None  # Thread running monitor_thread_func (see /api/start)
+log_buffer = LogBuffer(5000)  # Recent log records for the web UI (see /api/logs)
+log_stream = LogStream(log_buffer)  # Live 'log_stream' subscriptions, flushed by the broadcast bus thread
+event_log = EventLog(logs_dir, retention_days=LOG_RETENTION_DAYS)  # Typed events (see emit_event)
+
+# Event types: level and message of the human-readable log line written alongside the event
+EVENT_TYPES = {
+    "monitor_started": ("success", "Monitor started"),
+    "monitor_stopped": ("warning", "Monitor stopped"),
+    "tunnel_started": ("info", "Starting cloudflared tunnel to {local_url}"),
+    "tunnel_url": ("success", "Tunnel URL detected and saved: {url}"),
+    "tunnel_stopped": ("success", "Cloudflared tunnel {method} (pid {pid})"),
+    "tunnel_error": ("error", "Error starting cloudflared: {error}"),
+    "tunnel_exited": ("warning", "Cloudflared {role} process exited unexpectedly (pid {pid}, exit code {returncode})"),
+    "restart_scheduled": ("info", "Restarting cloudflared in {delay}s (crash {crashes} in the last {window}s)"),
+    "restart_abandoned": ("error", "Not restarting cloudflared (restart policy {policy}, exit code {returncode})"),
+    "standby_started": ("info", "Starting standby cloudflared tunnel to {local_url}"),
+    "standby_promoted": ("success", "Standby cloudflared promoted to active tunnel (pid {pid})"),
+    "tunnel_failover": ("success", "Tunnel failover ({mode}) completed in {latency}s: {url}"),
+    "tunnel_connection": ("info", "Cloudflared connection {state}: {line}"),
+    "internet_lost": ("warning", "Internet connection lost"),
+    "internet_restored": ("success", "Internet connection restored after {downtime}s"),
+    "retry_scheduled": ("info", "Retrying in {delay} seconds (attempt {attempt}/{max_retries})"),
+    "probe_failed": ("warning", "Ping failed to {host} (failure {failures}/{limit})"),
+    "probe_failover": ("info", "Switched to alternative ping host: {host}"),
+    "config_saved": ("success", "Configuration saved to {path}"),
+    "config_reset": ("success", "Configuration reset to default values"),
+    "logs_cleared": ("info", "Application logs cleared"),
+}
+RECENT_EVENTS = 15  # Events listed on the dashboard
+config_file = "tunnel_monitor_config.json"
+
+# Configuration cache (see load_config)
+CONFIG_TYPES = {
+    "tunnel_url": str,
+    "cloudflared_path": str,
+    "check_interval": int,
+    "max_retries": int,
+    "retry_delay": int,
+    "debug_mode": bool,
+    "github_repo": str,
+    "ping_test_url": str,
+    "tunnel_urls_save_directory": str,
+    "tunnel_urls_filename": str,
+    "ping_backend": str,
+    "broadcast_rate": int,
+    "history_retention_days": int,
+    "tunnel_urls_backend": str,
+    "cloudflared_metrics": str,
+    "tunnel_standby": bool,
+    "restart_policy": str,
+    "tunnels": list
+}
+CONFIG_OPTIONAL = {"cloudflared_path"}  # Keys that may be None
+CONFIG_MINIMUMS = {"check_interval": 1, "max_retries": 0, "retry_delay": 0, "broadcast_rate": 1, "history_retention_days": 1}
+_config_cache = {"config": None, "signature": None}  # Parsed config and the (mtime, size) it was read at
+config_lock = threading.RLock()
+config_listeners = []
+
+# Ping engine
+ping_backend = None  # Selected key of PING_BACKENDS (chosen at startup)
+PING_BENCHMARK_MAX_SECONDS = 10  # Wall time budget of one /api/ping-benchmark run
+ping_benchmark_lock = threading.Lock()  # One benchmark at a time
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMP_PAYLOAD = b"abcdefghijklmnopqrstuvwabcdefghi"  # 32 bytes, matches Windows ping
+TCP_PROBE_PORT = 443  # Port used by the TCP handshake ping backend
+_icmp_sequence = itertools.count(1)
+# Shared connectivity verdict (see check_internet)
+connectivity = {
+    "connected": None,  # Last verdict, None until the first check
+    "checked_at": None,  # time.monotonic() of the last check
+    "last_check": None,  # Wall clock time of the last check
+    "streak": 0,  # Number of consecutive checks with the same verdict
+    "lost_at": None  # time.monotonic() of the last transition to disconnected
+}
+connectivity_lock = threading.Lock()
+_connectivity_probe = None  # Event of the in-flight probe, shared by concurrent callers
+CONNECTIVITY_TTL = 5  # Seconds a verdict is served from cache
+CONNECTIVITY_STALE_AFTER = 60  # Seconds after which confidence in a verdict reaches zero
+CONNECTIVITY_PROBE_TIMEOUT = 10  # Seconds a caller waits for someone else's probe
+
+RESOLVE_CACHE_TTL = 300  # Seconds to cache host name lookups made by the probe scheduler
+_resolve_cache = {}
+
+# Initialize Flask app with enhanced security
+app = Flask(__name__)
+app.secret_key = os.environ.get('SECRET_KEY', os.urandom(24))
+app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
+app.config['SESSION_COOKIE_HTTPONLY'] = True
+app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+
+# Initialize SocketIO with CORS support
+socketio = SocketIO(app, cors_allowed_origins="*", ping_timeout=60, ping_interval=25)
+
+# Auto-open browser flag
+auto_open_browser = True
+
+# Time series storage
+class TimeSeriesRing:
+    """Fixed-size ring buffer of samples stored in parallel array('d') columns
+
+    Appending is O(1) and allocates nothing; once full, the oldest sample is
+    overwritten. Reads slice the columns through memoryviews and return plain
+    lists (or the historical list-of-dicts shape) for JSON and charts.
+    """
+    
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.columns = {name: array('d', bytes(8 * capacity)) for name in self.fields}
+        self.head = 0  # Next write position
+        self.size = 0
+        self.total = 0  # Number of samples ever appended
+    
+    def __len__(self):
+        return self.size
+    
+    def append(self, timestamp, *values):
+        """Add a sample; values are given in the order of self.fields"""
+        index = self.head
+        self.timestamps[index] = timestamp
+        for name, value in zip(self.fields, values):
+            self.columns[name][index] = value
+        self.head = (index + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+        self.total += 1
+    
+    def clear(self):
+        self.head = 0
+        self.size = 0
+    
+    def _segments(self, last=None):
+        """Return the (start, stop) index ranges holding the newest `last` samples, oldest first"""
+        count = self.size if last is None else max(0, min(last, self.size))
+        start = (self.head - count) % self.capacity
+        if start + count <= self.capacity:
+            return [(start, start + count)]
+        return [(start, self.capacity), (0, start + count - self.capacity)]
+    
+    def column(self, name, last=None):
+        """Return one column ("timestamp" or a field name) as a list, oldest first"""
+        view = memoryview(self.timestamps if name == "timestamp" else self.columns[name])
+        values = []
+        for start, stop in self._segments(last):
+            values.extend(view[start:stop].tolist())
+        return values
+    
+    def to_columns(self, last=None):
+        """Export the newest samples as {"timestamp": [...], field: [...]}"""
+        return {name: self.column(name, last) for name in ("timestamp",) + self.fields}
+    
+    def to_records(self, last=None):
+        """Export the newest samples as a list of {"timestamp": ..., field: ...} dicts"""
+        names = ("timestamp",) + self.fields
+        return [dict(zip(names, row)) for row in zip(*(self.column(name, last) for name in names))]
+
+class RollingStats:
+    """Windowed ping statistics updated in O(1) amortized time per sample
+
+    Keeps a running sum and sum of squares over the last `window` replies,
+    monotonic deques for the sliding min and max, an RFC 3550 style jitter
+    estimate and the loss rate over the last `window` probes.
+    """
+    
+    RESYNC_EVERY = 4096  # Samples between exact re-summations, bounds float drift
+    
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.min_candidates = deque()  # (index, value), values increasing
+        self.max_candidates = deque()  # (index, value), values decreasing
+        self.index = 0
+        self.outcomes = deque()  # True for a reply, False for a lost probe
+        self.lost = 0
+        self.jitter = 0.0
+        self.last_value = None
+    
+    def _record_outcome(self, received):
+        self.outcomes.append(received)
+        if not received:
+            self.lost += 1
+        if len(self.outcomes) > self.window and not self.outcomes.popleft():
+            self.lost -= 1
+    
+    def add(self, value):
+        """Add a probe result (response time in ms, or None for a lost probe)"""
+        self._record_outcome(value is not None)
+        if value is None:
+            return
+        
+        index = self.index
+        self.index += 1
+        self.values.append(value)
+        self.sum += value
+        self.sum_sq += value * value
+        
+        while self.min_candidates and self.min_candidates[-1][1] >= value:
+            self.min_candidates.pop()
+        self.min_candidates.append((index, value))
+        while self.max_candidates and self.max_candidates[-1][1] <= value:
+            self.max_candidates.pop()
+        self.max_candidates.append((index, value))
+        
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.sum -= old
+            self.sum_sq -= old * old
+            oldest_index = index - self.window + 1
+            if self.min_candidates[0][0] < oldest_index:
+                self.min_candidates.popleft()
+            if self.max_candidates[0][0] < oldest_index:
+                self.max_candidates.popleft()
+        
+        if self.index % self.RESYNC_EVERY == 0:
+            self.sum = math.fsum(self.values)
+            self.sum_sq = math.fsum(v * v for v in self.values)
+        
+        # RFC 3550: J += (|D| - J) / 16, with D the change between consecutive samples
+        if self.last_value is not None:
+            self.jitter += (abs(value - self.last_value) - self.jitter) / 16
+        self.last_value = value
+    
+    def snapshot(self):
+        """Return the statistics in the shape used by the ping APIs and events"""
+        count = len(self.values)
+        loss = self.lost / len(self.outcomes) * 100 if self.outcomes else 0
+        if not count:
+            return {"avg": 0, "min": 0, "max": 0, "count": 0, "stddev": 0, "jitter": 0, "loss": loss}
+        
+        avg = self.sum / count
+        return {
+            "avg": avg,
+            "min": self.min_candidates[0][1],
+            "max": self.max_candidates[0][1],
+            "count": count,
+            "stddev": math.sqrt(max(0.0, self.sum_sq / count - avg * avg)),
+            "jitter": self.jitter,
+            "loss": loss
+        }
+
+class LatencySketch:
+    """Mergeable DDSketch-style quantile sketch for latencies
+
+    Values are counted in logarithmically sized buckets, so every quantile is
+    returned within `relative_accuracy` of the true value in bounded memory,
+    without keeping raw samples. Sketches with the same accuracy are merged by
+    adding their bucket counts.
+    """
+    
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0  # Values too small to bucket (e.g. 0 ms replies)
+        self.count = 0
+    
+    def add(self, value):
+        self.count += 1
+        if value < SKETCH_MIN_VALUE:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+    
+    def merge(self, other):
+        """Add the counts of another sketch into this one"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+    
+    def copy(self):
+        return LatencySketch(self.relative_accuracy).merge(self)
+    
+    def percentiles(self):
+        """Return LATENCY_PERCENTILES as {"p50": ms, ...}, None when empty"""
+        result = {name: None for name, _ in LATENCY_PERCENTILES}
+        if not self.count:
+            return result
+        
+        ranks = [(name, q * (self.count - 1)) for name, q in LATENCY_PERCENTILES]
+        seen = self.zero_count
+        pending = [(name, rank) for name, rank in ranks if rank >= seen]
+        for name, rank in ranks:
+            if rank < seen:
+                result[name] = 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            while pending and pending[0][1] < seen:
+                result[pending.pop(0)[0]] = round(2 * self.gamma ** key / (self.gamma + 1), 2)
+            if not pending:
+                break
+        return result
+
+class BroadcastBus:
+    """Coalesce server-push events into one pre-encoded frame per tick
+
+    Monitor threads publish topic payloads at any time; flush() sends every
+    topic that changed since the last tick as a single 'bus' event whose JSON
+    is encoded once and shared by all clients. Later values replace earlier
+    ones, and sample deltas (payloads with "samples") are concatenated.
+    Each frame must be acknowledged by the client; a client with too many
+    unacknowledged frames is skipped and gets one snapshot frame once it
+    catches up, so a slow link never queues stale data on the server.
+    Frames not acknowledged within ack_timeout seconds count as lost (a
+    client-side error or transport hiccup swallowed the ack): they stop
+    counting against the client, which then gets a snapshot.
+    """
+    
+    def __init__(self, max_in_flight=4, ack_timeout=10):
+        self.max_in_flight = max_in_flight
+        self.ack_timeout = ack_timeout
+        self.pending = {}
+        self.clients = {}
+        self.frames = 0
+        self.lock = threading.Lock()
+    
+    def publish(self, topic, payload):
+        with self.lock:
+            previous = self.pending.get(topic)
+            if previous is not None and "samples" in previous and "samples" in payload:
+                payload = dict(payload, base_seq=previous["base_seq"], samples=previous["samples"] + payload["samples"])
+            self.pending[topic] = payload
+    
+    def add_client(self, sid):
+        with self.lock:
+            self.clients[sid] = {"in_flight": deque(), "sent": 0, "dropped": 0, "expired": 0, "needs_snapshot": False}
+    
+    def remove_client(self, sid):
+        with self.lock:
+            self.clients.pop(sid, None)
+    
+    def _ack(self, sid):
+        with self.lock:
+            client = self.clients.get(sid)
+            if client and client["in_flight"]:
+                client["in_flight"].popleft()  # Acks arrive in send order
+    
+    def _send(self, sid, encoded):
+        socketio.emit('bus', encoded, to=sid, callback=lambda *args: self._ack(sid))
+    
+    def flush(self):
+        """Send the topics published since the last flush to every client
+
+        Client counters are only read and changed under the lock (acks arrive
+        on the Socket.IO threads); the frames are emitted after releasing it.
+        """
+        with self.lock:
+            frame, self.pending = self.pending, {}
+        
+        encoded = json.dumps(frame) if frame else None
+        
+        sends = []  # (sid, True for a snapshot frame)
+        now = time.monotonic()
+        with self.lock:
+            if encoded:
+                self.frames += 1
+            for sid, client in self.clients.items():
+                in_flight = client["in_flight"]  # Send times of the unacknowledged frames, oldest first
+                if in_flight and now - in_flight[0] > self.ack_timeout:
+                    # Acks lost: forget those frames and resynchronize with a snapshot
+                    while in_flight and now - in_flight[0] > self.ack_timeout:
+                        in_flight.popleft()
+                        client["expired"] += 1
+                    client["needs_snapshot"] = True
+                if len(in_flight) >= self.max_in_flight:
+                    # Slow consumer: drop this frame, it is superseded by the snapshot sent later
+                    if encoded:
+                        client["dropped"] += 1
+                        client["needs_snapshot"] = True
+                    continue
+                if client["needs_snapshot"]:
+                    client["needs_snapshot"] = False
+                    sends.append((sid, True))
+                elif encoded:
+                    sends.append((sid, False))
+                else:
+                    continue
+                in_flight.append(now)
+                client["sent"] += 1
+        
+        snapshot = json.dumps(snapshot_frame()) if any(is_snapshot for _, is_snapshot in sends) else None
+        for sid, is_snapshot in sends:
+            self._send(sid, snapshot if is_snapshot else encoded)
+    
+    def stats(self):
+        """Return frame count and per-client queue depth (unacknowledged frames)"""
+        with self.lock:
+            return {
+                "frames": self.frames,
+                "pending_topics": list(self.pending),
+                "clients": {
+                    sid: {
+                        "queue_depth": len(client["in_flight"]),
+                        "sent": client["sent"],
+                        "dropped": client["dropped"],
+                        "expired": client["expired"]
+                    }
+                    for sid, client in self.clients.items()
+                }
+            }
+
+# Ping data
+ping_data = {
+    "last_ping_time": None,
+    "ping_history": TimeSeriesRing(3600, ("ping_time",)),  # Keep 1 hour of data (1 ping per second)
+    "max_history_points": 60,  # Points sent to clients (1 minute)
+    "rolling_stats": RollingStats(60),  # Statistics over the last minute of probes
+    "targets": {},  # Latest result per probe scheduler target
+    "published_seq": 0  # ping_history.total when the last ping_data update was published
+}
+ping_lock = threading.RLock()  # Guards the ping ring, rolling statistics and published_seq (probe and request threads)
+
+# Latency percentiles (see record_latency)
+LATENCY_PERCENTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("p99.9", 0.999))
+SKETCH_MIN_VALUE = 0.001  # Milliseconds; smaller values are counted as zero
+latency_sketches = {
+    "minute_start": None,  # Start (epoch seconds) of the minute being filled
+    "minute": LatencySketch(),
+    "previous_minute": None,  # Sketch of the minute before, if adjacent
+    "minutes": deque(maxlen=60),  # (start, sketch) for the last hour of closed minutes
+    "hour_start": None,
+    "hour": LatencySketch(),  # Roll-up of the closed minutes of the current hour
+    "hours": deque(maxlen=24 * 7),  # (start, sketch) for the last week of closed hours
+    "lifetime": LatencySketch()
+}
+latency_lock = threading.Lock()
+
+# Network data transfer monitoring
+network_data = {
+    "total_bytes_sent": 0,
+    "total_bytes_recv": 0,
+    "current_upload_speed": 0,
+    "current_download_speed": 0,
+    "transfer_history": TimeSeriesRing(1800, ("upload_speed", "download_speed", "total_sent", "total_recv")),  # 1 hour at one sample every 2 seconds
+    "max_history_points": 20,  # Points sent to clients for the chart
+    "last_measurement": None
+}
+
+# Determine the base directory
+if getattr(sys, 'frozen', False):
+    # Running as compiled executable
+    BASE_DIR = Path(sys.executable).parent
+else:
+    # Running as script
+    BASE_DIR = Path(__file__).parent
+
+# Utility functions
+def log(message, level="info"):
+    """Log a message to the console and the log buffer"""
+    log_entry = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "message": message,
+        "level": level
+    }
+    log_buffer.append(log_entry)
+    
+    # Also log to the logger
+    if level == "error":
+        logger.error(message)
+    elif level == "warning":
+        logger.warning(message)
+    elif level == "success":
+        logger.info(f"SUCCESS: {message}")
+    elif level == "debug":
+        logger.debug(message)
+    else:
+        logger.info(message)
+
+def emit_event(event_type, level=None, **fields):
+    """Record a typed event (see EVENT_TYPES), log its message and push it to the dashboard
+
+    Args:
+        event_type (str): Key of EVENT_TYPES
+        level (str): Log level of the message, if not the type's default
+        **fields: Event fields; also used to format the message
+
+    Returns:
+        dict: The recorded event
+    """
+    default_level, template = EVENT_TYPES[event_type]
+    event = event_log.emit(event_type, **fields)
+    log(template.format(**fields), level=level or default_level)
+    broadcast_bus.publish('events', {"base_seq": event["seq"], "samples": [event]})
+    return event
+
+def summarize_events(start=None, end=None):
+    """Compute tunnel and connectivity statistics from the stored events
+
+    Returns:
+        dict: event counts by type, tunnel starts, outages, total downtime in
+        seconds (an outage still in progress counts up to `end` or now) and
+        the tunnel URLs seen, oldest first
+    """
+    counts = {}
+    downtime = 0.0
+    lost_at = None
+    urls = []
+    for event in event_log.read(start, end, set(EVENT_TYPES)):
+        counts[event["type"]] = counts.get(event["type"], 0) + 1
+        if event["type"] == "internet_lost":
+            lost_at = event["ts"]
+        elif event["type"] == "internet_restored":
+            if event.get("downtime") is not None:
+                downtime += event["downtime"]
+            elif lost_at is not None:
+                downtime += event["ts"] - lost_at
+            lost_at = None
+        elif event["type"] == "tunnel_url":
+            urls.append({"url": event["url"], "ts": event["ts"]})
+    
+    if lost_at is not None:
+        downtime += (end if end is not None else time.time()) - lost_at
+    
+    return {
+        "counts": counts,
+        "tunnel_starts": counts.get("tunnel_started", 0),
+        "outages": counts.get("internet_lost", 0),
+        "downtime_seconds": round(downtime, 1),
+        "tunnel_urls": urls
+    }
+
+def _validate_tunnel_specs(specs):
+    """Check the "tunnels" setting: a list of {"name", "url"} with unique names other than the main tunnel's"""
+    if not isinstance(specs, list):
+        raise ValueError("expected a list of tunnels")
+    names = set()
+    validated = []
+    for spec in specs:
+        if not isinstance(spec, dict) or not spec.get("url"):
+            raise ValueError("every tunnel needs a name and a url")
+        name = str(spec.get("name", ""))
+        if not TUNNEL_NAME_PATTERN.fullmatch(name) or name == DEFAULT_TUNNEL_NAME or name in names:
+            raise ValueError(f"invalid or duplicate tunnel name '{name}'")
+        names.add(name)
+        validated.append({"name": name, "url": str(spec["url"])})
+    return validated
+
+def validate_config(config):
+    """Return a copy of config with every known key present and of the expected type
+
+    Missing or invalid values are replaced by their defaults.
+    """
+    validated = dict(config)
+    for key, default in DEFAULT_CONFIG.items():
+        value = validated.get(key, default)
+        expected = CONFIG_TYPES[key]
+        try:
+            if value is None and key in CONFIG_OPTIONAL:
+                pass
+            elif expected is bool:
+                if isinstance(value, str):
+                    value = value.strip().lower() in ("1", "true", "yes", "on")
+                else:
+                    value = bool(value)
+            elif expected is list:
+                value = _validate_tunnel_specs(value)
+            elif expected is int:
+                value = int(value)
+                if value < CONFIG_MINIMUMS.get(key, value):
+                    raise ValueError(f"must be at least {CONFIG_MINIMUMS[key]}")
+            else:
+                value = str(value)
+            if key == "ping_backend" and value not in ("auto", *PING_BACKENDS):
+                raise ValueError(f"unknown backend '{value}'")
+            if key == "tunnel_urls_backend" and value not in ("sqlite", "file"):
+                raise ValueError(f"unknown backend '{value}'")
+            if key == "restart_policy" and value not in RESTART_POLICIES:
+                raise ValueError(f"unknown policy '{value}'")
+            if key == "cloudflared_metrics" and value and not re.fullmatch(r"[\w.\-\[\]:]+:\d+", value):
+                raise ValueError("expected host:port")
+        except (TypeError, ValueError) as e:
+            log(f"Invalid configuration value for {key} ({e}), using default", level="warning")
+            value = default
+        validated[key] = value
+    return validated
+
+def _copy_config(config):
+    """Copy a configuration dict, including its one nested value ("tunnels", a list of dicts)
+
+    Much cheaper than copy.deepcopy on the load_config() hot path.
+    """
+    copied = dict(config)
+    for key, value in copied.items():
+        if isinstance(value, list):
+            copied[key] = [dict(item) if isinstance(item, dict) else item for item in value]
+    return copied
+
+def add_config_listener(callback):
+    """Register callback(config, changed_keys), called whenever the configuration changes"""
+    config_listeners.append(callback)
+
+def _update_config_cache(config, signature):
+    """Store a freshly read or saved configuration and notify listeners of changes
+
+    The cache keeps its own copy (see _copy_config), and callers always get
+    one, so nobody can change the "tunnels" list (or its entries) of another.
+    """
+    config = _copy_config(config)
+    with config_lock:
+        previous = _config_cache["config"]
+        _config_cache["config"] = config
+        _config_cache["signature"] = signature
+        changed = [] if previous is None else [
+            key for key in set(previous) | set(config) if previous.get(key) != config.get(key)
+        ]
+    
+    for listener in list(config_listeners) if changed else []:
+        try:
+            listener(_copy_config(config), changed)
+        except Exception as e:
+            logger.error(f"Error in configuration listener: {e}")
+
+def _config_signature(config_path):
+    """Return (mtime, size) of the configuration file, or None if it is missing"""
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
 def load_config():
-    """Load configuration from file or create default"""
+    """Load configuration from the in-memory cache, re-reading the file only when it changed"""
     config_path = os.path.join(BASE_DIR, config_file)
+    signature = _config_signature(config_path)
+    
+    with config_lock:
+        if signature is not None and signature == _config_cache["signature"]:
+            return _copy_config(_config_cache["config"])
+    
     try:
-        if os.path.exists(config_path):
+        if signature is not None:
             with open(config_path, 'r') as f:
                 config = json.load(f)
-                # Update with any missing default values
-                for key, value in DEFAULT_CONFIG.items():
-                    if key not in config:
-                        config[key] = value
-                log(f"Configuration loaded from {config_path}")
-                return config
+            # Update with any missing default values and fix invalid ones
+            config = validate_config(config)
+            _update_config_cache(config, signature)
+            log(f"Configuration loaded from {config_path}")
+            return _copy_config(config)
     except Exception as e:
         log(f"Error loading configuration: {e}", level="error")
     
     # Create default configuration
-    config = DEFAULT_CONFIG.copy()
+    config = _copy_config(DEFAULT_CONFIG)
     save_config(config)
     return config
 
@@ -1990,6 +4366,7 @@ def save_config(config):
     
     try:
         # Create a backup of the current config if it exists
+        backup_path = None
         if os.path.exists(config_path):
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = os.path.join(backup_dir, f"config_backup_{timestamp}.json")
@@ -1998,12 +4375,15 @@ def save_config(config):
                     dst.write(src.read())
                 log(f"Configuration backup created at {backup_path}")
             except Exception as e:
+                backup_path = None
                 log(f"Error creating configuration backup: {e}", level="warning")
         
         # Save the new configuration
+        config = validate_config(config)
         with open(config_path, 'w') as f:
             json.dump(config, f, indent=4)
-        log(f"Configuration saved to {config_path}", level="success")
+        _update_config_cache(config, _config_signature(config_path))
+        emit_event("config_saved", path=config_path, backup=backup_path)
         
         # Clean up old backups (keep only the 5 most recent)
         try:
@@ -2021,12 +4401,209 @@ def save_config(config):
     except Exception as e:
         log(f"Error saving configuration: {e}", level="error")
 
-def reset_config():
-    """Reset configuration to default values"""
-    config = DEFAULT_CONFIG.copy()
-    save_config(config)
-    log("Configuration reset to default values", level="success")
-    return config
+def reset_config():
+    """Reset configuration to default values"""
+    config = _copy_config(DEFAULT_CONFIG)
+    save_config(config)
+    emit_event("config_reset")
+    return config
+
+def _parse_ping_output(output):
+    """Extract the response time from the output of a successful ping command"""
+    # Parse the output to extract the time (Windows format)
+    # Windows format: "Reply from 1.1.1.1: bytes=32 time=15ms TTL=57"
+    match = re.search(r"time=([0-9]+)ms", output)
+        
+    if match:
+        return float(match.group(1))
+    return 0.0  # Successful ping but couldn't parse time
+
+def _ping_host_subprocess(host, timeout):
+    """Ping a host by running the OS ``ping`` command (original implementation)
+
+    Args:
+        host (str): The host to ping
+        timeout (int): Timeout in milliseconds
+
+    Returns:
+        float or None: Response time in milliseconds if successful, None if failed
+    """
+    # Windows ping command parameters
+    param = "-n"
+    timeout_param = "-w"
+    timeout_value = str(timeout)
+    
+    try:
+        # Hide the console output
+        with open(os.devnull, 'w') as DEVNULL:
+            # Run the ping command and capture output
+            output = subprocess.check_output(
+                ["ping", param, "1", timeout_param, timeout_value, host],
+                stderr=DEVNULL,
+                universal_newlines=True
+            )
+            
+            return _parse_ping_output(output)
+    except subprocess.CalledProcessError:
+        # Ping failed
+        return None
+
+def _icmp_checksum(data):
+    """Compute the RFC 1071 internet checksum of an ICMP packet"""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def _build_icmp_echo(identifier, sequence):
+    """Build an ICMP echo request with a 32 byte payload (same size as Windows ping)"""
+    payload = ICMP_PAYLOAD
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _icmp_checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+def _is_icmp_echo_reply(data, peer, address, identifier, sequence, sock_type):
+    """Check whether a received packet is the reply to our echo request"""
+    # Raw sockets (and datagram sockets on some platforms) include the IPv4 header
+    if data and data[0] >> 4 == 4 and len(data) >= 20:
+        data = data[(data[0] & 0x0F) * 4:]
+    if len(data) < 8 or peer[0] != address:
+        return False
+    
+    icmp_type, _, _, reply_id, reply_sequence = struct.unpack("!BBHHH", data[:8])
+    if icmp_type != ICMP_ECHO_REPLY or reply_sequence != sequence:
+        return False
+    # The kernel rewrites the identifier of datagram ICMP sockets, so only raw replies can be matched on it
+    return sock_type != socket.SOCK_RAW or reply_id == identifier
+
+def _ping_host_icmp(host, timeout, sock_type):
+    """Send one ICMP echo request from this process and time the reply
+
+    Args:
+        host (str): The host to ping
+        timeout (int): Timeout in milliseconds
+        sock_type (int): socket.SOCK_DGRAM for unprivileged ICMP sockets,
+            socket.SOCK_RAW for raw ICMP (requires admin/root)
+
+    Returns:
+        float or None: Response time in milliseconds if successful, None if failed
+    """
+    try:
+        address = socket.gethostbyname(host)
+    except socket.gaierror:
+        return None
+    
+    identifier = os.getpid() & 0xFFFF
+    sequence = next(_icmp_sequence) & 0xFFFF
+    packet = _build_icmp_echo(identifier, sequence)
+    deadline = time.perf_counter() + timeout / 1000.0
+    
+    with socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP) as sock:
+        sent_at = time.perf_counter()
+        sock.sendto(packet, (address, 0))
+        
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            sock.settimeout(remaining)
+            try:
+                data, peer = sock.recvfrom(1024)
+            except socket.timeout:
+                return None
+            received_at = time.perf_counter()
+            
+            if _is_icmp_echo_reply(data, peer, address, identifier, sequence, sock_type):
+                return round((received_at - sent_at) * 1000, 2)
+
+def _ping_host_icmp_dgram(host, timeout):
+    """Ping using an unprivileged ICMP datagram socket"""
+    return _ping_host_icmp(host, timeout, socket.SOCK_DGRAM)
+
+def _ping_host_icmp_raw(host, timeout):
+    """Ping using a raw ICMP socket"""
+    return _ping_host_icmp(host, timeout, socket.SOCK_RAW)
+
+def _ping_host_tcp(host, timeout):
+    """Time a TCP handshake (SYN -> SYN/ACK or RST) to the host
+
+    Useful where ICMP is filtered. A refused connection still counts as a
+    reply because the RST proves the round trip completed.
+    """
+    try:
+        address = socket.gethostbyname(host)
+    except socket.gaierror:
+        return None
+    
+    start = time.perf_counter()
+    try:
+        with socket.create_connection((address, TCP_PROBE_PORT), timeout=timeout / 1000.0):
+            pass
+    except ConnectionRefusedError:
+        pass
+    except OSError:
+        return None
+    return round((time.perf_counter() - start) * 1000, 2)
+
+# Available ping backends, in the order "auto" tries them
+PING_BACKENDS = {
+    "icmp_dgram": _ping_host_icmp_dgram,
+    "icmp_raw": _ping_host_icmp_raw,
+    "subprocess": _ping_host_subprocess,
+    "tcp": _ping_host_tcp
+}
+
+def ping_backend_available(name):
+    """Check whether a ping backend can be used on this machine"""
+    if name in ("icmp_dgram", "icmp_raw"):
+        sock_type = socket.SOCK_DGRAM if name == "icmp_dgram" else socket.SOCK_RAW
+        try:
+            socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP).close()
+            return True
+        except (OSError, AttributeError):
+            return False
+    if name == "subprocess":
+        return shutil.which("ping") is not None
+    return name in PING_BACKENDS
+
+def select_ping_backend(preferred="auto"):
+    """Choose the ping backend used by ping_host()
+
+    Args:
+        preferred (str): A key of PING_BACKENDS, or "auto" to pick the cheapest available one
+
+    Returns:
+        str: The name of the selected backend
+    """
+    global ping_backend
+    
+    candidates = list(PING_BACKENDS)
+    if preferred in PING_BACKENDS:
+        candidates.remove(preferred)
+        candidates.insert(0, preferred)
+    elif preferred != "auto":
+        log(f"Unknown ping backend '{preferred}', using auto-detection", level="warning")
+    
+    for name in candidates:
+        if ping_backend_available(name):
+            if preferred not in ("auto", name):
+                log(f"Ping backend '{preferred}' is not available, falling back to '{name}'", level="warning")
+            ping_backend = name
+            log(f"Using ping backend: {name}")
+            return name
+    
+    # Nothing could be verified, keep the original behaviour
+    ping_backend = "subprocess"
+    return ping_backend
+
+def _apply_ping_backend_change(config, changed):
+    """Switch the ping engine when it is changed in the settings"""
+    if "ping_backend" in changed:
+        select_ping_backend(config["ping_backend"])
+
+add_config_listener(_apply_ping_backend_change)
 
 def ping_host(host="1.1.1.1", timeout=1000):
     """Ping a host and return the response time in milliseconds
@@ -2038,35 +4615,323 @@ def ping_host(host="1.1.1.1", timeout=1000):
     Returns:
         float or None: Response time in milliseconds if successful, None if failed
     """
-    # Windows ping command parameters
-    param = "-n"
-    timeout_param = "-w"
-    timeout_value = str(timeout)
+    if ping_backend is None:
+        select_ping_backend(DEFAULT_CONFIG["ping_backend"])
     
     try:
-        # Hide the console output
-        with open(os.devnull, 'w') as DEVNULL:
-            # Run the ping command and capture output
-            output = subprocess.check_output(
-                ["ping", param, "1", timeout_param, timeout_value, host],
-                stderr=DEVNULL,
-                universal_newlines=True
-            )
+        return PING_BACKENDS[ping_backend](host, timeout)
+    except Exception as e:
+        logger.error(f"Error pinging {host}: {e}")
+        return None
+
+def benchmark_ping_backends(host="1.1.1.1", samples=20, timeout=1000, max_seconds=PING_BENCHMARK_MAX_SECONDS):
+    """Compare throughput and CPU cost of every available ping backend
+
+    CPU time includes child processes so the subprocess backend is charged
+    for the ``ping`` processes it forks (where the platform reports it).
+    Each available backend gets an equal share of `max_seconds` and stops
+    sending probes once its share is used up, even before `samples`.
+
+    Returns:
+        dict: Per-backend samples/sec, CPU milliseconds per sample and success count
+    """
+    process = psutil.Process()
+    results = {}
+    available = [name for name in PING_BACKENDS if ping_backend_available(name)]
+    budget = max_seconds / max(1, len(available))
+    timeout = min(timeout, int(budget * 1000))
+    
+    for name, probe in PING_BACKENDS.items():
+        if name not in available:
+            results[name] = {"available": False}
+            continue
+        
+        cpu_before = process.cpu_times()
+        wall_start = time.perf_counter()
+        successful = 0
+        sent = 0
+        while sent < samples and time.perf_counter() - wall_start < budget:
+            sent += 1
+            try:
+                if probe(host, timeout) is not None:
+                    successful += 1
+            except Exception:
+                pass
+        wall_time = time.perf_counter() - wall_start
+        cpu_after = process.cpu_times()
+        
+        cpu_time = sum(
+            getattr(cpu_after, field, 0) - getattr(cpu_before, field, 0)
+            for field in ("user", "system", "children_user", "children_system")
+        )
+        results[name] = {
+            "available": True,
+            "samples": sent,
+            "successful": successful,
+            "samples_per_sec": round(sent / wall_time, 2) if wall_time > 0 else 0,
+            "cpu_ms_per_sample": round(cpu_time * 1000 / sent, 3) if sent else None
+        }
+    
+    return results
+
+async def _async_resolve(host):
+    """Resolve a host name to an IPv4 address without blocking the event loop"""
+    try:
+        socket.inet_aton(host)
+        return host
+    except OSError:
+        pass
+    
+    cached = _resolve_cache.get(host)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+    except socket.gaierror:
+        return None
+    address = infos[0][4][0]
+    _resolve_cache[host] = (address, time.monotonic() + RESOLVE_CACHE_TTL)
+    return address
+
+async def _async_ping_host_icmp(host, timeout, sock_type):
+    """Asynchronous version of _ping_host_icmp()"""
+    loop = asyncio.get_running_loop()
+    if not hasattr(loop, "sock_recvfrom"):
+        # Python < 3.11 has no datagram socket coroutines
+        return await loop.run_in_executor(None, _ping_host_icmp, host, timeout, sock_type)
+    
+    address = await _async_resolve(host)
+    if address is None:
+        return None
+    
+    identifier = os.getpid() & 0xFFFF
+    sequence = next(_icmp_sequence) & 0xFFFF
+    packet = _build_icmp_echo(identifier, sequence)
+    deadline = time.perf_counter() + timeout / 1000.0
+    
+    with socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP) as sock:
+        sock.setblocking(False)
+        sent_at = time.perf_counter()
+        await loop.sock_sendto(sock, packet, (address, 0))
+        
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            try:
+                data, peer = await asyncio.wait_for(loop.sock_recvfrom(sock, 1024), remaining)
+            except asyncio.TimeoutError:
+                return None
+            received_at = time.perf_counter()
             
-            # Parse the output to extract the time (Windows format)
-            # Windows format: "Reply from 1.1.1.1: bytes=32 time=15ms TTL=57"
-            match = re.search(r"time=([0-9]+)ms", output)
-                
-            if match:
-                return float(match.group(1))
-            return 0.0  # Successful ping but couldn't parse time
-    except subprocess.CalledProcessError:
-        # Ping failed
+            if _is_icmp_echo_reply(data, peer, address, identifier, sequence, sock_type):
+                return round((received_at - sent_at) * 1000, 2)
+
+async def _async_ping_host_icmp_dgram(host, timeout):
+    return await _async_ping_host_icmp(host, timeout, socket.SOCK_DGRAM)
+
+async def _async_ping_host_icmp_raw(host, timeout):
+    return await _async_ping_host_icmp(host, timeout, socket.SOCK_RAW)
+
+async def _async_ping_host_tcp(host, timeout):
+    """Asynchronous version of _ping_host_tcp()"""
+    address = await _async_resolve(host)
+    if address is None:
+        return None
+    
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address, TCP_PROBE_PORT), timeout / 1000.0)
+        writer.close()
+    except ConnectionRefusedError:
+        pass
+    except (OSError, asyncio.TimeoutError):
+        return None
+    return round((time.perf_counter() - start) * 1000, 2)
+
+async def _async_ping_host_subprocess(host, timeout):
+    """Asynchronous version of _ping_host_subprocess()"""
+    process = await asyncio.create_subprocess_exec(
+        "ping", "-n", "1", "-w", str(timeout), host,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout / 1000.0 + 2)
+    except asyncio.TimeoutError:
+        process.kill()
+        return None
+    if process.returncode != 0:
         return None
+    return _parse_ping_output(output.decode(errors="replace"))
+
+# Coroutine versions of PING_BACKENDS, used by the probe scheduler
+ASYNC_PING_BACKENDS = {
+    "icmp_dgram": _async_ping_host_icmp_dgram,
+    "icmp_raw": _async_ping_host_icmp_raw,
+    "subprocess": _async_ping_host_subprocess,
+    "tcp": _async_ping_host_tcp
+}
+
+async def async_ping_host(host="1.1.1.1", timeout=1000):
+    """Ping a host from an asyncio event loop, same return contract as ping_host()"""
+    if ping_backend is None:
+        select_ping_backend(DEFAULT_CONFIG["ping_backend"])
+    
+    try:
+        return await ASYNC_PING_BACKENDS[ping_backend](host, timeout)
     except Exception as e:
         logger.error(f"Error pinging {host}: {e}")
         return None
 
+class ProbeScheduler:
+    """Probe many hosts from a single asyncio loop using a hashed timer wheel
+
+    Every target fires at its own interval (with optional jitter) and each
+    probe carries its own timeout, so one slow host never delays the others.
+    A target is skipped for a round if its previous probe is still in flight.
+    Targets may be added or removed from any thread.
+    """
+    
+    def __init__(self, tick=0.1, wheel_size=512):
+        self.tick = tick
+        self.wheel = [[] for _ in range(wheel_size)]
+        self.cursor = 0
+        self.targets = {}
+        self._pending = []
+        self._tasks = set()
+        self._lock = threading.Lock()
+    
+    def add_target(self, name, host, interval=1.0, timeout=3000, jitter=0.1, callback=None):
+        """Add (or replace) a probe target
+
+        Args:
+            name (str): Unique target name
+            host (str or callable): Host to probe, or a function returning it at probe time
+            interval (float): Seconds between probes
+            timeout (int): Per-probe timeout in milliseconds
+            jitter (float): Random spread applied to the interval, as a fraction of it
+            callback (callable): Called as callback(target, ping_time) on the loop thread
+        """
+        target = {
+            "name": name,
+            "host": host,
+            "interval": interval,
+            "timeout": timeout,
+            "jitter": jitter,
+            "callback": callback,
+            "rounds": 0,
+            "in_flight": False,
+            "removed": False,
+            "last_host": None,
+            "last_result": None,
+            "last_probe": None,
+            "consecutive_failures": 0,
+            "probes": 0,
+            "skipped": 0
+        }
+        with self._lock:
+            previous = self.targets.get(name)
+            if previous:
+                previous["removed"] = True
+            self.targets[name] = target
+            self._pending.append(target)
+        return target
+    
+    def remove_target(self, name):
+        """Stop probing a target"""
+        with self._lock:
+            target = self.targets.pop(name, None)
+            if target:
+                target["removed"] = True
+    
+    def _schedule(self, target, delay):
+        ticks = max(1, int(round(delay / self.tick)))
+        target["rounds"] = (ticks - 1) // len(self.wheel)
+        self.wheel[(self.cursor + ticks) % len(self.wheel)].append(target)
+    
+    def _next_delay(self, target):
+        spread = target["interval"] * target["jitter"]
+        return target["interval"] + random.uniform(-spread, spread)
+    
+    def _fire(self, target):
+        if target["in_flight"]:
+            target["skipped"] += 1
+            return
+        target["in_flight"] = True
+        task = asyncio.ensure_future(self._probe(target))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _probe(self, target):
+        host = target["host"]() if callable(target["host"]) else target["host"]
+        try:
+            ping_time = await asyncio.wait_for(
+                async_ping_host(host, target["timeout"]),
+                target["timeout"] / 1000.0 + 1
+            )
+        except asyncio.TimeoutError:
+            ping_time = None
+        except Exception as e:
+            logger.warning(f"Probe of {host} failed: {e}")
+            ping_time = None
+        finally:
+            target["in_flight"] = False
+        
+        target["probes"] += 1
+        target["last_host"] = host
+        target["last_result"] = ping_time
+        target["last_probe"] = time.time()
+        if ping_time is None:
+            target["consecutive_failures"] += 1
+        else:
+            target["consecutive_failures"] = 0
+        
+        if target["callback"] and not target["removed"]:
+            try:
+                target["callback"](target, ping_time)
+            except Exception as e:
+                logger.error(f"Error handling probe result for {target['name']}: {e}")
+    
+    async def run(self, should_run):
+        """Drive the timer wheel until should_run() returns False"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        
+        while should_run():
+            with self._lock:
+                pending, self._pending = self._pending, []
+            for target in pending:
+                # Spread new targets over their first interval to avoid bursts
+                self._schedule(target, random.uniform(0, target["interval"] * target["jitter"]))
+            
+            due, self.wheel[self.cursor] = self.wheel[self.cursor], []
+            for target in due:
+                if target["removed"]:
+                    continue
+                if target["rounds"] > 0:
+                    target["rounds"] -= 1
+                    self.wheel[self.cursor].append(target)
+                    continue
+                self._fire(target)
+                self._schedule(target, self._next_delay(target))
+            
+            self.cursor = (self.cursor + 1) % len(self.wheel)
+            next_tick += self.tick
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+        
+        for task in list(self._tasks):
+            task.cancel()
+        
+        # Re-arm every live target so a later run() starts from a clean wheel
+        with self._lock:
+            self.wheel = [[] for _ in range(len(self.wheel))]
+            self._pending = [target for target in self.targets.values()]
+            for target in self._pending:
+                target["in_flight"] = False
+
 def get_network_io_stats():
     """Get current network I/O statistics"""
     try:
@@ -2106,17 +4971,36 @@ def calculate_transfer_speed(current_stats, previous_stats, time_diff):
     
     return max(0, upload_speed), max(0, download_speed)
 
+def _tunnel_urls_path(config):
+    """Return (directory, filename, full path) of the tunnel URLs text file"""
+    save_directory = config.get("tunnel_urls_save_directory", "d:\\Project\\Git Hub\\cloudflare_tunnel_monitor(Windows)")
+    filename = config.get("tunnel_urls_filename", "tunnel_urls.txt")
+    return save_directory, filename, os.path.join(save_directory, filename)
+
+def _parse_tunnel_url_line(line):
+    """Parse one line of the tunnel URLs file: Local URL - Date - Time - Generated URL
+
+    Returns:
+        dict or None: local_url, date, time, generated_url and full_entry
+    """
+    line = line.strip()
+    if not line or ' - ' not in line:
+        return None
+    parts = line.split(' - ')
+    if len(parts) < 4:
+        return None
+    return {
+        'local_url': parts[0].strip(),
+        'date': parts[1].strip(),
+        'time': parts[2].strip(),
+        'generated_url': ' - '.join(parts[3:]).strip(),  # Handle URLs with dashes
+        'full_entry': line
+    }
+
 def save_tunnel_url(tunnel_url, config):
-    """Save tunnel URL to file with enhanced format: Local link - Date - Time - Generated link"""
+    """Save tunnel URL to the history store and file with format: Local link - Date - Time - Generated link"""
     try:
-        save_directory = config.get("tunnel_urls_save_directory", "d:\\Project\\Git Hub\\cloudflare_tunnel_monitor(Windows)")
-        filename = config.get("tunnel_urls_filename", "tunnel_urls.txt")
-        
-        # Create the full save path
-        save_path = os.path.join(save_directory, filename)
-        
-        # Create directory if it doesn't exist
-        os.makedirs(save_directory, exist_ok=True)
+        save_directory, filename, save_path = _tunnel_urls_path(config)
         
         # Get the local URL from config
         local_url = config.get("tunnel_url", "http://localhost:8080")
@@ -2126,11 +5010,16 @@ def save_tunnel_url(tunnel_url, config):
         date_str = now.strftime("%Y-%m-%d")
         time_str = now.strftime("%H:%M:%S")
         
-        entry = f"{local_url} - {date_str} - {time_str} - {tunnel_url}\n"
+        entry = {
+            "local_url": local_url,
+            "date": date_str,
+            "time": time_str,
+            "generated_url": tunnel_url,
+            "full_entry": f"{local_url} - {date_str} - {time_str} - {tunnel_url}"
+        }
         
-        # Append to file
-        with open(save_path, 'a', encoding='utf-8') as f:
-            f.write(entry)
+        # Queued; the store writes it (and appends it to the file) within a second
+        tunnel_url_store.add(entry, save_path)
         
         log(f"Tunnel URL saved to {save_path} with format: Local - Date - Time - Generated", level="info")
         return True
@@ -2139,8 +5028,8 @@ def save_tunnel_url(tunnel_url, config):
         log(f"Error saving tunnel URL: {e}", level="error")
         return False
 
-def internet_available():
-    """Check if internet connection is available"""
+def _probe_internet():
+    """Run one connectivity probe (ping Cloudflare's DNS, HTTP as fallback)"""
     try:
         # Try to ping Cloudflare's DNS
         result = ping_host("1.1.1.1", 3000)
@@ -2153,88 +5042,332 @@ def internet_available():
         except:
             return False
 
-def run_tunnel(config):
-    """Run cloudflared tunnel and return the process"""
-    global tunnel_process
+def _recent_probe_success(max_age):
+    """Check whether any probe scheduler target got a reply within max_age seconds"""
+    fresh_after = time.time() - max_age
+    return any(
+        result["last_ping_time"] is not None and (result["last_probe"] or 0) >= fresh_after
+        for result in list(ping_data["targets"].values())
+    )
+
+def get_connectivity_state():
+    """Return the cached connectivity verdict without probing
+
+    Returns:
+        dict: connected (bool or None if never checked), age in seconds,
+        confidence between 0 and 1, and the time of the last check
+    """
+    with connectivity_lock:
+        state = dict(connectivity)
     
-    # Determine the cloudflared executable (Windows)
+    if state["checked_at"] is None:
+        state.update(age=None, confidence=0.0)
+    else:
+        age = time.monotonic() - state["checked_at"]
+        # Confidence grows with agreeing checks in a row and decays as the verdict ages
+        freshness = max(0.0, 1 - age / CONNECTIVITY_STALE_AFTER)
+        state.update(age=round(age, 1), confidence=round(min(state["streak"], 3) / 3 * freshness, 2))
+    del state["checked_at"], state["lost_at"]
+    return state
+
+def check_internet(max_age=CONNECTIVITY_TTL, wait=True):
+    """Return the connectivity verdict, probing only when the cached one is too old
+
+    Concurrent callers share a single in-flight probe.
+
+    Args:
+        max_age (float): Maximum age in seconds of a cached verdict
+        wait (bool): If False, never block: a needed probe runs in a
+            background thread and the cached state is returned immediately
+
+    Returns:
+        dict: The same shape as get_connectivity_state()
+    """
+    global _connectivity_probe
+    
+    with connectivity_lock:
+        checked_at = connectivity["checked_at"]
+        fresh = checked_at is not None and time.monotonic() - checked_at <= max_age
+        probe_done = _connectivity_probe
+        leader = not fresh and probe_done is None
+        if leader:
+            probe_done = _connectivity_probe = threading.Event()
+    
+    if fresh:
+        return get_connectivity_state()
+    if leader:
+        if wait:
+            _run_connectivity_probe(probe_done)
+        else:
+            thread = threading.Thread(target=_run_connectivity_probe, args=(probe_done,), name="connectivity-probe")
+            thread.daemon = True
+            thread.start()
+    elif wait:
+        probe_done.wait(CONNECTIVITY_PROBE_TIMEOUT)
+    return get_connectivity_state()
+
+def _run_connectivity_probe(probe_done):
+    """Probe, update the shared verdict and release the callers waiting on probe_done"""
+    global _connectivity_probe
+    
+    connected = None
+    transition = None
+    try:
+        connected = _recent_probe_success(CONNECTIVITY_TTL) or _probe_internet()
+    finally:
+        with connectivity_lock:
+            if connected is not None:
+                if connectivity["connected"] == connected:
+                    connectivity["streak"] += 1
+                else:
+                    connectivity["streak"] = 1
+                    if not connected:
+                        transition = "internet_lost"
+                        connectivity["lost_at"] = time.monotonic()
+                    elif connectivity["connected"] is False:
+                        transition = "internet_restored"
+                        downtime = round(time.monotonic() - connectivity["lost_at"], 1)
+                connectivity["connected"] = connected
+                connectivity["checked_at"] = time.monotonic()
+                connectivity["last_check"] = STATS["last_check"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            _connectivity_probe = None
+        probe_done.set()
+    
+    if transition == "internet_lost":
+        emit_event("internet_lost")
+    elif transition == "internet_restored":
+        emit_event("internet_restored", downtime=downtime)
+
+def internet_available():
+    """Check if internet connection is available (served from the shared connectivity cache)"""
+    return bool(check_internet()["connected"])
+
+def _metrics_address_for(config):
+    """Return a metrics address for a new cloudflared that no running tunnel or standby is using"""
+    address = config["cloudflared_metrics"]
+    if not address:
+        return None
+    used = {getattr(process, "metrics_address", None) for process in (tunnel_process, standby_process)
+            if process_alive(process)}
+    if address in used:
+        host, port = address.rsplit(":", 1)
+        address = f"{host}:{int(port) + 1}"
+    return address
+
+def _cloudflared_executable(config):
+    """Return the configured cloudflared path, or the system-installed cloudflared (Windows) if it does not exist"""
     cloudflared_cmd = config["cloudflared_path"]
     if not cloudflared_cmd or not os.path.exists(cloudflared_cmd):
-        # Try using the system-installed cloudflared
         cloudflared_cmd = "cloudflared.exe"
+    return cloudflared_cmd
+
+def subscribe_tunnel_output(output, process, config):
+    """Subscribe the main and standby tunnels' handlers to a CloudflaredOutput
+
+    track_url records the URL and the first edge connection on the process
+    and publishes the URL of the active tunnel; log_output logs the lines
+    (plain ones rate limited) and emits tunnel_connection events.
+    """
+    output_level = "debug" if config["debug_mode"] else "info"
+    
+    @output.subscribe
+    def track_url(events):
+        for event in events:
+            if event["type"] == "url":
+                process.tunnel_url = event["url"]
+            elif event["type"] == "registered":
+                process.registered = True
+        if process.tunnel_url and process.registered:
+            process.ready.set()
+        if process.tunnel_url and process is tunnel_process:
+            publish_tunnel_url(process, config)
     
-    log(f"Starting cloudflared tunnel to {config['tunnel_url']}")
+    budget = {"tokens": CLOUDFLARED_LOG_BURST, "at": time.monotonic(), "suppressed": 0}
+    
+    @output.subscribe
+    def log_output(events):
+        # Plain output lines are rate limited so logging cannot stall the reader; typed events are always logged
+        now = time.monotonic()
+        budget["tokens"] = min(CLOUDFLARED_LOG_BURST, budget["tokens"] + (now - budget["at"]) * CLOUDFLARED_LOG_RATE)
+        budget["at"] = now
+        if budget["suppressed"] and budget["tokens"] >= 1:
+            log(f"Cloudflared: {budget['suppressed']} output lines not logged (over {CLOUDFLARED_LOG_RATE} lines/s)",
+                level="warning")
+            budget["suppressed"] = 0
+        for event in events:
+            # Connection changes become typed events; other lines only go to the log, not the event log
+            if event["type"] in ("registered", "lost"):
+                emit_event("tunnel_connection", level="info" if event["type"] == "registered" else "warning",
+                           state=event["type"], line=event["message"])
+            elif event["type"] == "url" or budget["tokens"] >= 1:
+                budget["tokens"] -= 1
+                log(f"Cloudflared: {event['message']}", level=output_level)
+            else:
+                budget["suppressed"] += 1
+
+def run_tunnel(config, standby=False):
+    """Run cloudflared tunnel and return the process
+
+    With standby=True the process becomes the warm standby instead of the
+    active tunnel: it registers with the edge and discovers its URL, but the
+    URL is only saved and published once promote_standby() activates it.
+    The process carries metrics_address, tunnel_url, registered, published,
+    stopping, role and ready (set once both the URL and an edge connection
+    are known), and is watched by tunnel_supervisor.
+    """
+    global tunnel_process
+    
+    # Determine the cloudflared executable (Windows)
+    cloudflared_cmd = _cloudflared_executable(config)
     
     # Start the cloudflared process
     try:
-        tunnel_process = subprocess.Popen(
-            [cloudflared_cmd, "tunnel", "--url", config['tunnel_url']],
-            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
-            bufsize=1, universal_newlines=True
+        metrics_address = _metrics_address_for(config)
+        command = [cloudflared_cmd, "tunnel", "--url", config['tunnel_url']]
+        if metrics_address:
+            command[2:2] = ["--metrics", metrics_address]
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT
         )
+        process.metrics_address = metrics_address
+        process.tunnel_url = None
+        process.registered = False
+        process.published = False
+        process.stopping = False  # Set before a deliberate stop so the exit is not treated as a crash
+        process.role = "standby" if standby else "active"
+        process.ready = threading.Event()
         
-        STATS["tunnel_starts"] += 1
-        STATS["current_status"] = "Running"
+        if standby:
+            emit_event("standby_started", local_url=config['tunnel_url'], pid=process.pid)
+        else:
+            tunnel_process = process
+            STATS["tunnel_starts"] += 1
+            emit_event("tunnel_started", local_url=config['tunnel_url'], pid=process.pid, command=cloudflared_cmd)
+        tunnel_supervisor.watch(process)
+        
+        # Parse the output in a thread and react to the typed events
+        output = CloudflaredOutput(process.stdout)
+        subscribe_tunnel_output(output, process, config)
         
-        # Create a thread to monitor the output
         def monitor_output():
-            tunnel_url = None
-            if tunnel_process and tunnel_process.stdout:
-                for line in iter(tunnel_process.stdout.readline, ''):
-                    if stop_event.is_set():
-                        break
-                        
-                    line = line.strip()
-                    log(f"Cloudflared: {line}", level="debug" if config["debug_mode"] else "info")
-                    
-                    # Look for the tunnel URL in the output
-                    match = re.search(r"https://[-\w]+\.trycloudflare\.com", line)
-                    if match and not tunnel_url:
-                        tunnel_url = match.group(0)
-                        STATS["last_tunnel_url"] = tunnel_url
-                        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        
-                        # Save tunnel URL to file
-                        save_tunnel_url(tunnel_url, config)
-                        
-                        # Emit the tunnel URL to connected clients
-                        socketio.emit('tunnel_url', {'url': tunnel_url})
-                        
-                        log(f"Tunnel URL detected and saved: {tunnel_url}", level="success")
+            output.run(stop_event)
         
         # Start the monitoring thread
         monitor_thread = threading.Thread(target=monitor_output)
         monitor_thread.daemon = True
         monitor_thread.start()
         
-        return tunnel_process
+        return process
     except Exception as e:
-        log(f"Error starting cloudflared: {e}", level="error")
+        emit_event("tunnel_error", error=str(e))
         return None
 
+def publish_tunnel_url(process, config):
+    """Save and publish the URL of the active tunnel, once per process
+
+    Completes a pending failover: the time since the dead tunnel was
+    detected is recorded as its latency.
+    """
+    with tunnel_lock:
+        if process.published or not process.tunnel_url or process is not tunnel_process:
+            return
+        process.published = True
+        detected, mode = failover["detected"], failover["mode"]
+        failover["detected"] = None
+    
+    tunnel_url = process.tunnel_url
+    STATS["last_tunnel_url"] = tunnel_url
+    
+    # Save tunnel URL to file
+    save_tunnel_url(tunnel_url, config)
+    
+    # Emit the tunnel URL to connected clients
+    broadcast_bus.publish('tunnel_url', {'url': tunnel_url})
+    publish_main_tunnel()
+    
+    emit_event("tunnel_url", url=tunnel_url, local_url=config['tunnel_url'])
+    
+    if detected is not None:
+        latency = round(time.monotonic() - detected, 3)
+        STATS["failovers"] += 1
+        STATS["last_failover_latency"] = latency
+        failover_history.append((time.time(), mode, latency))
+        record_metric("failover_latency", latency)
+        emit_event("tunnel_failover", mode=mode, latency=latency, url=tunnel_url)
+
+def promote_standby(config):
+    """Make the warm standby the active tunnel
+
+    Returns:
+        bool: False if there is no live standby to promote
+    """
+    global tunnel_process, standby_process
+    with tunnel_lock:
+        process, standby_process = standby_process, None
+        if not process_alive(process):
+            return False
+        tunnel_process = process
+        process.role = "active"
+        failover["mode"] = "standby"
+    
+    tunnel_metrics["counters"] = None  # Counter rates restart with the new process
+    emit_event("standby_promoted", pid=process.pid)
+    # Publishes now if the standby already knows its URL, otherwise its output thread will
+    publish_tunnel_url(process, config)
+    return True
+
+def maintain_standby(config):
+    """Start the warm standby if tunnel_standby is enabled and none is alive; stop it when disabled"""
+    global standby_process
+    if config["tunnel_standby"]:
+        if not process_alive(standby_process):
+            last_exit = standby_process.returncode if standby_process is not None else None
+            delay = tunnel_supervisor.restart_delay(config, "standby", last_exit) if standby_process is not None else 0
+            if delay == 0:  # A crash-looping standby is retried on later passes instead of waiting here
+                standby_process = run_tunnel(config, standby=True)
+    elif standby_process is not None:
+        stop_standby()
+
+def stop_standby():
+    """Stop the warm standby cloudflared process"""
+    global standby_process
+    with tunnel_lock:
+        process, standby_process = standby_process, None
+    if process is None:
+        return
+    process.stopping = True
+    try:
+        process.terminate()
+        process.wait(timeout=5)
+    except Exception:
+        process.kill()
+    emit_event("tunnel_stopped", pid=process.pid, method="standby stopped")
+
 def stop_tunnel():
-    """Stop the cloudflared tunnel process"""
+    """Stop the cloudflared tunnel process and its standby (additional tunnels follow the "tunnels" setting)"""
     global tunnel_process
+    stop_standby()
     if tunnel_process:
         log("Stopping cloudflared tunnel...")
+        tunnel_process.stopping = True
         try:
             # Windows process termination
             tunnel_process.terminate()
             tunnel_process.wait(timeout=5)
-            log("Cloudflared tunnel stopped", level="success")
+            emit_event("tunnel_stopped", pid=tunnel_process.pid, method="stopped")
         except Exception as e:
             log(f"Error stopping cloudflared: {e}", level="error")
             # Force kill if normal termination fails
             try:
                 os.system(f"taskkill /F /PID {tunnel_process.pid}")
-                log("Cloudflared tunnel force-stopped", level="warning")
+                emit_event("tunnel_stopped", level="warning", pid=tunnel_process.pid, method="force-stopped")
             except:
                 pass
         tunnel_process = None
         
     # Always update status and emit to clients
-    STATS["current_status"] = "Stopped"
-    socketio.emit('tunnel_status', {'status': 'stopped'})
+    tunnel_supervisor.set_state("stopped")
     log("Tunnel status updated to Stopped", level="info")
 
 def monitor_thread_func(config):
@@ -2245,45 +5378,55 @@ def monitor_thread_func(config):
     retry_count = 0
     
     while not stop_event.is_set():
+        # Pick up settings changes (served from the config cache)
+        config = load_config()
+        
         # Check internet connection
         if internet_available():
-            # If tunnel is not running, start it
-            if tunnel_process is None or tunnel_process.poll() is not None:
+            # If tunnel is not running, start it (an unexpected exit wakes this loop immediately)
+            if not process_alive(tunnel_process) and tunnel_supervisor.status != "failed":
                 # Reset retry count on successful internet connection
                 retry_count = 0
-                tunnel_process = run_tunnel(config)
+                delay = 0
+                if tunnel_process is not None:
+                    # Exited on its own (stop_tunnel clears tunnel_process): apply the restart policy
+                    delay = tunnel_supervisor.restart_after_exit(config, "active", tunnel_process.returncode)
+                    if delay is None:
+                        tunnel_supervisor.set_state("failed")
+                
+                if delay is not None and not promote_standby(config):
+                    if delay:
+                        tunnel_supervisor.announce_restart("active", delay)
+                        stop_event.wait(delay)
+                    if not stop_event.is_set():
+                        failover["mode"] = "cold"
+                        tunnel_supervisor.set_state("starting")
+                        run_tunnel(config)
                 
                 # Update tunnel status and emit to clients
-                if tunnel_process:
-                    STATS["current_status"] = "Running"
-                    socketio.emit('tunnel_status', {'status': 'running'})
+                if process_alive(tunnel_process):
+                    tunnel_supervisor.set_state("running")
                     log("Tunnel started and status updated", level="success")
-            else:
+            elif process_alive(tunnel_process):
                 # Tunnel is running, ensure status is correct
-                if STATS["current_status"] != "Running":
-                    STATS["current_status"] = "Running"
-                    socketio.emit('tunnel_status', {'status': 'running'})
-                    log("Tunnel status corrected to Running", level="info")
+                tunnel_supervisor.set_state("running")
+            
+            # Keep (or drop) the warm standby according to the settings
+            maintain_standby(config)
         else:
-            # Internet is down
-            log("Internet connection lost", level="warning")
+            # Internet is down (internet_lost is recorded by check_internet on the transition)
             STATS["internet_disconnects"] += 1
             
             # Stop the tunnel if it's running and update status
-            if tunnel_process and tunnel_process.poll() is None:
+            if process_alive(tunnel_process) or process_alive(standby_process):
                 stop_tunnel()
-            
-            # Ensure status is updated to stopped
-            if STATS["current_status"] != "Stopped":
-                STATS["current_status"] = "Stopped"
-                socketio.emit('tunnel_status', {'status': 'stopped'})
-                log("Tunnel status updated to Stopped", level="warning")
+            tunnel_supervisor.set_state("stopped")
             
             # Retry with backoff
             retry_count += 1
             if retry_count <= config["max_retries"]:
                 retry_delay = config["retry_delay"] * retry_count
-                log(f"Retrying in {retry_delay} seconds (attempt {retry_count}/{config['max_retries']})")
+                emit_event("retry_scheduled", attempt=retry_count, max_retries=config['max_retries'], delay=retry_delay)
                 
                 # Wait for the retry delay, checking for stop event
                 for _ in range(retry_delay):
@@ -2298,22 +5441,30 @@ def monitor_thread_func(config):
                 
                 # Reset retry count when internet is back
                 if not stop_event.is_set():
-                    log("Internet connection restored", level="success")
                     retry_count = 0
         
         # Update uptime
         if STATS["start_time"]:
             STATS["total_uptime"] = (datetime.now() - STATS["start_time"]).total_seconds()
         
-        # Wait for the check interval
+        # Wait for the check interval, or until the settings change or a supervised process exits
         for _ in range(config["check_interval"]):
             if stop_event.is_set():
                 break
-            time.sleep(1)
+            if tunnel_supervisor.wait(1):
+                break
+
+def _wake_monitor_on_config_change(config, changed):
+    """Let the monitor loop and the tunnel manager apply new settings now instead of after their check interval"""
+    tunnel_supervisor.wake()
+    tunnel_manager.wake()
+
+add_config_listener(_wake_monitor_on_config_change)
 
 def cleanup():
     """Clean up resources before exiting"""
     stop_tunnel()
+    tunnel_manager.stop_all()
 
 # Flask routes
 @app.route('/')
@@ -2331,23 +5482,13 @@ def ping_test():
     
     # Update ping history
     timestamp = datetime.now().strftime("%H:%M:%S")
-    ping_data["last_ping_time"] = timestamp
     
     if result is not None:
-        ping_data["ping_history"].append({
-            "timestamp": timestamp,
-            "ping_time": result
-        })
-        
-        # Keep only the last minute of ping results
-        if len(ping_data["ping_history"]) > ping_data["max_history_points"]:
-            ping_data["ping_history"].pop(0)
+        _record_ping(result)
         
         # Calculate statistics
-        ping_values = [p["ping_time"] for p in ping_data["ping_history"]]
-        avg_ping = sum(ping_values) / len(ping_values) if ping_values else 0
-        min_ping = min(ping_values) if ping_values else 0
-        max_ping = max(ping_values) if ping_values else 0
+        with ping_lock:
+            stats = ping_data["rolling_stats"].snapshot()
         
         return jsonify({
             "success": True,
@@ -2355,10 +5496,10 @@ def ping_test():
             "timestamp": timestamp,
             "host": host,
             "stats": {
-                "avg": round(avg_ping, 2),
-                "min": round(min_ping, 2),
-                "max": round(max_ping, 2),
-                "count": len(ping_values)
+                "avg": round(stats["avg"], 2),
+                "min": round(stats["min"], 2),
+                "max": round(stats["max"], 2),
+                "count": stats["count"]
             }
         })
     else:
@@ -2378,25 +5519,28 @@ def settings():
 @app.route('/api/start', methods=['POST'])
 def api_start():
     """Start the tunnel monitor"""
-    global stop_event
+    global stop_event, monitor_thread_instance
     config = load_config()
     
-    if tunnel_process and tunnel_process.poll() is None:
+    if process_alive(tunnel_process):
         return jsonify({"status": "error", "message": "Tunnel is already running"})
     
-    # Reset the stop event
+    # Reset the stop event and any restart backoff (a manual start also clears "failed")
     stop_event.clear()
-    
-    # Start the monitor thread
-    monitor_thread = threading.Thread(target=monitor_thread_func, args=(config,))
-    monitor_thread.daemon = True
-    monitor_thread.start()
+    tunnel_supervisor.reset()
     
     # Update status immediately and emit to clients
-    STATS["current_status"] = "Starting"
-    socketio.emit('tunnel_status', {'status': 'starting'})
+    tunnel_supervisor.set_state("starting")
+    
+    # Start the monitor thread, unless it is still running (a failed tunnel's loop starts it again now)
+    if monitor_thread_instance is not None and monitor_thread_instance.is_alive():
+        tunnel_supervisor.wake()
+    else:
+        monitor_thread_instance = threading.Thread(target=monitor_thread_func, args=(config,))
+        monitor_thread_instance.daemon = True
+        monitor_thread_instance.start()
     
-    log("Monitor started", level="success")
+    emit_event("monitor_started")
     return jsonify({"status": "success", "message": "Tunnel monitor started"})
 
 @app.route('/api/stop', methods=['POST'])
@@ -2407,14 +5551,10 @@ def api_stop():
     # Set the stop event to signal threads to exit
     stop_event.set()
     
-    # Stop the tunnel
+    # Stop the tunnel (publishes the stopped state)
     stop_tunnel()
     
-    # Update status and emit to clients
-    STATS["current_status"] = "Stopped"
-    socketio.emit('tunnel_status', {'status': 'stopped'})
-    
-    log("Monitor stopped", level="warning")
+    emit_event("monitor_stopped")
     return jsonify({"status": "success", "message": "Tunnel monitor stopped"})
 
 @app.route('/api/settings', methods=['GET', 'POST'])
@@ -2436,11 +5576,24 @@ def api_settings():
             config["debug_mode"] = data.get("debug_mode", config["debug_mode"])
             config["tunnel_urls_save_directory"] = data.get("tunnel_urls_save_directory", config["tunnel_urls_save_directory"])
             config["tunnel_urls_filename"] = data.get("tunnel_urls_filename", config["tunnel_urls_filename"])
+            config["ping_backend"] = data.get("ping_backend", config["ping_backend"])
+            config["tunnel_urls_backend"] = data.get("tunnel_urls_backend", config["tunnel_urls_backend"])
+            config["cloudflared_metrics"] = data.get("cloudflared_metrics", config["cloudflared_metrics"])
+            config["tunnel_standby"] = data.get("tunnel_standby", config["tunnel_standby"])
+            config["restart_policy"] = data.get("restart_policy", config["restart_policy"])
+            if "tunnels" in data:
+                # Rejected here rather than replaced by the default in validate_config
+                try:
+                    config["tunnels"] = _validate_tunnel_specs(data["tunnels"])
+                except ValueError as e:
+                    raise ValueError(f"Invalid tunnels: {e}")
             
             # Save the updated configuration
             save_config(config)
             
             return jsonify({"status": "success", "message": "Settings saved successfully"})
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
         except Exception as e:
             logger.error(f"Error saving settings: {e}")
             return jsonify({"status": "error", "message": str(e)})
@@ -2463,50 +5616,187 @@ def api_stats():
     
     return jsonify(STATS)
 
+@app.route('/api/tunnels')
+def api_tunnels():
+    """List the main tunnel and the additional tunnels with their state and counters"""
+    return jsonify({'status': 'success', 'tunnels': all_tunnel_snapshots()})
+
+def _tunnel_snapshot(name):
+    """Snapshot of one tunnel by name, or None if there is no such tunnel"""
+    if name == DEFAULT_TUNNEL_NAME:
+        return main_tunnel_snapshot()
+    tunnel = tunnel_manager.get(name)
+    if tunnel is None:
+        return None
+    return dict(tunnel.snapshot(), output=list(tunnel.output))
+
+@app.route('/api/tunnels/<name>')
+def api_tunnel(name):
+    """Get one tunnel's state, counters and (for additional tunnels) its recent output"""
+    snapshot = _tunnel_snapshot(name)
+    if snapshot is None:
+        return jsonify({'status': 'error', 'message': f"Unknown tunnel '{name}'"}), 404
+    return jsonify({'status': 'success', 'tunnel': snapshot})
+
+@app.route('/api/tunnels/<name>/restart', methods=['POST'])
+def api_tunnel_restart(name):
+    """Restart an additional tunnel (also clears a failed state); the main tunnel uses /api/stop and /api/start"""
+    if tunnel_manager.get(name) is None:
+        return jsonify({'status': 'error', 'message': f"Unknown tunnel '{name}'"}), 404
+    tunnel_manager.restart(name)
+    return jsonify({'status': 'success', 'message': f"Tunnel '{name}' restarting"})
+
+@app.route('/api/tunnels/<name>/urls')
+def api_tunnel_urls_scoped(name):
+    """Get one tunnel's URL history, newest first: /api/tunnels/<name>/urls?limit=&cursor=&from=&to="""
+    snapshot = _tunnel_snapshot(name)
+    if snapshot is None:
+        return jsonify({'status': 'error', 'message': f"Unknown tunnel '{name}'"}), 404
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        date_from = request.args.get('from') or None
+        date_to = request.args.get('to') or None
+        for value in (date_from, date_to):
+            if value:
+                datetime.strptime(value, "%Y-%m-%d")
+        result = tunnel_url_store.page(limit, cursor, snapshot["local_url"], date_from, date_to)
+        return jsonify({
+            'status': 'success',
+            'tunnel': name,
+            'tunnel_urls': result["entries"],
+            'next_cursor': result["next_cursor"],
+            'total_count': result["total"]
+        })
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/supervisor')
+def api_supervisor():
+    """Get the authoritative tunnel state, the restart policy and recent cloudflared exits"""
+    return jsonify(dict(tunnel_supervisor.stats(), restart_policy=load_config()["restart_policy"]))
+
+@app.route('/api/standby')
+def api_standby():
+    """Get the warm standby's state and recent failover latencies"""
+    process = standby_process
+    standby = None
+    if process_alive(process):
+        standby = {'pid': process.pid, 'url': process.tunnel_url, 'ready': process.ready.is_set()}
+    return jsonify({
+        'enabled': load_config()["tunnel_standby"],
+        'standby': standby,
+        'failovers': STATS["failovers"],
+        'last_failover_latency': STATS["last_failover_latency"],
+        'recent_failovers': [
+            {'timestamp': timestamp, 'mode': mode, 'latency': latency}
+            for timestamp, mode, latency in failover_history
+        ]
+    })
+
+@app.route('/api/bus-stats')
+def api_bus_stats():
+    """Get broadcast bus frame count, per-client queue depth and live log subscriptions"""
+    return jsonify(dict(broadcast_bus.stats(), log_stream=log_stream.stats()))
+
+@app.route('/api/log-stats')
+def api_log_stats():
+    """Get log pipeline throughput, queue depth and drop counters"""
+    return jsonify(dict(log_writer.stats(), buffer_dropped=log_buffer.dropped))
+
+@app.route('/api/connectivity')
+def api_connectivity():
+    """Get the shared internet connectivity verdict (a stale one is refreshed in the background)"""
+    return jsonify(check_internet(wait=False))
+
+def _page_tunnel_url_file(save_path, limit, cursor, local_url, date_from, date_to):
+    """Page the tunnel URLs text file newest first, in the shape of TunnelUrlStore.page()"""
+    if cursor is None and not (local_url or date_from or date_to) and not tunnel_url_file.is_loaded(save_path):
+        # First request since startup: answer from the end of the file, parse the rest in the background
+        entries = tunnel_url_file.tail(save_path, limit) if os.path.exists(save_path) else []
+        threading.Thread(target=tunnel_url_file.refresh, args=(save_path,), daemon=True).start()
+        return {"entries": entries, "total": None, "next_cursor": None}
+    
+    entries = tunnel_url_file.refresh(save_path)
+    matched = [
+        index for index, entry in enumerate(entries)
+        if (not local_url or entry["local_url"] == local_url)
+        and (not date_from or entry["date"] >= date_from)
+        and (not date_to or entry["date"] <= date_to)
+    ]
+    newer = [index for index in matched if cursor is None or index < cursor]
+    page = newer[::-1][:limit]
+    return {
+        "entries": [dict(entries[index], id=index) for index in page],
+        "total": len(matched),
+        "next_cursor": page[-1] if len(newer) > limit else None
+    }
+
 @app.route('/api/tunnel-urls')
 def api_tunnel_urls():
-    """Get saved tunnel URLs"""
+    """Get saved tunnel URLs, newest first: /api/tunnel-urls?limit=&cursor=&local_url=&from=&to=
+
+    Complete responses carry an ETag derived from the source's version, and
+    unchanged results are served from memory (or as 304 Not Modified).
+    """
     try:
         config = load_config()
-        save_directory = config.get("tunnel_urls_save_directory", "d:\\Project\\Git Hub\\cloudflare_tunnel_monitor(Windows)")
-        filename = config.get("tunnel_urls_filename", "tunnel_urls.txt")
-        save_path = os.path.join(save_directory, filename)
-        
-        tunnel_urls = []
-        if os.path.exists(save_path):
-            with open(save_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                for line in lines:
-                    line = line.strip()
-                    if line and ' - ' in line:
-                        # Parse the enhanced format: Local URL - Date - Time - Generated URL
-                        try:
-                            parts = line.split(' - ')
-                            if len(parts) >= 4:
-                                local_url = parts[0].strip()
-                                date = parts[1].strip()
-                                time = parts[2].strip()
-                                generated_url = ' - '.join(parts[3:]).strip()  # Handle URLs with dashes
-                                
-                                tunnel_urls.append({
-                                    'local_url': local_url,
-                                    'date': date,
-                                    'time': time,
-                                    'generated_url': generated_url,
-                                    'full_entry': line
-                                })
-                        except Exception as parse_error:
-                            logger.warning(f"Error parsing tunnel URL line: {line} - {parse_error}")
+        save_directory, filename, save_path = _tunnel_urls_path(config)
+        backend = config["tunnel_urls_backend"]
         
-        return jsonify({
-            'status': 'success',
-            'tunnel_urls': tunnel_urls,
-            'save_path': save_path,
-            'save_directory': save_directory,
-            'filename': filename,
-            'total_count': len(tunnel_urls)
-        })
+        if backend == "file":
+            version = TunnelUrlFile.signature(save_path)
+        else:
+            version = tunnel_url_store.etag_version()
+        etag = hashlib.sha1(f"{backend}:{save_path}:{version}".encode()).hexdigest()[:20]
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        cache_key = request.query_string
+        with tunnel_url_responses_lock:
+            body = tunnel_url_responses["bodies"].get(cache_key) if tunnel_url_responses["etag"] == etag else None
+        if body is None:
+            limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+            cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+            date_from = request.args.get('from') or None
+            date_to = request.args.get('to') or None
+            for value in (date_from, date_to):
+                if value:
+                    datetime.strptime(value, "%Y-%m-%d")  # Dates are compared as YYYY-MM-DD strings
+            local_url = request.args.get('local_url') or None
+            
+            if backend == "file":
+                result = _page_tunnel_url_file(save_path, limit, cursor, local_url, date_from, date_to)
+            else:
+                result = tunnel_url_store.page(limit, cursor, local_url, date_from, date_to)
+            body = {
+                'status': 'success',
+                'tunnel_urls': result["entries"],
+                'next_cursor': result["next_cursor"],
+                'save_path': save_path,
+                'save_directory': save_directory,
+                'filename': filename,
+                'total_count': result["total"],
+                'backend': backend
+            }
+            if result["total"] is not None:  # Partial tail answers are not worth keeping
+                with tunnel_url_responses_lock:
+                    if tunnel_url_responses["etag"] != etag:
+                        tunnel_url_responses.update(etag=etag, bodies={})
+                    if len(tunnel_url_responses["bodies"]) < 32:
+                        tunnel_url_responses["bodies"][cache_key] = body
         
+        response = jsonify(body)
+        if body['total_count'] is not None:
+            # A partial tail answer must not be revalidated, or the 304 would pin it in the browser
+            response.set_etag(etag)
+        return response
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -2514,10 +5804,8 @@ def api_tunnel_urls():
 def api_download_tunnel_urls():
     """Download saved tunnel URLs file"""
     try:
-        config = load_config()
-        save_directory = config.get("tunnel_urls_save_directory", "d:\\Project\\Git Hub\\cloudflare_tunnel_monitor(Windows)")
-        filename = config.get("tunnel_urls_filename", "tunnel_urls.txt")
-        save_path = os.path.join(save_directory, filename)
+        _, _, save_path = _tunnel_urls_path(load_config())
+        tunnel_url_store.flush()  # Include entries still queued for the file
         
         if not os.path.exists(save_path):
             return jsonify({'status': 'error', 'message': 'Tunnel URLs file not found'}), 404
@@ -2537,8 +5825,7 @@ def api_download_tunnel_urls():
 def api_open_save_directory():
     """Open the tunnel URLs save directory in file explorer"""
     try:
-        config = load_config()
-        save_directory = config.get("tunnel_urls_save_directory", "d:\\Project\\Git Hub\\cloudflare_tunnel_monitor(Windows)")
+        save_directory, _, _ = _tunnel_urls_path(load_config())
         
         # Check if directory exists, create if not
         if not os.path.exists(save_directory):
@@ -2585,7 +5872,7 @@ def network_diagnostics():
         results = {
             'ping_test': ping_host(config.get('ping_test_url', '1.1.1.1')),
             'dns_test': ping_host('8.8.8.8'),
-            'tunnel_status': 'running' if tunnel_process and tunnel_process.poll() is None else 'stopped'
+            'tunnel_status': 'running' if process_alive(tunnel_process) else 'stopped'
         }
         
         return jsonify({
@@ -2595,6 +5882,38 @@ def network_diagnostics():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/ping-benchmark', methods=['POST'])
+def api_ping_benchmark():
+    """Benchmark the available ping backends against the configured or an alternative ping host
+
+    Runs are serialized and capped at PING_BENCHMARK_MAX_SECONDS in total.
+    """
+    try:
+        config = load_config()
+        data = request.get_json(silent=True) or {}
+        host = data.get('host', config.get('ping_test_url', '1.1.1.1'))
+        if host not in (config.get('ping_test_url'), *ALTERNATIVE_PING_HOSTS):
+            raise ValueError(f"host must be the configured ping host or one of {', '.join(ALTERNATIVE_PING_HOSTS)}")
+        samples = max(1, min(int(data.get('samples', 20)), 100))
+        
+        if not ping_benchmark_lock.acquire(blocking=False):
+            return jsonify({'status': 'error', 'message': 'A ping benchmark is already running'}), 409
+        try:
+            results = benchmark_ping_backends(host, samples)
+        finally:
+            ping_benchmark_lock.release()
+        
+        return jsonify({
+            'status': 'success',
+            'host': host,
+            'active_backend': ping_backend,
+            'results': results
+        })
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/api/download-config')
 def api_download_config():
     """Download current configuration file"""
@@ -2611,82 +5930,50 @@ def api_download_config():
 def api_clear_logs():
     """Clear application logs"""
     try:
-        # Clear the log queue
-        while not log_queue.empty():
-            try:
-                log_queue.get_nowait()
-            except queue.Empty:
-                break
+        # Clear the log buffer
+        log_buffer.clear()
         
-        # Also clear log files if they exist
-        logs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-        if os.path.exists(logs_dir):
-            for filename in os.listdir(logs_dir):
-                if filename.endswith('.log'):
-                    log_file_path = os.path.join(logs_dir, filename)
-                    try:
-                        with open(log_file_path, 'w') as f:
-                            f.write('')  # Clear the file content
-                    except Exception as e:
-                        logger.warning(f"Could not clear log file {filename}: {e}")
-        
-        log("Application logs cleared", level="info")
+        # Also clear the log files (active segment and compressed archives);
+        # the event history behind /api/events/summary is kept
+        log_writer.clear()
+        
+        emit_event("logs_cleared")
         return jsonify({'status': 'success', 'message': 'Logs cleared successfully'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/api/download-logs')
 def api_download_logs():
-    """Download log files as a text file"""
+    """Stream the log files: /api/download-logs?format=text|jsonl&gzip=1&from=&to=&level="""
     try:
-        logs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-        log_content = []
-        
-        # Read current log files
-        if os.path.exists(logs_dir):
-            for filename in sorted(os.listdir(logs_dir)):
-                if filename.endswith('.log'):
-                    log_file_path = os.path.join(logs_dir, filename)
-                    try:
-                        with open(log_file_path, 'r', encoding='utf-8') as f:
-                            content = f.read().strip()
-                            if content:
-                                log_content.append(f"=== {filename} ===")
-                                log_content.append(content)
-                                log_content.append("")
-                    except Exception as e:
-                        log_content.append(f"Error reading {filename}: {str(e)}")
-        
-        # Add current session logs from queue
-        session_logs = []
-        temp_queue = queue.Queue()
-        while not log_queue.empty():
-            try:
-                log_entry = log_queue.get_nowait()
-                session_logs.append(f"[{log_entry['timestamp']}] {log_entry['level'].upper()}: {log_entry['message']}")
-                temp_queue.put(log_entry)  # Keep for the original queue
-            except queue.Empty:
-                break
-        
-        # Restore the queue
-        while not temp_queue.empty():
-            log_queue.put(temp_queue.get_nowait())
-        
-        if session_logs:
-            log_content.append("=== Current Session Logs ===")
-            log_content.extend(session_logs)
+        fmt = request.args.get('format', 'text')
+        if fmt not in LOG_EXPORT_FORMATS:
+            return jsonify({'status': 'error', 'message': f"Unknown format, expected one of {', '.join(LOG_EXPORT_FORMATS)}"}), 400
+        levels = {level.strip().lower() for level in request.args.get('level', '').split(',') if level.strip()}
+        unknown = levels - set(LOG_FILE_LEVELS)
+        if unknown:
+            return jsonify({'status': 'error', 'message': f"Unknown level, expected one of {', '.join(LOG_FILE_LEVELS)}"}), 400
+        start = float(request.args['from']) if request.args.get('from') else None
+        end = float(request.args['to']) if request.args.get('to') else None
+        compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
         
-        if not log_content:
-            log_content = ["No logs available"]
-        
-        log_text = "\n".join(log_content)
+        # Nothing is read until the client starts consuming the response
+        chunks = export_logs(fmt, start, end, levels or None)
+        filename = f'tunnel_monitor_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{"txt" if fmt == "text" else "jsonl"}'
+        mimetype = 'text/plain' if fmt == 'text' else 'application/x-ndjson'
+        if compress:
+            chunks = _gzip_chunks(chunks)
+            filename += '.gz'
+            mimetype = 'application/gzip'
         
         from flask import Response
         return Response(
-            log_text,
-            mimetype='text/plain',
-            headers={'Content-Disposition': f'attachment; filename=tunnel_monitor_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'}
+            chunks,
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -2739,117 +6026,139 @@ def api_restart():
 
 @app.route('/api/logs')
 def api_logs():
-    """Get logs"""
-    logs = []
-    while not log_queue.empty():
-        try:
-            logs.append(log_queue.get_nowait())
-        except queue.Empty:
-            break
+    """Get log records after a cursor: /api/logs?after=<seq>&limit="""
+    after = request.args.get('after', type=int)
+    limit = max(1, min(request.args.get('limit', 200, type=int), 1000))
+    logs, missed = log_buffer.since(after, limit)
     
-    return jsonify(logs)
+    return jsonify({
+        'logs': logs,
+        'cursor': logs[-1]['seq'] if logs else (after if after is not None else log_buffer.last_seq()),
+        'missed': missed,
+        'dropped': log_buffer.dropped
+    })
 
-@app.route('/api/network-data')
-def api_network_data():
-    """Get current network transfer data with statistics"""
-    global network_data
-    
-    # Get current network stats
-    current_stats = get_network_io_stats()
-    current_time = time.time()
-    
-    if current_stats and network_data["last_measurement"]:
-        # Calculate speeds
-        time_diff = current_time - network_data["last_measurement"]["timestamp"]
-        if time_diff > 0:
-            upload_speed, download_speed = calculate_transfer_speed(
-                current_stats, 
-                network_data["last_measurement"]["stats"], 
-                time_diff
-            )
-            
-            # Update current speeds
-            network_data["current_upload_speed"] = upload_speed
-            network_data["current_download_speed"] = download_speed
-            
-            # Add to history
-            network_data["transfer_history"].append({
-                "timestamp": current_time,
-                "upload_speed": upload_speed,
-                "download_speed": download_speed,
-                "total_sent": current_stats["bytes_sent"],
-                "total_recv": current_stats["bytes_recv"]
-            })
-            
-            # Maintain history size
-            if len(network_data["transfer_history"]) > network_data["max_history_points"]:
-                network_data["transfer_history"].pop(0)
-    
-    # Update total bytes and last measurement
-    if current_stats:
-        network_data["total_bytes_sent"] = current_stats["bytes_sent"]
-        network_data["total_bytes_recv"] = current_stats["bytes_recv"]
-        network_data["last_measurement"] = {
-            "timestamp": current_time,
-            "stats": current_stats
-        }
+@app.route('/api/logs/search')
+def api_logs_search():
+    """Search the log files: /api/logs/search?q=&level=&from=&to=&limit=&cursor="""
+    try:
+        query = request.args.get('q', '').strip()
+        levels = {level.strip().lower() for level in request.args.get('level', '').split(',') if level.strip()}
+        unknown = levels - set(LOG_FILE_LEVELS)
+        if unknown:
+            return jsonify({'status': 'error', 'message': f"Unknown level, expected one of {', '.join(LOG_FILE_LEVELS)}"}), 400
+        
+        start = float(request.args['from']) if request.args.get('from') else None
+        end = float(request.args['to']) if request.args.get('to') else None
+        limit = max(1, min(int(request.args.get('limit', 100)), LOG_SEARCH_MAX_LIMIT))
+        
+        began = time.perf_counter()
+        result = search_logs(query, levels or None, start, end, limit, request.args.get('cursor'))
+        return jsonify({
+            'status': 'success',
+            'results': result["results"],
+            'next_cursor': result["next_cursor"],
+            'scanned_blocks': result["scanned_blocks"],
+            'elapsed_ms': round((time.perf_counter() - began) * 1000, 2)
+        })
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/events')
+def api_events():
+    """Get recent typed events after a cursor: /api/events?after=<seq>&type=&limit="""
+    after = request.args.get('after', type=int)
+    limit = max(1, min(request.args.get('limit', 200, type=int), 1000))
+    types = {event_type for event_type in request.args.get('type', '').split(',') if event_type} or None
+    events, missed = event_log.since(after, limit, types)
     
     return jsonify({
-        "total_sent": network_data["total_bytes_sent"],
-        "total_recv": network_data["total_bytes_recv"],
-        "total_sent_formatted": format_bytes(network_data["total_bytes_sent"]),
-        "total_recv_formatted": format_bytes(network_data["total_bytes_recv"]),
-        "current_upload_speed": network_data["current_upload_speed"],
-        "current_download_speed": network_data["current_download_speed"],
-        "upload_speed_formatted": format_bytes(network_data["current_upload_speed"]) + "/s",
-        "download_speed_formatted": format_bytes(network_data["current_download_speed"]) + "/s",
-        "transfer_history": network_data["transfer_history"][-20:] if network_data["transfer_history"] else []  # Last 20 points for chart
+        'status': 'success',
+        'events': events,
+        'cursor': events[-1]['seq'] if events else (after if after is not None else event_log.buffer.last_seq()),
+        'missed': missed,
+        'types': sorted(EVENT_TYPES)
     })
 
+@app.route('/api/events/summary')
+def api_events_summary():
+    """Get tunnel starts, outages and downtime from the event log: /api/events/summary?from=&to="""
+    try:
+        end = float(request.args.get('to', time.time()))
+        start = float(request.args.get('from', end - 86400))
+        return jsonify(dict(summarize_events(start, end), status='success', **{'from': start, 'to': end}))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/api/network-data')
+def api_network_data():
+    """Get current network transfer data with statistics (sampled by the network monitor)"""
+    return jsonify(network_payload(snapshot=True))
+
+@app.route('/api/tunnel-metrics')
+def api_tunnel_metrics():
+    """Get cloudflared's scraped metrics: latest values, recent history and scrape status"""
+    payload = tunnel_metrics_payload(snapshot=True)
+    payload.update(
+        address=getattr(tunnel_process, "metrics_address", None) or load_config()["cloudflared_metrics"],
+        scrapes=tunnel_metrics["scrapes"],
+        failures=tunnel_metrics["failures"]
+    )
+    return jsonify(payload)
+
+@app.route('/api/history')
+def api_history():
+    """Query persisted metric history: /api/history?metric=&from=&to=&step="""
+    try:
+        metric = request.args.get('metric', 'ping')
+        if metric not in HISTORY_METRICS:
+            return jsonify({'status': 'error', 'message': f"Unknown metric, expected one of {', '.join(HISTORY_METRICS)}"}), 400
+        
+        end = float(request.args.get('to', time.time()))
+        start = float(request.args.get('from', end - 3600))
+        step = request.args.get('step', type=int)
+        if step is not None and step <= 0:
+            return jsonify({'status': 'error', 'message': 'step must be a positive number of seconds'}), 400
+        
+        result = query_history(metric, start, end, step)
+        return jsonify({
+            'status': 'success',
+            'metric': metric,
+            'from': start,
+            'to': end,
+            'tier': result["tier"],
+            'step': result["step"],
+            'points': result["points"]
+        })
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/api/ping')
 def api_ping():
-    """Get current ping data with statistics"""
+    """Get current ping data with statistics: /api/ping?series=minutes|hours
+
+    With `series`, the response also carries the latency percentiles of each
+    closed minute of the last hour or each closed hour of the last week.
+    """
     global ping_data
     
+    series = request.args.get('series')
+    if series is not None and series not in ("minutes", "hours"):
+        return jsonify({'status': 'error', 'message': "series must be 'minutes' or 'hours'"}), 400
+    
     # If ping monitoring hasn't started yet, return None
     if ping_data["last_ping_time"] is None:
         return jsonify({"last_ping_time": None, "ping_history": [], "stats": None})
     
-    # Calculate statistics from ping history
-    stats = calculate_ping_stats(ping_data["ping_history"])
-    
-    return jsonify({
-        "last_ping_time": ping_data["last_ping_time"],
-        "ping_history": ping_data["ping_history"],
-        "stats": stats
-    })
-
-def calculate_ping_stats(ping_history):
-    """Calculate statistics from ping history"""
-    if not ping_history:
-        return {
-            "avg": 0,
-            "min": 0,
-            "max": 0,
-            "count": 0
-        }
-    
-    ping_times = [entry["ping_time"] for entry in ping_history if "ping_time" in entry]
-    
-    if not ping_times:
-        return {
-            "avg": 0,
-            "min": 0,
-            "max": 0,
-            "count": 0
-        }
-    
-    return {
-        "avg": sum(ping_times) / len(ping_times),
-        "min": min(ping_times),
-        "max": max(ping_times),
-        "count": len(ping_times)
-    }
+    payload = ping_payload(snapshot=True)
+    payload["targets"] = ping_data["targets"]
+    if series:
+        payload["percentile_series"] = latency_series(series)
+    return jsonify(payload)
 
 # Global monitoring threads
 ping_monitor_running = False
@@ -2858,8 +6167,77 @@ internet_monitor_running = False
 internet_monitor_thread_instance = None
 network_monitor_running = False
 network_monitor_thread_instance = None
-status_monitor_running = False
-status_monitor_thread_instance = None
+
+broadcast_bus_running = False
+broadcast_bus_thread_instance = None
+
+# Coalesces all server-push events into one frame per tick
+broadcast_bus = BroadcastBus()
+
+# Persistent metric history (see record_metric / query_history)
+history_writer_running = False
+history_writer_thread_instance = None
+history_dir = os.path.join(BASE_DIR, 'history')
+history_queue = queue.Queue(maxsize=100000)
+history_stats = {"written": 0, "dropped": 0}
+HISTORY_METRICS = ("ping", "upload_speed", "download_speed", "failover_latency")
+HISTORY_FLUSH_INTERVAL = 1.0  # Seconds between batched writes
+HISTORY_BATCH_SIZE = 1000
+HISTORY_MAX_POINTS = 10000  # Maximum points returned by one query
+# (bucket seconds, retention seconds) per tier; step 1 is the raw samples, the rest are rollups.
+# The raw tier's retention is the history_retention_days setting (see history_tiers).
+HISTORY_TIERS = ((1, None), (10, 86400), (60, 30 * 86400), (3600, 365 * 86400))
+ROLLUP_STEPS = tuple(step for step, _ in HISTORY_TIERS if step > 1)
+
+# Log search index (see update_log_index / search_logs)
+log_indexer_running = False
+log_indexer_thread_instance = None
+log_index_path = os.path.join(logs_dir, 'search_index.db')
+LOG_INDEX_INTERVAL = 2.0  # Seconds between incremental index passes
+LOG_SEARCH_MAX_LIMIT = 500
+LOG_FILE_LEVELS = ("debug", "info", "warning", "error", "critical")
+LOG_TOKEN_PATTERN = re.compile(r"[a-z0-9]{2,}")
+
+# Tunnel URL history (see TunnelUrlStore)
+tunnel_url_store = TunnelUrlStore(
+    os.path.join(history_dir, 'tunnel_urls.db'),
+    legacy_source=lambda: _tunnel_urls_path(load_config())[2]
+)
+atexit.register(tunnel_url_store.flush)
+tunnel_url_file = TunnelUrlFile()  # Incremental reader used when tunnel_urls_backend is "file"
+tunnel_url_responses = {"etag": None, "bodies": {}}  # /api/tunnel-urls bodies for the current ETag, by query string
+tunnel_url_responses_lock = threading.Lock()  # Requests are served on several threads
+
+# cloudflared metrics (see scrape_tunnel_metrics)
+tunnel_metrics_running = False
+tunnel_metrics_thread_instance = None
+TUNNEL_METRICS_INTERVAL = 2.0  # Seconds between scrapes
+PROMETHEUS_LABEL_PATTERN = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+# (field, Prometheus metric, how label sets are combined: "rate" of the summed counter, "sum" or "mean")
+TUNNEL_METRICS = (
+    ("requests_per_sec", "cloudflared_tunnel_total_requests", "rate"),
+    ("errors_per_sec", "cloudflared_tunnel_request_errors", "rate"),
+    ("concurrent_requests", "cloudflared_tunnel_concurrent_requests_per_tunnel", "sum"),
+    ("ha_connections", "cloudflared_tunnel_ha_connections", "sum"),
+    ("rtt_ms", "quic_client_smoothed_rtt", "mean"),
+)
+tunnel_metrics = {
+    "history": TimeSeriesRing(1800, (field for field, _, _ in TUNNEL_METRICS)),  # 1 hour at one scrape every 2 seconds
+    "counters": None,  # (timestamp, {metric: value}) of the previous scrape, for rates
+    "last": None,  # {field: value} of the latest scrape
+    "error": None,
+    "scrapes": 0,
+    "failures": 0
+}
+tunnel_metrics_session = requests.Session()  # Keep-alive connection reused by every scrape
+tunnel_metrics_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
+# Probe scheduler shared by all ping targets
+probe_scheduler = ProbeScheduler()
+PRIMARY_PING_TARGET = "primary"
+ALTERNATIVE_PING_HOSTS = ["8.8.8.8", "1.1.1.1", "8.8.4.4", "1.0.0.1"]
+ALTERNATIVE_PING_INTERVAL = 5.0  # Seconds between probes of each alternative host
+MAX_CONSECUTIVE_PING_FAILURES = 5
 
 def start_independent_ping_monitor():
     """Start ping monitoring independent of tunnel status"""
@@ -2906,49 +6284,6 @@ def ping_monitor_watchdog():
     
     log("Ping monitor watchdog stopped", level="info")
 
-def start_independent_status_monitor():
-    """Start status monitoring independent of other monitoring"""
-    global status_monitor_running, status_monitor_thread_instance
-    
-    if not status_monitor_running:
-        status_monitor_running = True
-        status_monitor_thread_instance = threading.Thread(target=independent_status_monitor_thread)
-        status_monitor_thread_instance.daemon = True
-        status_monitor_thread_instance.start()
-        log("Independent status monitor started", level="info")
-
-def independent_status_monitor_thread():
-    """Independent status monitoring thread that ensures UI sync"""
-    global status_monitor_running, tunnel_process
-    
-    while status_monitor_running:
-        try:
-            # Check actual tunnel process status
-            actual_status = "Stopped"
-            if tunnel_process and tunnel_process.poll() is None:
-                actual_status = "Running"
-            
-            # Update STATS if there's a mismatch
-            if STATS["current_status"] != actual_status:
-                STATS["current_status"] = actual_status
-                status_value = 'running' if actual_status == "Running" else 'stopped'
-                
-                # Emit status update to all connected clients
-                socketio.emit('tunnel_status', {'status': status_value})
-                log(f"Status synchronized: {actual_status}", level="info")
-            
-            # Check every 5 seconds
-            for i in range(50):  # 5 seconds with monitoring check
-                if not status_monitor_running:
-                    break
-                time.sleep(0.1)
-                
-        except Exception as e:
-            logger.error(f"Error in status monitor thread: {e}")
-            time.sleep(5)
-    
-    log("Status monitor thread stopped", level="info")
-
 def start_independent_network_monitor():
     """Start network monitoring independent of tunnel status"""
     global network_monitor_running, network_monitor_thread_instance
@@ -2971,108 +6306,238 @@ def start_independent_internet_monitor():
         internet_monitor_thread_instance.start()
         log("Independent internet monitor started", level="info")
 
-def independent_ping_monitor_thread():
-    """Independent ping monitoring thread that runs continuously"""
-    global ping_data, ping_monitor_running
+def start_broadcast_bus():
+    """Start the thread that flushes the broadcast bus once per tick"""
+    global broadcast_bus_running, broadcast_bus_thread_instance
     
-    max_history_size = ping_data["max_history_points"]
-    consecutive_failures = 0
-    max_consecutive_failures = 5
+    if not broadcast_bus_running:
+        broadcast_bus_running = True
+        broadcast_bus_thread_instance = threading.Thread(target=broadcast_bus_thread)
+        broadcast_bus_thread_instance.daemon = True
+        broadcast_bus_thread_instance.start()
+        log("Broadcast bus started", level="info")
+
+def broadcast_bus_thread():
+    """Flush coalesced updates and live log batches to the clients at the configured broadcast rate"""
+    global broadcast_bus_running
     
-    while ping_monitor_running:
+    while broadcast_bus_running:
         try:
-            # Get the current ping time using the configured ping_test_url
-            config = load_config()
-            ping_url = config.get("ping_test_url", "1.1.1.1")
-            ping_time = ping_host(ping_url, timeout=3000)  # 3 second timeout
-            
-            if ping_time is not None:
-                # Successful ping - reset failure counter
-                consecutive_failures = 0
-                
-                # Update ping data
-                ping_data["last_ping_time"] = ping_time
-                
-                # Add to history and maintain max size
-                current_time = time.time()  # Timestamp
-                ping_data["ping_history"].append({"timestamp": current_time, "ping_time": ping_time})
-                if len(ping_data["ping_history"]) > max_history_size:
-                    ping_data["ping_history"].pop(0)
-                
-                # Calculate statistics
-                stats = calculate_ping_stats(ping_data["ping_history"])
-                
-                # Emit the ping data to all connected clients
-                try:
-                    socketio.emit('ping_data', {
-                        'last_ping_time': ping_time,
-                        'ping_history': ping_data["ping_history"],
-                        'stats': stats
-                    })
-                except Exception as emit_error:
-                    logger.warning(f"Error emitting ping data: {emit_error}")
-            else:
-                # Failed ping - increment failure counter
-                consecutive_failures += 1
-                logger.warning(f"Ping failed to {ping_url} (failure {consecutive_failures}/{max_consecutive_failures})")
-                
-                # If too many consecutive failures, try alternative hosts
-                if consecutive_failures >= max_consecutive_failures:
-                    alternative_hosts = ["8.8.8.8", "1.1.1.1", "8.8.4.4", "1.0.0.1"]
-                    for alt_host in alternative_hosts:
-                        if alt_host != ping_url:
-                            alt_ping = ping_host(alt_host, timeout=3000)
-                            if alt_ping is not None:
-                                logger.info(f"Switched to alternative ping host: {alt_host}")
-                                ping_time = alt_ping
-                                ping_data["last_ping_time"] = ping_time
-                                
-                                # Add to history
-                                current_time = time.time()
-                                ping_data["ping_history"].append({"timestamp": current_time, "ping_time": ping_time})
-                                if len(ping_data["ping_history"]) > max_history_size:
-                                    ping_data["ping_history"].pop(0)
-                                
-                                # Calculate statistics and emit
-                                stats = calculate_ping_stats(ping_data["ping_history"])
-                                try:
-                                    socketio.emit('ping_data', {
-                                        'last_ping_time': ping_time,
-                                        'ping_history': ping_data["ping_history"],
-                                        'stats': stats
-                                    })
-                                except Exception as emit_error:
-                                    logger.warning(f"Error emitting ping data: {emit_error}")
-                                
-                                consecutive_failures = 0  # Reset failure counter
-                                break
-            
-            # Wait for 1 second before the next ping, but check running status frequently
-            for i in range(10):  # Check ping_monitor_running every 0.1 seconds
-                if not ping_monitor_running:
-                    break
-                time.sleep(0.1)
-                
+            broadcast_bus.flush()
+            log_stream.flush()
+            time.sleep(1.0 / load_config()["broadcast_rate"])
         except Exception as e:
-            consecutive_failures += 1
-            logger.error(f"Error in ping monitor thread: {e}")
-            
-            # If we have too many errors, wait longer before retrying
-            if consecutive_failures >= max_consecutive_failures:
-                logger.error(f"Too many ping failures ({consecutive_failures}), waiting 5 seconds...")
-                for i in range(50):  # 5 seconds with monitoring check
-                    if not ping_monitor_running:
-                        break
-                    time.sleep(0.1)
-            else:
-                # Normal error delay
-                for i in range(10):  # 1 second with monitoring check
-                    if not ping_monitor_running:
-                        break
-                    time.sleep(0.1)
+            logger.error(f"Error in broadcast bus thread: {e}")
+            time.sleep(1)
+
+def _configured_ping_host():
+    """Return the host the primary ping target should probe"""
+    return load_config().get("ping_test_url", "1.1.1.1")
+
+def add_ping_sample(ping_time):
+    """Add a successful ping to the history ring, rolling statistics and latency sketches"""
+    now = time.time()
+    with ping_lock:
+        # The ring buffer drops the oldest sample when full
+        ping_data["ping_history"].append(now, ping_time)
+        ping_data["rolling_stats"].add(ping_time)
+    record_latency(ping_time, now)
+    record_metric("ping", ping_time, now)
+
+def ping_payload(snapshot=False):
+    """Build a ping_data event
+
+    Snapshots carry the whole client window. Updates carry the samples
+    appended since the previous update, found from the ring's sequence
+    numbers, plus base_seq, the sequence number the client must already
+    have; building one marks those samples as published.
+    """
+    percentiles = latency_percentiles()
+    with ping_lock:
+        history = ping_data["ping_history"]
+        payload = {
+            'seq': history.total,
+            'last_ping_time': ping_data["last_ping_time"],
+            'stats': ping_data["rolling_stats"].snapshot(),
+            'percentiles': percentiles
+        }
+        if snapshot:
+            payload['snapshot'] = True
+            payload['ping_history'] = history.to_records(last=ping_data["max_history_points"])
+        else:
+            # More than a window behind: the client's base_seq check fails and it resyncs
+            base_seq = max(ping_data["published_seq"], history.total - ping_data["max_history_points"])
+            payload['base_seq'] = base_seq
+            payload['samples'] = history.to_records(last=history.total - base_seq)
+            ping_data["published_seq"] = history.total
+    return payload
+
+def add_ping_failure():
+    """Count a lost probe in the rolling statistics and the history store"""
+    with ping_lock:
+        ping_data["rolling_stats"].add(None)
+    record_metric("ping", None)
+
+def _record_ping(ping_time):
+    """Add a ping sample to ping_data and push it to connected clients"""
+    # Sample, delta and publish under one lock, so concurrent callers (probe
+    # thread, /ping_test) publish their deltas in sequence order
+    with ping_lock:
+        ping_data["last_ping_time"] = ping_time
+        
+        add_ping_sample(ping_time)
+        
+        # Publish only the new samples; the broadcast bus sends them on the next tick
+        try:
+            broadcast_bus.publish('ping_data', ping_payload())
+        except Exception as emit_error:
+            logger.warning(f"Error emitting ping data: {emit_error}")
+
+def _close_latency_minute():
+    """Roll the current minute sketch up into the minute and hour histories"""
+    sketches = latency_sketches
+    closed = sketches["minute"]
+    sketches["minutes"].append((sketches["minute_start"], closed))
+    
+    hour_start = sketches["minute_start"] // 3600 * 3600
+    if sketches["hour_start"] != hour_start:
+        if sketches["hour_start"] is not None and sketches["hour"].count:
+            sketches["hours"].append((sketches["hour_start"], sketches["hour"]))
+        sketches["hour_start"] = hour_start
+        sketches["hour"] = LatencySketch()
+    sketches["hour"].merge(closed)
+
+def record_latency(ping_time, timestamp=None):
+    """Feed a probe result into the minute, hour and lifetime latency sketches"""
+    minute_start = int((timestamp or time.time()) // 60 * 60)
+    
+    with latency_lock:
+        sketches = latency_sketches
+        if sketches["minute_start"] != minute_start:
+            if sketches["minute_start"] is not None:
+                _close_latency_minute()
+                # Only an adjacent minute is part of the rolling window
+                adjacent = minute_start - sketches["minute_start"] == 60
+                sketches["previous_minute"] = sketches["minute"] if adjacent else None
+            sketches["minute_start"] = minute_start
+            sketches["minute"] = LatencySketch()
+        
+        sketches["minute"].add(ping_time)
+        sketches["lifetime"].add(ping_time)
+
+def latency_percentiles():
+    """Return latency percentiles for the rolling window, the current hour and the lifetime"""
+    with latency_lock:
+        sketches = latency_sketches
+        # Current minute plus the previous one, so the window never starts empty
+        window = sketches["minute"].copy()
+        if sketches["previous_minute"] is not None:
+            window.merge(sketches["previous_minute"])
+        hour = sketches["minute"].copy()
+        if sketches["hour_start"] == (sketches["minute_start"] or 0) // 3600 * 3600:
+            hour.merge(sketches["hour"])
+        
+        return {
+            "window": window.percentiles(),
+            "hour": hour.percentiles(),
+            "lifetime": sketches["lifetime"].percentiles()
+        }
+
+def latency_series(resolution):
+    """Return the percentiles of each closed minute (last hour) or hour (last week)
+
+    Args:
+        resolution (str): "minutes" or "hours"
+
+    Returns:
+        list: {"start": epoch seconds, "count", "p50", ...} oldest first
+    """
+    if resolution not in ("minutes", "hours"):
+        raise ValueError("series must be 'minutes' or 'hours'")
+    with latency_lock:
+        closed = list(latency_sketches[resolution])
+        return [dict(sketch.percentiles(), start=start, count=sketch.count) for start, sketch in closed]
+
+def _on_target_ping(target, ping_time):
+    """Store the latest result of a secondary probe target in ping_data"""
+    ping_data["targets"][target["name"]] = {
+        "host": target["last_host"],
+        "last_ping_time": ping_time,
+        "last_probe": target["last_probe"],
+        "consecutive_failures": target["consecutive_failures"]
+    }
+
+def _on_primary_ping(target, ping_time):
+    """Handle a result from the primary (configured) ping target"""
+    _on_target_ping(target, ping_time)
+    
+    if ping_time is None:
+        failures = target["consecutive_failures"]
+        emit_event("probe_failed", host=target['last_host'], failures=failures, limit=MAX_CONSECUTIVE_PING_FAILURES)
+        
+        # If too many consecutive failures, use a fresh result from an alternative host
+        if failures < MAX_CONSECUTIVE_PING_FAILURES:
+            add_ping_failure()
+            return
+        fresh_after = time.time() - ALTERNATIVE_PING_INTERVAL * 2
+        for alt_host in ALTERNATIVE_PING_HOSTS:
+            alt = probe_scheduler.targets.get(alt_host)
+            if (alt_host != target["last_host"] and alt and alt["last_result"] is not None
+                    and alt["last_probe"] and alt["last_probe"] >= fresh_after):
+                emit_event("probe_failover", host=alt_host)
+                ping_time = alt["last_result"]
+                target["consecutive_failures"] = 0  # Reset failure counter
+                break
+        else:
+            add_ping_failure()
+            return
+    
+    _record_ping(ping_time)
+
+def independent_ping_monitor_thread():
+    """Independent ping monitoring thread that runs the asyncio probe scheduler"""
+    global ping_monitor_running
+    
+    # The configured host is probed every second, alternatives less often in the background
+    probe_scheduler.add_target(
+        PRIMARY_PING_TARGET, _configured_ping_host,
+        interval=1.0, timeout=3000, jitter=0, callback=_on_primary_ping
+    )
+    for alt_host in ALTERNATIVE_PING_HOSTS:
+        probe_scheduler.add_target(
+            alt_host, alt_host,
+            interval=ALTERNATIVE_PING_INTERVAL, timeout=3000, callback=_on_target_ping
+        )
+    
+    try:
+        asyncio.run(probe_scheduler.run(lambda: ping_monitor_running))
+    except Exception as e:
+        logger.error(f"Error in ping monitor thread: {e}")
     
     logger.info("Ping monitor thread stopped")
 
+def network_payload(snapshot=False, new_samples=1):
+    """Build a network_data event, a full snapshot or only the newest samples (see ping_payload)"""
+    history = network_data["transfer_history"]
+    payload = {
+        'seq': history.total,
+        'total_sent': network_data["total_bytes_sent"],
+        'total_recv': network_data["total_bytes_recv"],
+        'total_sent_formatted': format_bytes(network_data["total_bytes_sent"]),
+        'total_recv_formatted': format_bytes(network_data["total_bytes_recv"]),
+        'current_upload_speed': network_data["current_upload_speed"],
+        'current_download_speed': network_data["current_download_speed"],
+        'upload_speed_formatted': format_bytes(network_data["current_upload_speed"]) + "/s",
+        'download_speed_formatted': format_bytes(network_data["current_download_speed"]) + "/s"
+    }
+    if snapshot:
+        payload['snapshot'] = True
+        payload['transfer_history'] = history.to_records(last=network_data["max_history_points"])
+    else:
+        payload['base_seq'] = history.total - new_samples
+        payload['samples'] = history.to_records(last=new_samples)
+    return payload
+
 def independent_network_monitor_thread():
     """Independent network monitoring thread that runs continuously"""
     global network_data, network_monitor_running
@@ -3108,34 +6573,19 @@ def independent_network_monitor_thread():
                     network_data["current_download_speed"] = download_speed
                     
                     # Add to history
-                    network_data["transfer_history"].append({
-                        "timestamp": current_time,
-                        "upload_speed": upload_speed,
-                        "download_speed": download_speed,
-                        "total_sent": current_stats["bytes_sent"],
-                        "total_recv": current_stats["bytes_recv"]
-                    })
-                    
-                    # Maintain history size
-                    if len(network_data["transfer_history"]) > network_data["max_history_points"]:
-                        network_data["transfer_history"].pop(0)
+                    network_data["transfer_history"].append(
+                        current_time, upload_speed, download_speed,
+                        current_stats["bytes_sent"], current_stats["bytes_recv"]
+                    )
+                    record_metric("upload_speed", upload_speed, current_time)
+                    record_metric("download_speed", download_speed, current_time)
                     
                     # Update totals
                     network_data["total_bytes_sent"] = current_stats["bytes_sent"]
                     network_data["total_bytes_recv"] = current_stats["bytes_recv"]
                     
-                    # Emit the network data to all connected clients
-                    socketio.emit('network_data', {
-                        'total_sent': network_data["total_bytes_sent"],
-                        'total_recv': network_data["total_bytes_recv"],
-                        'total_sent_formatted': format_bytes(network_data["total_bytes_sent"]),
-                        'total_recv_formatted': format_bytes(network_data["total_bytes_recv"]),
-                        'current_upload_speed': upload_speed,
-                        'current_download_speed': download_speed,
-                        'upload_speed_formatted': format_bytes(upload_speed) + "/s",
-                        'download_speed_formatted': format_bytes(download_speed) + "/s",
-                        'transfer_history': network_data["transfer_history"][-20:] if network_data["transfer_history"] else []
-                    })
+                    # Publish only the new sample; the broadcast bus sends it on the next tick
+                    broadcast_bus.publish('network_data', network_payload())
                     
                     # Update last measurement
                     network_data["last_measurement"] = {
@@ -3158,11 +6608,11 @@ def independent_internet_monitor_thread():
     
     while internet_monitor_running:
         try:
-            # Check internet connection
-            is_connected = internet_available()
+            # Refresh the shared connectivity verdict
+            state = check_internet()
             
             # Emit the internet status to all connected clients
-            socketio.emit('internet_status', {'status': is_connected})
+            broadcast_bus.publish('internet_status', {'status': bool(state["connected"]), 'confidence': state["confidence"]})
             
             # Wait for 5 seconds before the next check
             for _ in range(50):  # Check internet_monitor_running every 0.1 seconds
@@ -3173,47 +6623,829 @@ def independent_internet_monitor_thread():
             logger.error(f"Error in internet monitor thread: {e}")
             time.sleep(5)
 
+def parse_prometheus_text(lines, names):
+    """Parse Prometheus text exposition format, keeping only the given metric names
+
+    Args:
+        lines: Iterable of lines as bytes (e.g. response.iter_lines())
+        names: Metric names to keep
+
+    Returns:
+        dict: name -> list of (labels dict, value); lines of other metrics are
+        rejected by a prefix test before any splitting or decoding
+    """
+    prefixes = tuple(name.encode() for name in names)
+    wanted = set(names)
+    samples = {}
+    for line in lines:
+        if not line.startswith(prefixes):
+            continue  # Comments, other families and go_/process_ noise
+        line = line.decode('utf-8', errors='replace')
+        brace = line.find('{')
+        if brace >= 0:
+            name = line[:brace]
+            close = line.rfind('}')
+            labels = dict(PROMETHEUS_LABEL_PATTERN.findall(line, brace + 1, close))
+            fields = line[close + 1:].split()
+        else:
+            name, *fields = line.split()
+            labels = {}
+        if name not in wanted or not fields:
+            continue
+        try:
+            samples.setdefault(name, []).append((labels, float(fields[0])))
+        except ValueError:
+            continue
+    return samples
+
+def scrape_tunnel_metrics(address, timeout=2.0):
+    """Scrape cloudflared's metrics endpoint once and add a sample to tunnel_metrics
+
+    Counters become per-second rates against the previous scrape (a counter
+    that went down, after a tunnel restart, counts from zero).
+
+    Returns:
+        dict: The new sample, {field: value}
+    """
+    with tunnel_metrics_session.get(f"http://{address}/metrics", timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        samples = parse_prometheus_text(response.iter_lines(), [metric for _, metric, _ in TUNNEL_METRICS])
+    now = time.time()
+    
+    previous = tunnel_metrics["counters"]
+    counters = {}
+    values = {}
+    for field, metric, kind in TUNNEL_METRICS:
+        series = [value for _, value in samples.get(metric, ())]
+        if kind == "rate":
+            counters[metric] = total = sum(series)
+            if previous and metric in previous[1] and now > previous[0]:
+                before = previous[1][metric]
+                values[field] = (total - before if total >= before else total) / (now - previous[0])
+            else:
+                values[field] = 0.0
+        elif kind == "mean":
+            values[field] = sum(series) / len(series) if series else 0.0
+        else:
+            values[field] = sum(series)
+    
+    tunnel_metrics["counters"] = (now, counters)
+    tunnel_metrics["last"] = values
+    tunnel_metrics["history"].append(now, *(values[field] for field, _, _ in TUNNEL_METRICS))
+    return values
+
+def tunnel_metrics_payload(snapshot=False, new_samples=1):
+    """Build a tunnel_metrics event, a full snapshot or only the newest samples (see ping_payload)"""
+    history = tunnel_metrics["history"]
+    payload = {
+        'seq': history.total,
+        'last': tunnel_metrics["last"],
+        'error': tunnel_metrics["error"]
+    }
+    if snapshot:
+        payload['snapshot'] = True
+        payload['history'] = history.to_records(last=60)
+    else:
+        payload['base_seq'] = history.total - new_samples
+        payload['samples'] = history.to_records(last=new_samples) if new_samples else []
+    return payload
+
+def start_tunnel_metrics_scraper():
+    """Start the thread that scrapes cloudflared's metrics while the tunnel runs"""
+    global tunnel_metrics_running, tunnel_metrics_thread_instance
+    
+    if not tunnel_metrics_running:
+        tunnel_metrics_running = True
+        tunnel_metrics_thread_instance = threading.Thread(target=tunnel_metrics_thread)
+        tunnel_metrics_thread_instance.daemon = True
+        tunnel_metrics_thread_instance.start()
+        log("Cloudflared metrics scraper started", level="info")
+
+def tunnel_metrics_thread():
+    """Scrape cloudflared's metrics every TUNNEL_METRICS_INTERVAL seconds and publish them"""
+    while tunnel_metrics_running:
+        process = tunnel_process
+        address = getattr(process, "metrics_address", None)  # Per process: a promoted standby uses its own port
+        if address and process_alive(process):
+            try:
+                scrape_tunnel_metrics(address)
+                tunnel_metrics["scrapes"] += 1
+                tunnel_metrics["error"] = None
+                broadcast_bus.publish('tunnel_metrics', tunnel_metrics_payload())
+            except (requests.RequestException, OSError) as e:
+                # cloudflared opens the endpoint a moment after it starts: keep trying, and only
+                # publish the error when it changes so the dashboard shows the metrics as unavailable
+                tunnel_metrics["failures"] += 1
+                if tunnel_metrics["error"] != str(e):
+                    tunnel_metrics["error"] = str(e)
+                    broadcast_bus.publish('tunnel_metrics', tunnel_metrics_payload(new_samples=0))
+        else:
+            tunnel_metrics["counters"] = None  # Rates restart with the next tunnel
+        time.sleep(TUNNEL_METRICS_INTERVAL)
+
+def start_tunnel_manager():
+    """Start the thread that runs the additional tunnels of the "tunnels" setting"""
+    global tunnel_manager_running, tunnel_manager_thread_instance
+    
+    if not tunnel_manager_running:
+        tunnel_manager_running = True
+        tunnel_manager_thread_instance = threading.Thread(target=tunnel_manager_thread)
+        tunnel_manager_thread_instance.daemon = True
+        tunnel_manager_thread_instance.start()
+        log("Tunnel manager started", level="info")
+
+def tunnel_manager_thread():
+    """Reconcile the additional tunnels with the settings while the internet is up, stop them while it is down"""
+    while tunnel_manager_running:
+        config = load_config()
+        if internet_available():
+            tunnel_manager.reconcile(config)
+        else:
+            tunnel_manager.stop_all()
+        tunnel_manager.wait(config["check_interval"])
+    tunnel_manager.stop_all()
+
 # Socket.IO events
-@socketio.on('connect')
-def handle_connect():
-    """Handle client connection"""
-    # Send current tunnel status
-    current_status = 'running' if STATS["current_status"] == "Running" else 'stopped'
-    emit('tunnel_status', {'status': current_status})
+def snapshot_frame():
+    """Return the current value of every broadcast topic, as sent to newly connected clients"""
+    frame = {'tunnel_status': {'status': tunnel_supervisor.status}}
     
     if STATS["last_tunnel_url"]:
-        emit('tunnel_url', {'url': STATS["last_tunnel_url"]})
+        frame['tunnel_url'] = {'url': STATS["last_tunnel_url"]}
     
-    # Send current internet status
-    is_connected = internet_available()
-    emit('internet_status', {'status': is_connected})
+    # Use the cached internet status (never probe here, it would stall the connect)
+    state = get_connectivity_state()
+    if state["connected"] is not None:
+        frame['internet_status'] = {'status': state["connected"], 'confidence': state["confidence"]}
     
-    # Send current ping data if available
-    global ping_data
+    # Snapshots; later updates only carry new samples
     if ping_data["last_ping_time"] is not None:
-        # Calculate statistics
-        stats = calculate_ping_stats(ping_data["ping_history"])
-        
-        emit('ping_data', {
-            'last_ping_time': ping_data["last_ping_time"],
-            'ping_history': ping_data["ping_history"],
-            'stats': stats
-        })
+        frame['ping_data'] = ping_payload(snapshot=True)
     
-    # Send current network data if available
-    global network_data
     if network_data["total_bytes_sent"] > 0 or network_data["total_bytes_recv"] > 0:
-        emit('network_data', {
-            'total_sent': network_data["total_bytes_sent"],
-            'total_recv': network_data["total_bytes_recv"],
-            'total_sent_formatted': format_bytes(network_data["total_bytes_sent"]),
-            'total_recv_formatted': format_bytes(network_data["total_bytes_recv"]),
-            'current_upload_speed': network_data["current_upload_speed"],
-            'current_download_speed': network_data["current_download_speed"],
-            'upload_speed_formatted': format_bytes(network_data["current_upload_speed"]) + "/s",
-            'download_speed_formatted': format_bytes(network_data["current_download_speed"]) + "/s",
-            'transfer_history': network_data["transfer_history"][-20:] if network_data["transfer_history"] else []
-        })
+        frame['network_data'] = network_payload(snapshot=True)
+    
+    if tunnel_metrics["history"].total:
+        frame['tunnel_metrics'] = tunnel_metrics_payload(snapshot=True)
+    
+    if tunnel_manager.tunnels:
+        for snapshot in all_tunnel_snapshots():
+            frame[f"tunnel:{snapshot['name']}"] = snapshot
+    
+    recent = event_log.since()[0][-RECENT_EVENTS:]
+    if recent:
+        frame['events'] = {"base_seq": recent[0]["seq"], "samples": recent}
+    
+    return frame
+
+@socketio.on('connect')
+def handle_connect():
+    """Handle client connection (live updates start with subscribe_bus)"""
+
+@socketio.on('subscribe_bus')
+def handle_subscribe_bus(*args):
+    """Send the current state and register the client for 'bus' frames
+
+    Only the dashboard's live socket subscribes, since registered clients
+    must acknowledge every frame; other connections (e.g. the settings
+    page's log stream) are never counted as bus clients.
+    """
+    for topic, payload in snapshot_frame().items():
+        emit(topic, payload)
+    
+    broadcast_bus.add_client(request.sid)
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    """Handle client disconnection"""
+    broadcast_bus.remove_client(request.sid)
+    log_stream.unsubscribe(request.sid)
+
+@socketio.on('subscribe_logs')
+def handle_subscribe_logs(data):
+    """Start streaming log records to this client
+
+    Accepts the minimum level, an optional substring filter and the cursor
+    to resume from.
+    """
+    data = data or {}
+    try:
+        after = data.get('after')
+        cursor = log_stream.subscribe(
+            request.sid,
+            level=data.get('level') or 'debug',
+            query=data.get('query') or None,
+            after=int(after) if after is not None else None
+        )
+    except (TypeError, ValueError) as e:
+        return {'status': 'error', 'message': str(e)}
+    return {'status': 'success', 'cursor': cursor}
+
+@socketio.on('unsubscribe_logs')
+def handle_unsubscribe_logs(*args):
+    """Stop streaming log records to this client"""
+    log_stream.unsubscribe(request.sid)
+    return {'status': 'success'}
+
+@socketio.on('resync')
+def handle_resync(data):
+    """Send a fresh snapshot to a client that detected a gap in the update sequence"""
+    stream = (data or {}).get('stream')
+    if stream == 'ping':
+        emit('ping_data', ping_payload(snapshot=True))
+    elif stream == 'network':
+        emit('network_data', network_payload(snapshot=True))
+    elif stream == 'tunnel_metrics':
+        emit('tunnel_metrics', tunnel_metrics_payload(snapshot=True))
+
+# Persistent metric history
+def _history_partition_path(day):
+    """Return the SQLite file holding the samples of one day (YYYYMMDD)"""
+    return os.path.join(history_dir, f"metrics_{day}.db")
+
+def _open_history_db(path):
+    """Open (creating if needed) a history partition in WAL mode"""
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS samples (ts REAL NOT NULL, metric TEXT NOT NULL, value REAL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS samples_metric_ts ON samples (metric, ts)")
+    return conn
+
+def _open_rollup_db():
+    """Open (creating if needed) the rollup tier database in WAL mode"""
+    conn = sqlite3.connect(os.path.join(history_dir, "rollups.db"), timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS rollups ("
+        "metric TEXT NOT NULL, step INTEGER NOT NULL, bucket INTEGER NOT NULL, "
+        "count INTEGER NOT NULL, total INTEGER NOT NULL, sum REAL NOT NULL, min REAL, max REAL, "
+        "PRIMARY KEY (metric, step, bucket)) WITHOUT ROWID"
+    )
+    return conn
+
+def record_metric(metric, value, timestamp=None):
+    """Queue a sample for the history store; never blocks the caller
+
+    Args:
+        metric (str): One of HISTORY_METRICS
+        value (float or None): The sample, None for a failed probe
+        timestamp (float): Epoch seconds, defaults to now
+    """
+    try:
+        history_queue.put_nowait((timestamp or time.time(), metric, value))
+    except queue.Full:
+        history_stats["dropped"] += 1
+
+def _write_history_batch(batch, connections, rollup_conn):
+    """Insert a batch of samples into their day partitions and fold it into the rollup tiers"""
+    by_day = {}
+    rollups = {}
+    for sample in batch:
+        timestamp, metric, value = sample
+        day = time.strftime("%Y%m%d", time.localtime(timestamp))
+        by_day.setdefault(day, []).append(sample)
+        
+        # Aggregate the batch per tier bucket: [count, total, sum, min, max]
+        for step in ROLLUP_STEPS:
+            bucket = rollups.setdefault((metric, step, int(timestamp // step * step)), [0, 0, 0.0, None, None])
+            bucket[1] += 1
+            if value is not None:
+                bucket[0] += 1
+                bucket[2] += value
+                bucket[3] = value if bucket[3] is None else min(bucket[3], value)
+                bucket[4] = value if bucket[4] is None else max(bucket[4], value)
+    
+    for day, samples in by_day.items():
+        conn = connections.get(day)
+        if conn is None:
+            conn = connections[day] = _open_history_db(_history_partition_path(day))
+        with conn:
+            conn.executemany("INSERT INTO samples (ts, metric, value) VALUES (?, ?, ?)", samples)
+    
+    # Merge the batch into existing buckets, so partial buckets survive restarts
+    with rollup_conn:
+        rollup_conn.executemany(
+            "INSERT INTO rollups (metric, step, bucket, count, total, sum, min, max) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (metric, step, bucket) DO UPDATE SET "
+            "count = count + excluded.count, total = total + excluded.total, sum = sum + excluded.sum, "
+            "min = MIN(COALESCE(min, excluded.min), COALESCE(excluded.min, min)), "
+            "max = MAX(COALESCE(max, excluded.max), COALESCE(excluded.max, max))",
+            [key + tuple(values) for key, values in rollups.items()]
+        )
+    history_stats["written"] += len(batch)
+
+def cleanup_history(rollup_conn=None):
+    """Delete raw partitions older than the configured retention and expired rollup buckets"""
+    retention_days = load_config()["history_retention_days"]
+    cutoff = time.strftime("%Y%m%d", time.localtime(time.time() - retention_days * 86400))
+    for filename in os.listdir(history_dir):
+        match = re.match(r"metrics_(\d{8})\.db(-wal|-shm)?$", filename)
+        if match and match.group(1) < cutoff:
+            try:
+                os.remove(os.path.join(history_dir, filename))
+                log(f"Removed expired history partition: {filename}", level="debug")
+            except OSError as e:
+                logger.warning(f"Could not remove history partition {filename}: {e}")
+    
+    if rollup_conn is not None:
+        with rollup_conn:
+            for step, retention in HISTORY_TIERS[1:]:
+                rollup_conn.execute("DELETE FROM rollups WHERE step = ? AND bucket < ?", (step, time.time() - retention))
+
+def start_history_writer():
+    """Start the thread that batches samples into the history store"""
+    global history_writer_running, history_writer_thread_instance
+    
+    if not history_writer_running:
+        os.makedirs(history_dir, exist_ok=True)
+        history_writer_running = True
+        history_writer_thread_instance = threading.Thread(target=history_writer_thread)
+        history_writer_thread_instance.daemon = True
+        history_writer_thread_instance.start()
+        log("History writer started", level="info")
+
+def history_writer_thread():
+    """Write queued samples in batches, off the monitoring hot paths"""
+    connections = {}
+    rollup_conn = _open_rollup_db()
+    last_cleanup = 0
+    
+    while history_writer_running or not history_queue.empty():
+        batch = []
+        try:
+            # Wait for the first sample, then gather what else arrives within the flush interval
+            batch.append(history_queue.get(timeout=HISTORY_FLUSH_INTERVAL))
+            deadline = time.monotonic() + HISTORY_FLUSH_INTERVAL
+            while len(batch) < HISTORY_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.append(history_queue.get(timeout=remaining))
+        except queue.Empty:
+            pass
+        
+        try:
+            if batch:
+                _write_history_batch(batch, connections, rollup_conn)
+            
+            # Close partitions of previous days and apply retention once an hour
+            today = time.strftime("%Y%m%d")
+            for day in [day for day in connections if day < today]:
+                connections.pop(day).close()
+            if time.monotonic() - last_cleanup > 3600:
+                last_cleanup = time.monotonic()
+                cleanup_history(rollup_conn)
+        except Exception as e:
+            logger.error(f"Error in history writer thread: {e}")
+            time.sleep(1)
+    
+    for conn in connections.values():
+        conn.close()
+    rollup_conn.close()
+
+def _query_raw_history(metric, start, end, step, limit):
+    """Read raw samples from the day partitions, optionally aggregated into step buckets
+
+    A bucket can span two partitions (local days need not align with the
+    step); its rows are merged, so each bucket is returned once.
+    """
+    points = []
+    buckets = []  # [bucket, sum, min, max, count, total] while aggregating
+    first_day = time.strftime("%Y%m%d", time.localtime(max(start, 0)))
+    last_day = time.strftime("%Y%m%d", time.localtime(max(end, 0)))
+    days = sorted(
+        match.group(1) for match in (
+            re.match(r"metrics_(\d{8})\.db$", filename)
+            for filename in (os.listdir(history_dir) if os.path.isdir(history_dir) else [])
+        )
+        if match and first_day <= match.group(1) <= last_day
+    )
+    
+    for name in days:
+        path = _history_partition_path(name)
+        if len(points) >= limit or len(buckets) > limit:
+            break
+        conn = sqlite3.connect(f"file:{urllib.parse.quote(path)}?mode=ro", uri=True, timeout=5)
+        try:
+            if step:
+                # One extra row: the first may continue the previous partition's last bucket
+                rows = conn.execute(
+                    "SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, SUM(value), MIN(value), MAX(value), "
+                    "COUNT(value), COUNT(*) FROM samples WHERE metric = ? AND ts >= ? AND ts < ? "
+                    "GROUP BY bucket ORDER BY bucket LIMIT ?",
+                    (step, step, metric, start, end, limit - len(buckets) + 1)
+                )
+                for bucket, total_sum, low, high, count, total in rows:
+                    if buckets and buckets[-1][0] == bucket:
+                        merged = buckets[-1]
+                        merged[1] = (merged[1] or 0) + (total_sum or 0)
+                        merged[2] = min((value for value in (merged[2], low) if value is not None), default=None)
+                        merged[3] = max((value for value in (merged[3], high) if value is not None), default=None)
+                        merged[4] += count
+                        merged[5] += total
+                    else:
+                        buckets.append([bucket, total_sum, low, high, count, total])
+            else:
+                rows = conn.execute(
+                    "SELECT ts, value FROM samples WHERE metric = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+                    (metric, start, end, limit - len(points))
+                )
+                points.extend({"timestamp": ts, "value": value} for ts, value in rows)
+        finally:
+            conn.close()
+    
+    if step:
+        points = [{
+            "timestamp": bucket, "avg": total_sum / count if count else None, "min": low, "max": high,
+            "count": count, "loss": (total - count) / total if total else 0
+        } for bucket, total_sum, low, high, count, total in buckets[:limit]]
+    return points
+
+def _query_rollups(metric, tier_step, start, end, step, limit):
+    """Read buckets of one rollup tier, re-aggregated into step buckets"""
+    path = os.path.join(history_dir, "rollups.db")
+    if not os.path.exists(path):
+        return []
+    
+    conn = sqlite3.connect(f"file:{urllib.parse.quote(path)}?mode=ro", uri=True, timeout=5)
+    try:
+        rows = conn.execute(
+            "SELECT bucket / ? * ? AS b, SUM(sum), MIN(min), MAX(max), SUM(count), SUM(total) FROM rollups "
+            "WHERE metric = ? AND step = ? AND bucket >= ? AND bucket < ? GROUP BY b ORDER BY b LIMIT ?",
+            (step, step, metric, tier_step, int(start // tier_step * tier_step), end, limit)
+        )
+        return [{
+            "timestamp": bucket, "avg": total_sum / count if count else None, "min": low, "max": high,
+            "count": count, "loss": (total - count) / total if total else 0
+        } for bucket, total_sum, low, high, count, total in rows]
+    finally:
+        conn.close()
+
+def history_tiers(config=None):
+    """Return HISTORY_TIERS with the raw tier's retention taken from history_retention_days"""
+    retention_days = (config or load_config())["history_retention_days"]
+    return ((1, retention_days * 86400),) + HISTORY_TIERS[1:]
+
+def select_history_tier(start, end, step=None, config=None):
+    """Pick the history tier that still covers `start` and best fits the requested resolution
+
+    With a step, the coarsest tier not coarser than the step is used; otherwise
+    the finest tier that answers the range within HISTORY_MAX_POINTS points.
+    """
+    age = time.time() - start
+    tiers = history_tiers(config)
+    covering = [tier for tier, retention in tiers if age <= retention] or [tiers[-1][0]]
+    if step:
+        fitting = [tier for tier in covering if tier <= step]
+        return fitting[-1] if fitting else covering[0]
+    for tier in covering:
+        if (end - start) / tier <= HISTORY_MAX_POINTS:
+            return tier
+    return covering[-1]
+
+def query_history(metric, start, end, step=None, limit=HISTORY_MAX_POINTS):
+    """Read the history of a metric between two epoch timestamps from the best tier
+
+    Args:
+        metric (str): One of HISTORY_METRICS
+        start (float): Range start (epoch seconds)
+        end (float): Range end (epoch seconds)
+        step (int): If given, aggregate into buckets of this many seconds
+        limit (int): Maximum number of points returned
+
+    Returns:
+        dict: "tier" (bucket seconds of the source tier, 1 for raw samples),
+        "step" and "points": {"timestamp", "value"} raw points, or
+        {"timestamp", "avg", "min", "max", "count", "loss"} buckets
+    """
+    tier = select_history_tier(start, end, step)
+    if tier == 1:
+        points = _query_raw_history(metric, start, end, step, limit)
+    else:
+        step = max(step or tier, tier)
+        points = _query_rollups(metric, tier, start, end, step, limit)
+    return {"tier": tier, "step": step, "points": points}
+
+# Log search index
+def _log_tokens(text):
+    """Return the search tokens of a raw log record, ignoring its timestamp/level prefix"""
+    match = LOG_RECORD_PREFIX.match(text)
+    body = text[match.end():] if match else text
+    return set(LOG_TOKEN_PATTERN.findall(body.decode('utf-8', errors='replace').lower()))
+
+def _indexable_token(token):
+    """Whether a token goes into the postings table (and is looked up there)
+
+    Tokens with digits (counters, IDs, timestamps) are nearly unique per
+    record and would make up most of the index; searches for them scan the
+    blocks selected by the other words, time range and level instead. This
+    must hold for short ones too: query words match as prefixes, so "err12"
+    has to find records whose only match is the unindexed "err123456".
+    """
+    return not any(char.isdigit() for char in token)
+
+def _open_log_index():
+    """Open (creating if needed) the log search index in WAL mode
+
+    postings maps a token to the (segment, block) pairs whose records contain
+    it, so a search only inflates the blocks that can match; segments gives
+    each log segment a small integer key and records how far it is indexed
+    (last block and the number of its records).
+    """
+    conn = sqlite3.connect(log_index_path, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS postings ("
+        "token TEXT NOT NULL, segment INTEGER NOT NULL, block INTEGER NOT NULL, "
+        "PRIMARY KEY (token, segment, block)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS segments ("
+        "key INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, block INTEGER NOT NULL, records INTEGER NOT NULL)"
+    )
+    return conn
+
+def _log_index_progress(conn):
+    """Return {segment id: (key, last indexed block, records indexed in it)}"""
+    return {row[0]: (row[1], row[2], row[3]) for row in conn.execute("SELECT id, key, block, records FROM segments")}
+
+def _block_indexed(progress, segment, number):
+    """Whether every record of a block is in the postings table"""
+    if segment["id"] not in progress:
+        return False
+    _, done_block, done_records = progress[segment["id"]]
+    return number < done_block or (number == done_block and done_records >= sum(segment["blocks"][number]["levels"].values()))
+
+def update_log_index(conn):
+    """Index the records written since the last pass and forget deleted segments
+
+    Returns:
+        int: Number of records indexed
+    """
+    segments = log_writer.segments()
+    live = {segment["id"] for segment in segments}
+    progress = _log_index_progress(conn)
+    
+    for segment_id in set(progress) - live:
+        # Expired or cleared; its postings can never match again
+        conn.execute("DELETE FROM postings WHERE segment = ?", (progress[segment_id][0],))
+        conn.execute("DELETE FROM segments WHERE key = ?", (progress[segment_id][0],))
+    
+    indexed = 0
+    for segment in segments:
+        blocks = segment["blocks"]
+        if not blocks or _block_indexed(progress, segment, len(blocks) - 1):
+            continue
+        if segment["id"] in progress:
+            key, done_block, done_records = progress[segment["id"]]
+        else:
+            key = conn.execute("INSERT INTO segments (id, block, records) VALUES (?, 0, 0)", (segment["id"],)).lastrowid
+            done_block, done_records = 0, 0
+        
+        rows = []
+        position = (done_block, done_records)
+        try:
+            with open(segment["path"], 'rb') as f:
+                for number in range(done_block, len(blocks)):
+                    data = log_writer.read_block(segment, blocks[number], f)
+                    records = list(_split_log_records(data.splitlines(keepends=True)))
+                    skip = done_records if number == done_block else 0
+                    tokens = set()
+                    for _, _, text in records[skip:]:
+                        tokens |= _log_tokens(text)
+                    rows.extend((token, key, number) for token in tokens if _indexable_token(token))
+                    indexed += max(0, len(records) - skip)
+                    position = (number, len(records))
+        except (OSError, EOFError, gzip.BadGzipFile):
+            continue  # Rotated or compressed meanwhile; picked up under its new path next pass
+        
+        conn.executemany("INSERT OR IGNORE INTO postings (token, segment, block) VALUES (?, ?, ?)", rows)
+        conn.execute("UPDATE segments SET block = ?, records = ? WHERE key = ?", (*position, key))
+    conn.commit()
+    return indexed
+
+def start_log_indexer():
+    """Start the thread that keeps the log search index up to date"""
+    global log_indexer_running, log_indexer_thread_instance
+    
+    if not log_indexer_running:
+        log_indexer_running = True
+        log_indexer_thread_instance = threading.Thread(target=log_indexer_thread)
+        log_indexer_thread_instance.daemon = True
+        log_indexer_thread_instance.start()
+        log("Log search indexer started", level="info")
+
+def log_indexer_thread():
+    """Incrementally index new log records every LOG_INDEX_INTERVAL seconds"""
+    conn = _open_log_index()
+    while log_indexer_running:
+        try:
+            update_log_index(conn)
+        except Exception as e:
+            logger.error(f"Error in log indexer thread: {e}")
+        time.sleep(LOG_INDEX_INTERVAL)
+    conn.close()
+
+def search_logs(query="", levels=None, start=None, end=None, limit=100, cursor=None):
+    """Search the log segments, newest records first
+
+    A record matches when every word of the query is a prefix of one of its
+    words (case-insensitive). Candidate blocks come from the token index, so
+    only blocks that contain every indexed word (or are not indexed yet) are
+    read, and a block without the words as plain substrings is not split.
+
+    Args:
+        query (str): Words to look for; empty matches every record
+        levels (set): Log levels to include (see LOG_FILE_LEVELS); None for all
+        start (float): Range start (epoch seconds)
+        end (float): Range end (epoch seconds)
+        limit (int): Maximum number of results
+        cursor (str): next_cursor of the previous page
+
+    Returns:
+        dict: "results" ({"timestamp", "level", "segment", "text"}), "next_cursor"
+        (None on the last page) and "scanned_blocks"
+    """
+    words = sorted(set(LOG_TOKEN_PATTERN.findall(query.lower())))
+    if query and not words:
+        raise ValueError("The query needs a word of at least two letters or digits")
+    
+    after = None
+    if cursor:
+        try:
+            segment_id, block_number, ordinal = cursor.rsplit(":", 2)
+            after = (segment_id, int(block_number), int(ordinal))
+        except ValueError:
+            raise ValueError("Invalid cursor")
+    
+    segments = [segment for segment in log_writer.segments() if _overlaps(segment, start, end)]
+    candidates = None
+    progress = {}
+    indexed_words = [word for word in words if _indexable_token(word)]
+    if indexed_words:
+        conn = _open_log_index()
+        try:
+            progress = _log_index_progress(conn)
+            keys = {key: segment_id for segment_id, (key, _, _) in progress.items()}
+            for word in indexed_words:
+                # Prefix range scan on the primary key; every token is [a-z0-9], all below "~"
+                blocks = {(keys.get(key), block) for key, block in conn.execute(
+                    "SELECT segment, block FROM postings WHERE token >= ? AND token < ?", (word, word + "~")
+                )}
+                candidates = blocks if candidates is None else candidates & blocks
+        finally:
+            conn.close()
+    encoded_words = [word.encode() for word in words]
+    
+    results = []
+    scanned = 0
+    more = False
+    started = after is None
+    for segment in reversed(segments):
+        if not started and segment["id"] != after[0]:
+            continue
+        if levels and not any(segment["levels"].get(level) for level in levels):
+            if after and segment["id"] == after[0]:
+                started = True
+            continue
+        try:
+            with open(segment["path"], 'rb') as f:
+                for number in range(len(segment["blocks"]) - 1, -1, -1):
+                    block = segment["blocks"][number]
+                    if not started:
+                        if number > after[1]:
+                            continue
+                        started = True
+                    if not _overlaps(block, start, end):
+                        continue
+                    if levels and not any(block["levels"].get(level) for level in levels):
+                        continue
+                    if (candidates is not None and (segment["id"], number) not in candidates
+                            and _block_indexed(progress, segment, number)):
+                        continue
+                    
+                    scanned += 1
+                    data = log_writer.read_block(segment, block, f)
+                    lowered = data.lower()
+                    if not all(word in lowered for word in encoded_words):
+                        continue
+                    records = list(_split_log_records(data.splitlines(keepends=True)))
+                    for ordinal in range(len(records) - 1, -1, -1):
+                        if after and (segment["id"], number) == after[:2] and ordinal >= after[2]:
+                            continue
+                        ts, level, text = records[ordinal]
+                        if ts is not None and ((start is not None and ts < start) or (end is not None and ts > end)):
+                            continue
+                        if levels and level not in levels:
+                            continue
+                        if words:
+                            lowered = text.lower()
+                            if not all(word in lowered for word in encoded_words):
+                                continue
+                            tokens = _log_tokens(text)
+                            if not all(any(token.startswith(word) for token in tokens) for word in words):
+                                continue
+                        if len(results) == limit:
+                            more = True
+                            break
+                        results.append({
+                            "timestamp": ts,
+                            "level": level,
+                            "segment": segment["file"],
+                            "text": text.decode('utf-8', errors='replace').rstrip("\n"),
+                            "position": f"{segment['id']}:{number}:{ordinal}"
+                        })
+                    if more:
+                        break
+        except (OSError, EOFError, gzip.BadGzipFile):
+            continue
+        if more:
+            break
+    
+    next_cursor = results[-1]["position"] if more else None
+    for result in results:
+        del result["position"]
+    return {"results": results, "next_cursor": next_cursor, "scanned_blocks": scanned}
+
+# Log export
+LOG_EXPORT_CHUNK_BYTES = 64 * 1024
+LOG_EXPORT_FORMATS = ("text", "jsonl")
+
+def export_logs(fmt="text", start=None, end=None, levels=None):
+    """Yield the log segments as chunks of roughly LOG_EXPORT_CHUNK_BYTES, oldest first
+
+    Only one index block is held in memory at a time, whatever the size of
+    the log set. Blocks that lie entirely inside the time range and level
+    filter are passed through as-is in text format; others are split into
+    records and filtered.
+
+    Args:
+        fmt (str): "text" (the log file lines) or "jsonl" (one JSON object per record)
+        start (float): Range start (epoch seconds)
+        end (float): Range end (epoch seconds)
+        levels (set): Log levels to include (see LOG_FILE_LEVELS); None for all
+    """
+    pending, size = [], 0
+    current_segment = None
+    for segment, block, data in log_writer.read_blocks(start, end, levels):
+        whole = ((start is None or (block["start"] is not None and block["start"] >= start))
+                 and (end is None or (block["end"] is not None and block["end"] <= end))
+                 and (not levels or set(block["levels"]) <= levels))
+        
+        if fmt == "text":
+            if segment["file"] != current_segment:
+                header = f"=== {segment['file']} ===\n".encode('utf-8')
+                if current_segment is not None:
+                    header = b"\n" + header
+                current_segment = segment["file"]
+                pending.append(header)
+                size += len(header)
+            if whole:
+                pending.append(data)
+                size += len(data)
+            else:
+                for ts, level, text in _split_log_records(data.splitlines(keepends=True)):
+                    if ts is not None and ((start is not None and ts < start) or (end is not None and ts > end)):
+                        continue
+                    if levels and level not in levels:
+                        continue
+                    pending.append(text)
+                    size += len(text)
+        else:
+            for ts, level, text in _split_log_records(data.splitlines(keepends=True)):
+                if ts is not None and ((start is not None and ts < start) or (end is not None and ts > end)):
+                    continue
+                if levels and level not in levels:
+                    continue
+                match = LOG_RECORD_PREFIX.match(text)
+                line = json.dumps({
+                    "timestamp": ts,
+                    "level": level,
+                    "message": text[match.end() if match else 0:].decode('utf-8', errors='replace').rstrip("\n"),
+                    "segment": segment["file"]
+                }) + "\n"
+                encoded = line.encode('utf-8')
+                pending.append(encoded)
+                size += len(encoded)
+        
+        if size >= LOG_EXPORT_CHUNK_BYTES:
+            yield b"".join(pending)
+            pending, size = [], 0
+    
+    if pending:
+        yield b"".join(pending)
+
+def _gzip_chunks(chunks):
+    """Compress a stream of byte chunks into one gzip stream on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
 
 # Main function
 def main():
@@ -3222,11 +7454,21 @@ def main():
         # Load configuration
         config = load_config()
         
+        # Compress log segments left by earlier runs
+        log_writer.compress_leftovers()
+        
+        # Pick the ping engine before any monitor starts probing
+        select_ping_backend(config.get("ping_backend", "auto"))
+        
         # Start independent monitoring threads
         start_independent_ping_monitor()
         start_independent_internet_monitor()
         start_independent_network_monitor()
-        start_independent_status_monitor()
+        start_history_writer()
+        start_log_indexer()
+        start_tunnel_metrics_scraper()
+        start_tunnel_manager()
+        start_broadcast_bus()
         
         # Get available port
         port = 5000
@@ -3263,11 +7505,15 @@ def main():
     except KeyboardInterrupt:
         log("Shutting down...", level="warning")
         # Stop independent monitors
-        global ping_monitor_running, internet_monitor_running, network_monitor_running, status_monitor_running
+        global ping_monitor_running, internet_monitor_running, network_monitor_running, broadcast_bus_running, history_writer_running, log_indexer_running, tunnel_metrics_running, tunnel_manager_running
         ping_monitor_running = False
+        tunnel_metrics_running = False
+        tunnel_manager_running = False
+        broadcast_bus_running = False
+        history_writer_running = False
+        log_indexer_running = False
         internet_monitor_running = False
         network_monitor_running = False
-        status_monitor_running = False
     except Exception as e:
         log(f"Error: {e}", level="error")
     finally:
@@ -0,0 +1,49 @@
+"""Shared fixtures for the tunnel monitor tests"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Log segments, the event log and the search index written by app go to a scratch directory, not the repository
+os.environ.setdefault("TUNNEL_MONITOR_LOGS_DIR", tempfile.mkdtemp(prefix="tunnel-monitor-logs-"))
+
+import app  # noqa: E402
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: long-running benchmark, only run when RUN_SLOW_TESTS=1")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("RUN_SLOW_TESTS"):
+        return
+    skip = pytest.mark.skip(reason="slow benchmark (set RUN_SLOW_TESTS=1 to run)")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Load and save the configuration in tmp_path; tunnel URLs are stored there too"""
+    monkeypatch.setattr(app, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "_config_cache", {"config": None, "signature": None})
+    monkeypatch.setattr(app, "tunnel_url_store", app.TunnelUrlStore(str(tmp_path / "history" / "tunnel_urls.db")))
+    config = app.load_config()
+    config["tunnel_urls_save_directory"] = str(tmp_path)
+    app.save_config(config)
+    return app.load_config()
+
+
+@pytest.fixture
+def fake_cloudflared(tmp_path):
+    """Path of an executable that behaves like cloudflared (see fake_cloudflared.py)"""
+    if os.name == "nt":
+        pytest.skip("the fake cloudflared wrapper is a POSIX shell script")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_cloudflared.py")
+    path = tmp_path / "cloudflared"
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+    path.chmod(0o755)
+    return str(path)
+
@@ -0,0 +1,44 @@
+"""Stand-in for cloudflared, started as `fake_cloudflared.py tunnel --url <local url>`
+
+Prints a quick tunnel URL and an edge registration in cloudflared's log
+format, then idles until it is killed or told to crash:
+
+    FAKE_CLOUDFLARED_CRASH_FILE  exit as soon as this file exists
+    FAKE_CLOUDFLARED_EXIT_AFTER  exit after this many seconds
+    FAKE_CLOUDFLARED_EXIT_CODE   exit code used for either (default 1)
+    FAKE_CLOUDFLARED_DELAY       seconds to wait before printing the URL
+"""
+import os
+import sys
+import time
+
+
+def log(message):
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    sys.stdout.write(f"{timestamp} INF {message}\n")
+    sys.stdout.flush()
+
+
+def main():
+    crash_file = os.environ.get("FAKE_CLOUDFLARED_CRASH_FILE")
+    exit_after = float(os.environ.get("FAKE_CLOUDFLARED_EXIT_AFTER", "0")) or None
+    exit_code = int(os.environ.get("FAKE_CLOUDFLARED_EXIT_CODE", "1"))
+    started = time.monotonic()
+
+    time.sleep(float(os.environ.get("FAKE_CLOUDFLARED_DELAY", "0")))
+    log("Requesting new quick Tunnel on trycloudflare.com...")
+    log("+----------------------------+")
+    log(f"|  https://fake-{os.getpid()}.trycloudflare.com  |")
+    log("+----------------------------+")
+    log(f"Registered tunnel connection connIndex=0 connection=fake-{os.getpid()} location=test protocol=quic")
+
+    while True:
+        if crash_file and os.path.exists(crash_file):
+            return exit_code
+        if exit_after and time.monotonic() - started >= exit_after:
+            return exit_code
+        time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""Helpers shared by the tests"""
+import time
+
+import pytest
+
+
+def wait_for(condition, timeout=10.0, interval=0.005):
+    """Poll condition() until it is true; fails the test after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail(f"Timed out after {timeout}s waiting for {condition}")
+        time.sleep(interval)
@@ -0,0 +1,143 @@
+"""Delta-only live updates over the broadcast bus, and their bandwidth benchmark"""
+import json
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    """A fresh broadcast bus with empty ping and network histories; emits are recorded, not sent"""
+    bus = app.BroadcastBus()
+    monkeypatch.setattr(app, "broadcast_bus", bus)
+    monkeypatch.setattr(app, "record_metric", lambda *args, **kwargs: None)
+    monkeypatch.setattr(app, "ping_data", dict(
+        app.ping_data, last_ping_time=None, targets={}, published_seq=0,
+        ping_history=app.TimeSeriesRing(3600, ("ping_time",)), rolling_stats=app.RollingStats(60)
+    ))
+    monkeypatch.setattr(app, "network_data", dict(
+        app.network_data, total_bytes_sent=0, total_bytes_recv=0,
+        transfer_history=app.TimeSeriesRing(1800, ("upload_speed", "download_speed", "total_sent", "total_recv"))
+    ))
+
+    bus.sent = []  # (sid, bytes)
+    bus.acking = set()  # Clients that acknowledge every frame
+
+    original_emit = app.socketio.emit
+
+    def emit(event, data, to=None, callback=None, **kwargs):
+        if event != 'bus':
+            return original_emit(event, data, to=to, callback=callback, **kwargs)
+        bus.sent.append((to, len(data)))
+        if callback and to in bus.acking:
+            callback()
+    monkeypatch.setattr(app.socketio, "emit", emit)
+    return bus
+
+
+def _network_sample(second):
+    app.network_data["transfer_history"].append(time.time(), 1000.0 + second, 2000.0, 1e6 + second, 2e6)
+    app.network_data["total_bytes_sent"] += 1000
+    app.broadcast_bus.publish('network_data', app.network_payload())
+
+
+def test_updates_carry_only_new_samples_with_sequence_numbers(bus):
+    app._record_ping(10.0)
+    app._record_ping(11.0)
+    payload = bus.pending['ping_data']
+    assert payload['base_seq'] == 0
+    assert payload['seq'] == 2
+    assert [sample['ping_time'] for sample in payload['samples']] == [10.0, 11.0]
+
+    bus.flush()
+    app._record_ping(12.0)
+    assert bus.pending['ping_data']['base_seq'] == 2
+    assert len(bus.pending['ping_data']['samples']) == 1
+
+
+def test_slow_client_gets_a_snapshot_instead_of_a_queue(bus):
+    bus.add_client("slow")
+    for second in range(bus.max_in_flight + 3):
+        app._record_ping(float(second))
+        bus.flush()
+    stats = bus.stats()["clients"]["slow"]
+    assert stats["queue_depth"] == bus.max_in_flight
+    assert stats["dropped"] == 3
+
+    # Once it catches up it gets one snapshot frame, not the dropped deltas
+    for _ in range(bus.max_in_flight):
+        bus._ack("slow")
+    bus.sent.clear()
+    bus.flush()
+    assert len(bus.sent) == 1
+    assert bus.stats()["clients"]["slow"]["dropped"] == 3
+
+
+def test_lost_acks_expire_and_the_client_resyncs(bus):
+    bus.add_client("lossy")  # Never acknowledges
+    for second in range(bus.max_in_flight + 2):
+        app._record_ping(float(second))
+        bus.flush()
+    assert bus.stats()["clients"]["lossy"]["queue_depth"] == bus.max_in_flight
+
+    # Without acks the client would be skipped forever; stale frames expire after ack_timeout
+    in_flight = bus.clients["lossy"]["in_flight"]
+    for index in range(len(in_flight)):
+        in_flight[index] -= bus.ack_timeout + 1
+    bus.sent.clear()
+    bus.flush()
+    stats = bus.stats()["clients"]["lossy"]
+    assert stats["expired"] == bus.max_in_flight
+    assert stats["queue_depth"] == 1
+    (sid, size), = bus.sent
+    assert size > 0  # The snapshot frame
+
+
+@pytest.mark.parametrize("clients", [1, 50, 500])
+def test_benchmark_bytes_per_second(bus, clients):
+    """Bytes/s per client and flush CPU for one ping per second and a network sample every 2 s"""
+    for number in range(clients):
+        bus.add_client(f"client-{number}")
+        bus.acking.add(f"client-{number}")
+    # Warm up: fill the client windows (60 pings, 20 network samples)
+    for second in range(60):
+        app._record_ping(20.0 + second % 7)
+        if second % 2 == 0:
+            _network_sample(second)
+    bus.flush()
+    bus.sent.clear()
+
+    seconds = 60
+    cpu = 0.0
+    for second in range(seconds):
+        app._record_ping(20.0 + second % 7)
+        if second % 2 == 0:
+            _network_sample(second)
+        started = time.process_time()
+        bus.flush()
+        cpu += time.process_time() - started
+
+    delta_rate = sum(size for _, size in bus.sent) / seconds / clients
+    # What the full-history protocol sent every second: the whole ping window, plus half a network window
+    full_rate = (len(json.dumps(app.ping_payload(snapshot=True)))
+                 + len(json.dumps(app.network_payload(snapshot=True))) / 2)
+    print(f"\n{clients:>4} clients: {delta_rate:7.0f} B/s per client ({delta_rate * clients / 1024:8.1f} KiB/s total), "
+          f"full history {full_rate:7.0f} B/s per client, flush CPU {cpu / seconds * 1000:.2f} ms/s")
+
+    assert len(bus.sent) == seconds * clients
+    assert delta_rate * 3 < full_rate
+
+
+def test_only_subscribed_sockets_become_bus_clients(bus):
+    client = app.socketio.test_client(app.app)
+    assert client.is_connected()
+    assert not bus.clients  # e.g. the settings page's socket, which never acknowledges frames
+
+    client.emit('subscribe_bus')
+    assert len(bus.clients) == 1
+    assert 'tunnel_status' in {message['name'] for message in client.get_received()}
+
+    client.disconnect()
+    assert not bus.clients
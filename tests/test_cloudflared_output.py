@@ -0,0 +1,127 @@
+"""cloudflared output parsing and a replay benchmark of a large captured stdout"""
+import io
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import app
+
+CAPTURE_HEAD = b"""2026-10-17T08:00:00Z INF Thank you for trying Cloudflare Tunnel.
+2026-10-17T08:00:00Z INF Requesting new quick Tunnel on trycloudflare.com...
+2026-10-17T08:00:01Z INF +--------------------------------------------------------------------------------------------+
+2026-10-17T08:00:01Z INF |  Your quick Tunnel has been created! Visit it at (it may take some time to be reachable):  |
+2026-10-17T08:00:01Z INF |  https://blue-river-sample-test.trycloudflare.com                                          |
+2026-10-17T08:00:01Z INF +--------------------------------------------------------------------------------------------+
+2026-10-17T08:00:02Z INF Registered tunnel connection connIndex=0 connection=5f0c event=0 ip=198.41.192.7 location=ams08 protocol=quic
+"""
+
+CAPTURE_LOOP = [
+    b"2026-10-17T08:01:%02dZ DBG GET https://blue-river-sample-test.trycloudflare.com/api/status HTTP/1.1 connIndex=0 originService=http://localhost:8080",
+    b"2026-10-17T08:01:%02dZ DBG 200 OK connIndex=0 content-length=512 originService=http://localhost:8080",
+    b"2026-10-17T08:01:%02dZ WRN Connection terminated error=\"timeout: no recent network activity\" connIndex=1",
+    b"2026-10-17T08:01:%02dZ INF Retrying connection in up to 2s connIndex=1",
+    b"2026-10-17T08:01:%02dZ INF Registered tunnel connection connIndex=1 connection=9d1e event=0 ip=198.41.200.33 location=fra06 protocol=quic",
+    b"2026-10-17T08:01:%02dZ ERR Request failed error=\"Incoming request ended abruptly: context canceled\" connIndex=0",
+    b"plain unstructured line from a library",
+]
+
+
+def _capture(lines):
+    """A captured stdout of about `lines` lines: the startup banner, then a reconnect storm under debug logging"""
+    body = [CAPTURE_LOOP[number % len(CAPTURE_LOOP)].replace(b"%02d", b"%02d" % (number % 60))
+            for number in range(lines)]
+    return CAPTURE_HEAD + b"\n".join(body) + b"\n"
+
+
+def test_lines_become_typed_events():
+    output = app.CloudflaredOutput(io.BytesIO(_capture(7)))
+    batches = []
+    output.subscribe(batches.append)
+    output.run()
+    events = [event for batch in batches for event in batch]
+    by_type = {}
+    for event in events:
+        by_type.setdefault(event["type"], []).append(event)
+
+    assert output.url == "https://blue-river-sample-test.trycloudflare.com"
+    assert [event["url"] for event in by_type["url"]] == [output.url]
+    assert len(by_type["registered"]) == 2
+    assert len(by_type["lost"]) == 2
+    assert by_type["registered"][0]["level"] == "info"
+    assert by_type["lost"][0]["level"] == "warning"
+    unstructured = events[-1]
+    assert unstructured["type"] == "output"
+    assert unstructured["level"] is None
+    assert unstructured["message"] == "plain unstructured line from a library"
+
+
+def test_url_matcher_switches_off_after_the_first_url():
+    data = (b"2026-10-17T08:00:01Z INF |  https://first-one.trycloudflare.com  |\n"
+            b"2026-10-17T08:00:02Z INF |  https://second-one.trycloudflare.com  |\n")
+    output = app.CloudflaredOutput(io.BytesIO(data))
+    batches = []
+    output.subscribe(batches.append)
+    output.run()
+    assert output.url == "https://first-one.trycloudflare.com"
+    assert [event["type"] for event in batches[0]] == ["url", "output"]
+
+
+def test_lines_split_across_chunks_are_reassembled():
+    data = _capture(1000)
+    expected = [line.decode() for line in data.splitlines()]
+    output = app.CloudflaredOutput(io.BytesIO(data), chunk_size=97)
+    messages = []
+    output.subscribe(lambda events: messages.extend(event["message"] for event in events))
+    output.run()
+    assert len(messages) == len(expected)
+    assert messages == expected
+
+
+def test_subscribers_log_lines_and_emit_connection_events(monkeypatch):
+    logged, emitted = [], []
+    monkeypatch.setattr(app, "log", lambda message, level="info": logged.append((level, message)))
+    monkeypatch.setattr(app, "emit_event", lambda event_type, level=None, **fields: emitted.append(fields["state"]))
+    monkeypatch.setattr(app, "CLOUDFLARED_LOG_BURST", 5)
+    monkeypatch.setattr(app, "CLOUDFLARED_LOG_RATE", 0.001)  # No refill during the test
+    output = app.CloudflaredOutput(io.BytesIO(_capture(14)))
+    process = SimpleNamespace(pid=1, tunnel_url=None, registered=False, ready=threading.Event())
+    app.subscribe_tunnel_output(output, process, dict(app.DEFAULT_CONFIG, debug_mode=False))
+    output.run()
+
+    # Connection changes are typed events, never rate limited; other lines only reach the log, up to the burst
+    assert emitted.count("registered") == 3 and emitted.count("lost") == 4
+    assert len(logged) == 5
+    assert all(message.startswith("Cloudflared: ") and level == "info" for level, message in logged)
+    assert process.ready.is_set()
+
+
+@pytest.mark.slow
+def test_benchmark_replay_captured_stdout(tmp_path, monkeypatch):
+    """Replay 200k captured lines through the tunnel's real subscribers and report the throughput"""
+    monkeypatch.setattr(app, "event_log", app.EventLog(str(tmp_path)))
+    bus = app.BroadcastBus()
+    monkeypatch.setattr(app, "broadcast_bus", bus)
+    data = _capture(200000)
+    output = app.CloudflaredOutput(io.BytesIO(data))
+    process = SimpleNamespace(pid=1, tunnel_url=None, registered=False, ready=threading.Event())
+    app.subscribe_tunnel_output(output, process, dict(app.DEFAULT_CONFIG, debug_mode=True))
+    counts = {}
+
+    def count(events):
+        for event in events:
+            counts[event["type"]] = counts.get(event["type"], 0) + 1
+        bus.flush()  # The broadcast thread's tick, so published events do not pile up
+    output.subscribe(count)
+
+    started = time.perf_counter()
+    output.run()
+    elapsed = time.perf_counter() - started
+
+    lines = sum(counts.values())
+    print(f"\nreplayed {lines} lines ({len(data) / 2**20:.1f} MiB) in {elapsed:.2f}s: "
+          f"{lines / elapsed:,.0f} lines/s, {len(data) / 2**20 / elapsed:.1f} MiB/s, {counts}")
+    assert lines == data.count(b"\n")
+    assert process.tunnel_url == "https://blue-river-sample-test.trycloudflare.com"
+    assert process.ready.is_set()
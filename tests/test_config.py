@@ -0,0 +1,69 @@
+"""Configuration cache: isolation, change detection and its benchmark"""
+import json
+import os
+import time
+
+import app
+
+
+def test_callers_get_independent_copies(config):
+    first = app.load_config()
+    first["tunnels"].append({"name": "web", "url": "http://localhost:8081"})
+    first["check_interval"] = 999
+    assert app.load_config()["tunnels"] == []
+    assert app.load_config()["check_interval"] == config["check_interval"]
+    assert app.reset_config()["tunnels"] is not app.DEFAULT_CONFIG["tunnels"]
+
+
+def test_external_edits_are_picked_up_and_announced(config, monkeypatch):
+    changes = []
+    monkeypatch.setattr(app, "config_listeners", [lambda new, changed: changes.append((new, changed))])
+    path = os.path.join(app.BASE_DIR, app.config_file)
+    edited = dict(config, check_interval=config["check_interval"] + 5, retry_delay=12345)
+    with open(path, "w") as f:
+        json.dump(edited, f, indent=2)  # Different size, so the (mtime, size) signature changes
+
+    assert app.load_config()["check_interval"] == config["check_interval"] + 5
+    assert len(changes) == 1
+    assert set(changes[0][1]) == {"check_interval", "retry_delay"}
+
+
+def test_invalid_values_fall_back_to_defaults(config):
+    validated = app.validate_config(dict(config, check_interval="soon", tunnels="web"))
+    assert validated["check_interval"] == app.DEFAULT_CONFIG["check_interval"]
+    assert validated["tunnels"] == []
+
+
+def test_saving_wakes_the_monitor_loop(config):
+    app.tunnel_supervisor.wakeup.clear()
+    app.save_config(dict(config, check_interval=config["check_interval"] + 1))
+    assert app.tunnel_supervisor.wait(0)
+
+
+def test_benchmark_cached_load_against_reading_the_file(config):
+    """Per-call cost of load_config() versus the read-parse-validate it replaces"""
+    path = os.path.join(app.BASE_DIR, app.config_file)
+    calls = 2000
+
+    def uncached():
+        with open(path) as f:
+            return app.validate_config(json.load(f))
+
+    for name, load in (("file", uncached), ("cached", app.load_config)):
+        load()
+        started = time.perf_counter()
+        for _ in range(calls):
+            load()
+        elapsed = (time.perf_counter() - started) / calls
+        print(f"\n{name:<7} {elapsed * 1e6:8.1f} us per load_config()", end="")
+        if name == "file":
+            file_cost = elapsed
+    print()
+    assert elapsed * 3 < file_cost
+
+    client = app.app.test_client()
+    client.get('/api/settings')
+    started = time.perf_counter()
+    for _ in range(200):
+        client.get('/api/settings')
+    print(f"GET /api/settings {(time.perf_counter() - started) / 200 * 1e6:.0f} us per request")
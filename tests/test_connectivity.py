@@ -0,0 +1,59 @@
+"""Shared connectivity verdict: one in-flight probe, and callers that never block"""
+import threading
+import time
+
+import pytest
+
+import app
+from tests.support import wait_for
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    """_probe_internet blocks until release is set; calls counts the probes"""
+    state = {"calls": 0, "result": True, "release": threading.Event()}
+
+    def probe_internet():
+        state["calls"] += 1
+        state["release"].wait(5)
+        return state["result"]
+
+    monkeypatch.setattr(app, "_probe_internet", probe_internet)
+    monkeypatch.setattr(app, "_recent_probe_success", lambda max_age: False)
+    monkeypatch.setattr(app, "emit_event", lambda *args, **kwargs: None)
+    monkeypatch.setattr(app, "_connectivity_probe", None)
+    monkeypatch.setattr(app, "connectivity", {
+        "connected": None, "checked_at": None, "last_check": None, "streak": 0, "lost_at": None
+    })
+    return state
+
+
+def test_no_wait_returns_the_cached_state_and_probes_in_the_background(probe):
+    started = time.monotonic()
+    state = app.check_internet(wait=False)
+    assert time.monotonic() - started < 0.5
+    assert state["connected"] is None
+    wait_for(lambda: probe["calls"] == 1)
+
+    # A second caller neither waits nor starts another probe
+    assert app.check_internet(wait=False)["connected"] is None
+    probe["release"].set()
+    wait_for(lambda: app.get_connectivity_state()["connected"] is True)
+    assert probe["calls"] == 1
+
+    # Fresh verdicts are served from the cache
+    assert app.check_internet(wait=False)["connected"] is True
+    assert probe["calls"] == 1
+
+
+def test_waiting_callers_share_one_probe(probe):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(app.check_internet()["connected"])) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: probe["calls"] == 1)
+    probe["release"].set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [True] * 10
+    assert probe["calls"] == 1
@@ -0,0 +1,66 @@
+"""Tunnel and connectivity statistics computed from the stored events"""
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+import app
+
+DAY = time.time() - 3600  # Every event below falls on the same, already written, day
+
+
+@pytest.fixture
+def events(tmp_path, monkeypatch):
+    """Write events with controlled timestamps to an event log in tmp_path"""
+    monkeypatch.setattr(app, "event_log", app.EventLog(str(tmp_path)))
+
+    def write(*events):
+        path = tmp_path / f"events_{datetime.fromtimestamp(DAY).strftime('%Y%m%d')}.jsonl"
+        with open(path, "a", encoding="utf-8") as f:
+            for offset, event_type, fields in events:
+                f.write(json.dumps(dict(fields, type=event_type, ts=DAY + offset, mono=offset), separators=(",", ":")) + "\n")
+    return write
+
+
+def test_counts_and_urls(events):
+    events(
+        (0, "tunnel_started", {"role": "active"}),
+        (1, "tunnel_url", {"url": "https://a.trycloudflare.com"}),
+        (5, "tunnel_started", {"role": "active"}),
+        (6, "tunnel_url", {"url": "https://b.trycloudflare.com"}),
+    )
+    summary = app.summarize_events(DAY - 10, DAY + 10)
+    assert summary["counts"] == {"tunnel_started": 2, "tunnel_url": 2}
+    assert summary["tunnel_starts"] == 2
+    assert summary["outages"] == 0
+    assert summary["downtime_seconds"] == 0
+    assert summary["tunnel_urls"] == [
+        {"url": "https://a.trycloudflare.com", "ts": DAY + 1},
+        {"url": "https://b.trycloudflare.com", "ts": DAY + 6},
+    ]
+
+
+def test_downtime_comes_from_the_restored_event(events):
+    # The recorded downtime (monotonic) wins over the wall-clock difference, which a clock change can skew
+    events((0, "internet_lost", {}), (100, "internet_restored", {"downtime": 42.5}))
+    summary = app.summarize_events(DAY - 10, DAY + 200)
+    assert summary["outages"] == 1
+    assert summary["downtime_seconds"] == 42.5
+
+
+def test_legacy_restored_event_without_downtime(events):
+    events((0, "internet_lost", {}), (30, "internet_restored", {"downtime": None}))
+    assert app.summarize_events(DAY - 10, DAY + 200)["downtime_seconds"] == 30
+
+
+def test_outage_in_progress_counts_up_to_the_end(events):
+    events((0, "internet_lost", {}), (10, "internet_restored", {"downtime": 10}), (50, "internet_lost", {}))
+    summary = app.summarize_events(DAY - 10, DAY + 80)
+    assert summary["outages"] == 2
+    assert summary["downtime_seconds"] == 40
+
+
+def test_window_excludes_events_outside_it(events):
+    events((0, "tunnel_started", {}), (100, "tunnel_started", {}))
+    assert app.summarize_events(DAY + 50, DAY + 200)["counts"] == {"tunnel_started": 1}
@@ -0,0 +1,111 @@
+"""Persistent metric history: day partitions, step aggregation and rollup tiers"""
+import time
+from datetime import datetime
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """Write samples ((ts, metric, value), ...) to a history store in tmp_path"""
+    monkeypatch.setattr(app, "history_dir", str(tmp_path))
+    connections = {}
+    rollup_conn = app._open_rollup_db()
+
+    def write(samples):
+        app._write_history_batch(list(samples), connections, rollup_conn)
+    write.rollup_conn = rollup_conn
+    yield write
+    for conn in connections.values():
+        conn.close()
+    rollup_conn.close()
+
+
+def _midnight_step():
+    """Today's local midnight, and a step whose buckets do not start at it"""
+    midnight = time.mktime(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timetuple())
+    return midnight, next(step for step in (7, 11, 13) if midnight % step)
+
+
+def test_bucket_spanning_two_partitions_is_returned_once(history, tmp_path):
+    midnight, step = _midnight_step()
+    bucket = int(midnight // step * step)
+    values = [float(offset) for offset in range(step)]
+    history((bucket + offset, "ping", value) for offset, value in enumerate(values))
+    history([(bucket + 1.5, "ping", None)])  # A failed probe in the earlier partition
+    assert len(list(tmp_path.glob("metrics_*.db"))) == 2
+
+    points = app._query_raw_history("ping", bucket - step, bucket + 2 * step, step, 100)
+    assert points == [{
+        "timestamp": bucket, "avg": pytest.approx(sum(values) / step), "min": 0.0, "max": step - 1.0,
+        "count": step, "loss": pytest.approx(1 / (step + 1))
+    }]
+
+
+def test_merged_buckets_respect_the_limit(history):
+    midnight, step = _midnight_step()
+    first = int(midnight // step * step) - 3 * step
+    history((first + offset, "ping", 1.0) for offset in range(0, 8 * step, 2))
+
+    points = app._query_raw_history("ping", first, first + 8 * step, step, 5)
+    assert [point["timestamp"] for point in points] == [first + number * step for number in range(5)]
+    assert len({point["timestamp"] for point in app._query_raw_history("ping", first, first + 8 * step, step, 100)}) == 8
+
+
+def test_raw_points_come_back_in_time_order(history):
+    now = time.time()
+    history((now - 10 + offset, "ping", offset) for offset in range(10))
+    history([(now, "upload_speed", 99.0)])
+    points = app._query_raw_history("ping", now - 60, now + 1, None, 100)
+    assert [point["value"] for point in points] == list(range(10))
+
+
+def test_rollups_merge_batches_and_count_lost_probes(history):
+    start = int(time.time() // 3600 * 3600) - 7200
+    history((start + offset, "ping", 10.0 + offset % 10) for offset in range(0, 600, 2))
+    history([(start + 601, "ping", 100.0), (start + 603, "ping", None)])  # Same 1 h bucket, a later batch
+
+    points = app._query_rollups("ping", 60, start, start + 3600, 60, 100)
+    assert [point["timestamp"] for point in points] == [start + minute * 60 for minute in range(11)]
+    assert points[0] == {"timestamp": start, "avg": pytest.approx(14.0), "min": 10.0, "max": 18.0,
+                         "count": 30, "loss": 0}
+    assert points[-1]["count"] == 1 and points[-1]["loss"] == 0.5
+
+    # Re-aggregating the 1 min tier into 10 min buckets matches the 1 h tier's totals
+    (hour,) = app._query_rollups("ping", 3600, start, start + 3600, 3600, 100)
+    ten_minutes = app._query_rollups("ping", 60, start, start + 3600, 600, 100)
+    assert [point["timestamp"] for point in ten_minutes] == [start, start + 600]
+    assert sum(point["count"] for point in ten_minutes) == hour["count"] == 301
+    assert hour["max"] == 100.0
+
+
+def test_expired_rollup_buckets_are_pruned(history, monkeypatch):
+    now = time.time()
+    history([(now - 2 * 86400, "ping", 1.0), (now - 60, "ping", 2.0)])
+    monkeypatch.setattr(app, "load_config", lambda: dict(app.DEFAULT_CONFIG, history_retention_days=2))
+    app.cleanup_history(history.rollup_conn)
+
+    steps = dict(history.rollup_conn.execute("SELECT step, COUNT(*) FROM rollups GROUP BY step").fetchall())
+    assert steps == {10: 1, 60: 2, 3600: 2}  # The 10 s tier keeps one day
+
+
+@pytest.mark.parametrize("days", [1, 2, 7])
+def test_raw_tier_covers_the_configured_retention(days):
+    config = dict(app.DEFAULT_CONFIG, history_retention_days=days)
+    assert app.history_tiers(config)[0] == (1, days * 86400)
+    end = time.time()
+    # A short range inside the raw retention is answered from raw samples, one just beyond it is not
+    assert app.select_history_tier(end - days * 86400 + 60, end - days * 86400 + 3660, config=config) == 1
+    assert app.select_history_tier(end - days * 86400 - 60, end - days * 86400 + 3540, config=config) > 1
+
+
+def test_tier_selection_by_step_and_point_limit():
+    config = dict(app.DEFAULT_CONFIG, history_retention_days=2)
+    end = time.time()
+    assert app.select_history_tier(end - 3600, end, config=config) == 1
+    assert app.select_history_tier(end - 86000, end, config=config) == 10  # 86000 raw points would be too many
+    assert app.select_history_tier(end - 86000, end, step=300, config=config) == 60
+    assert app.select_history_tier(end - 6 * 86400, end, config=config) == 60
+    assert app.select_history_tier(end - 90 * 86400, end, config=config) == 3600
@@ -0,0 +1,91 @@
+"""LatencySketch: quantiles within the relative accuracy, and merges equal to a single sketch"""
+import math
+import random
+import statistics
+from collections import deque
+
+import pytest
+
+import app
+
+ALPHA = 0.01
+
+
+def latencies(seed, count):
+    rng = random.Random(seed)
+    # Long-tailed like real pings: mostly 20-40 ms with occasional slow replies
+    return [rng.lognormvariate(math.log(30), 0.35) if rng.random() < 0.97 else rng.uniform(200, 2000)
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_quantiles_are_within_the_relative_accuracy(seed):
+    values = latencies(seed, 20000)
+    sketch = app.LatencySketch(ALPHA)
+    for value in values:
+        sketch.add(value)
+    result = sketch.percentiles()
+
+    ordered = sorted(values)
+    cuts = statistics.quantiles(values, n=1000, method="inclusive")
+    for name, q in app.LATENCY_PERCENTILES:
+        rank = q * (len(values) - 1)
+        # The sketch returns the bucket of the sample at floor(rank); quantiles() interpolates towards the next one
+        low, high = ordered[math.floor(rank)], ordered[math.ceil(rank)]
+        assert low * (1 - ALPHA) - 0.005 <= result[name] <= high * (1 + ALPHA) + 0.005, name
+        assert result[name] == pytest.approx(cuts[round(q * 1000) - 1], rel=ALPHA + 0.001), name
+
+
+def test_zero_and_empty():
+    sketch = app.LatencySketch(ALPHA)
+    assert sketch.percentiles() == {name: None for name, _ in app.LATENCY_PERCENTILES}
+    for _ in range(60):
+        sketch.add(0.0)
+    for _ in range(40):
+        sketch.add(50.0)
+    result = sketch.percentiles()
+    assert result["p50"] == 0.0
+    assert result["p99"] == pytest.approx(50.0, rel=ALPHA)
+
+
+def test_merged_minute_sketches_equal_one_sketch_of_all_samples():
+    values = latencies(4, 6000)
+    whole = app.LatencySketch(ALPHA)
+    minutes = [app.LatencySketch(ALPHA) for _ in range(60)]
+    for i, value in enumerate(values):
+        whole.add(value)
+        minutes[i % 60].add(value)
+    minutes[7].add(0.0)
+    whole.add(0.0)
+
+    merged = app.LatencySketch(ALPHA)
+    for minute in minutes:
+        merged.merge(minute)
+    assert merged.buckets == whole.buckets
+    assert (merged.count, merged.zero_count) == (whole.count, whole.zero_count)
+    assert merged.percentiles() == whole.percentiles()
+
+    with pytest.raises(ValueError):
+        merged.merge(app.LatencySketch(0.02))
+
+
+def test_hour_rollup_matches_the_lifetime_sketch(monkeypatch):
+    monkeypatch.setattr(app, "latency_sketches", {
+        "minute_start": None, "minute": app.LatencySketch(), "previous_minute": None,
+        "minutes": deque(maxlen=60), "hour_start": None, "hour": app.LatencySketch(),
+        "hours": deque(maxlen=24 * 7), "lifetime": app.LatencySketch()
+    })
+    start = 1_700_000_000 // 3600 * 3600
+    values = latencies(5, 3600)
+    for second, value in enumerate(values):
+        app.record_latency(value, timestamp=start + second)
+    app.record_latency(30.0, timestamp=start + 3600)  # Closes the last minute of the hour
+
+    minutes = app.latency_series("minutes")
+    assert len(minutes) == 60 and sum(minute["count"] for minute in minutes) == 3600
+    hour = app.latency_sketches["hour"]
+    lifetime = app.LatencySketch()
+    for value in values:
+        lifetime.add(value)
+    assert hour.buckets == lifetime.buckets
+    assert hour.percentiles() == lifetime.percentiles()
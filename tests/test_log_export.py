@@ -0,0 +1,89 @@
+"""Streaming log export: peak memory while exporting a large synthetic log set"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import psutil
+import pytest
+
+import app
+
+LEVELS = ("INFO", "DEBUG", "WARNING", "INFO", "ERROR", "INFO", "DEBUG", "INFO")
+# Peak RSS growth allowed during an export: far below the input, so only a streaming export passes
+EXPORT_RSS_LIMIT = 4 * 1024 * 1024
+
+
+def _write_log_set(directory, size):
+    """Write a log segment of about `size` bytes in the app's format; returns the number of records"""
+    path = os.path.join(directory, f"tunnel_monitor_web_{datetime.now().strftime('%Y%m%d')}.log")
+    lines_per_second = 500
+    template = b"".join(
+        b"%%s,%03d - tunnel_monitor_web - %s - Ping to 1.1.1.1 took %d.%d ms (probe %d of the synthetic load)\n"
+        % (number * 2 % 1000, LEVELS[number % len(LEVELS)].encode(), 10 + number % 40, number % 10, number)
+        for number in range(lines_per_second)
+    )
+    records = 0
+    second = int(time.time()) - 30 * 86400
+    with open(path, "wb") as f:
+        while f.tell() < size:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second)).encode()
+            f.write(template.replace(b"%s", stamp))
+            records += lines_per_second
+            second += 1
+    return records
+
+
+def _export_peak_rss(tmp_path, monkeypatch, size, query):
+    """Export the synthetic log set through /api/download-logs; returns (bytes, peak RSS growth, seconds)"""
+    directory = tmp_path / "logs"
+    directory.mkdir()
+    records = _write_log_set(str(directory), size)
+    writer = app.AsyncLogWriter(str(directory), "tunnel_monitor_web", max_bytes=size * 2)
+    monkeypatch.setattr(app, "log_writer", writer)
+    assert writer.index["records"] == records
+
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], process.memory_info().rss)
+            time.sleep(0.005)
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    started = time.perf_counter()
+    total = 0
+    try:
+        response = app.app.test_client().get(f'/api/download-logs?{query}')
+        assert response.status_code == 200
+        for chunk in response.iter_encoded():
+            total += len(chunk)
+        response.close()
+    finally:
+        done.set()
+        sampler.join()
+        writer.stop()
+    return total, peak[0] - baseline, time.perf_counter() - started
+
+
+@pytest.mark.parametrize("query", ["format=text", "format=jsonl&level=error", "format=text&gzip=1"])
+def test_export_memory_is_bounded(tmp_path, monkeypatch, query):
+    size = 32 * 1024 * 1024
+    exported, growth, seconds = _export_peak_rss(tmp_path, monkeypatch, size, query)
+    print(f"\n{query}: {exported / 2**20:.0f} MiB out of {size / 2**20:.0f} MiB in {seconds:.1f}s, "
+          f"peak RSS +{growth / 2**20:.1f} MiB")
+    assert exported > 0
+    assert growth < EXPORT_RSS_LIMIT
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("query", ["format=text", "format=jsonl&level=error"])
+def test_export_1gb_log_set_peak_rss(tmp_path, monkeypatch, query):
+    size = 1024 * 1024 * 1024
+    exported, growth, seconds = _export_peak_rss(tmp_path, monkeypatch, size, query)
+    print(f"\n{query}: {exported / 2**20:.0f} MiB out of 1 GiB in {seconds:.1f}s, peak RSS +{growth / 2**20:.1f} MiB")
+    assert growth < EXPORT_RSS_LIMIT
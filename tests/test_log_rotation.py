@@ -0,0 +1,121 @@
+"""Log segments: size rotation, block-wise gzip with a JSON index, retention and leftovers from earlier runs"""
+import gzip
+import json
+import logging
+import os
+import time
+
+import pytest
+
+import app
+from tests.support import wait_for
+
+LEVELS = ("INFO", "DEBUG", "WARNING", "ERROR")
+
+
+def record(number, created=None):
+    levelname = LEVELS[number % len(LEVELS)]
+    entry = logging.makeLogRecord({"name": "tunnel_monitor_web", "levelname": levelname,
+                                   "levelno": getattr(logging, levelname), "msg": f"record {number:05d} " + "x" * 60})
+    if created is not None:
+        entry.created = created
+    return entry
+
+
+@pytest.fixture
+def writer_factory(tmp_path):
+    writers = []
+
+    def create(**options):
+        options = dict(dict(batch_size=10, flush_interval=0.01, max_bytes=8 * 1024, block_bytes=1024), **options)
+        writer = app.AsyncLogWriter(str(tmp_path), "test", **options)
+        writers.append(writer)
+        return writer
+
+    yield create
+    for writer in writers:
+        writer.stop()
+
+
+def settled(writer):
+    stats = writer.stats()
+    return stats["queue_depth"] == 0 and stats["pending_segments"] == 0 and writer.compress_queue.empty()
+
+
+def test_segments_rotate_by_size_and_are_compressed_with_an_index(writer_factory, tmp_path):
+    writer = writer_factory()
+    for number in range(1000):
+        writer.submit(record(number))
+    wait_for(lambda: writer.stats()["written"] == 1000 and settled(writer))
+
+    stats = writer.stats()
+    assert stats["rotations"] >= 5 and stats["compressed"] == stats["rotations"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".log") and os.path.join(tmp_path, name) != writer.path]
+
+    for name in (name for name in os.listdir(tmp_path) if name.endswith(".idx.json")):
+        with open(tmp_path / name, encoding="utf-8") as f:
+            index = json.load(f)
+        with open(tmp_path / index["file"], "rb") as f:
+            data = f.read()
+        assert index["compressed_bytes"] == len(data)
+        # Every block is its own gzip member: inflate one alone and find exactly its records
+        for block in index["blocks"]:
+            raw = gzip.decompress(data[block["gz_offset"]:block["gz_offset"] + block["gz_length"]])
+            assert len(raw) == block["length"]
+            levels = [level for _, level, _ in app._split_log_records(raw.splitlines(keepends=True))]
+            assert {level: levels.count(level) for level in set(levels)} == block["levels"]
+        # The whole file is still one valid gzip stream
+        assert sum(1 for _ in gzip.decompress(data).splitlines()) == index["records"]
+
+    texts = [text for _, _, text in writer.records()]
+    assert [int(text.split("record ")[1][:5]) for text in texts] == list(range(1000))
+
+
+def test_index_skips_blocks_by_level_and_time(writer_factory):
+    writer = writer_factory()
+    now = time.time()
+    for number in range(400):
+        writer.submit(record(number * 4 + 1, created=now - 3600))  # DEBUG, an hour ago
+    writer.submit(record(3, created=now))  # One ERROR, now
+    wait_for(lambda: writer.stats()["written"] == 401 and settled(writer))
+
+    blocks = list(writer.read_blocks(levels={"error"}))
+    assert len(blocks) == 1
+    assert [level for _, level, _ in writer.records(levels={"error"})] == ["error"]
+    assert list(writer.read_blocks(start=now + 60)) == []
+    assert len(list(writer.records(end=now - 60))) == 400
+
+
+def test_retention_deletes_the_oldest_archives(writer_factory, tmp_path):
+    writer = writer_factory(retention_bytes=4 * 1024)
+    for number in range(1500):
+        writer.submit(record(number))
+    wait_for(lambda: writer.stats()["written"] == 1500 and settled(writer))
+
+    stats = writer.stats()
+    assert stats["expired"] > 0
+    assert stats["archived_bytes"] <= 4 * 1024
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".log.gz")]) == stats["archived_segments"]
+    # What is left is the newest records
+    first = int(next(writer.records())[2].split("record ")[1][:5])
+    assert first > 0
+
+
+def test_leftover_segments_wait_for_compress_leftovers(writer_factory, tmp_path):
+    leftover = tmp_path / "test_20200101.log"
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    leftover.write_text("".join(formatter.format(record(number)) + "\n" for number in range(50)))
+
+    writer = writer_factory()
+    time.sleep(0.2)
+    assert leftover.exists()  # Creating a writer (e.g. importing app) does not touch old segments
+    assert writer.compress_leftovers() == 1
+    wait_for(lambda: settled(writer) and not leftover.exists())
+    assert (tmp_path / "test_20200101.log.gz").exists()
+    assert len(list(writer.records())) == 50
+
+    # A later run finds the archive through its index
+    writer.stop()
+    reopened = writer_factory()
+    assert "test_20200101.log.gz" in reopened.archive
+    assert reopened.compress_leftovers() == 0
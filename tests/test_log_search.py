@@ -0,0 +1,128 @@
+"""Log search: incremental token indexing, candidate blocks, pagination and filters"""
+import logging
+import time
+
+import pytest
+
+import app
+from tests.support import wait_for
+
+WORDS = ("alpha", "bravo", "charlie", "delta")
+
+
+def record(number, levelname="INFO", created=None, extra=""):
+    entry = logging.makeLogRecord({
+        "name": "tunnel_monitor_web", "levelname": levelname, "levelno": getattr(logging, levelname),
+        "msg": f"event {WORDS[number % len(WORDS)]} number {number:05d} {extra}" + " padding" * 6
+    })
+    if created is not None:
+        entry.created = created
+    return entry
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    """A log writer with small segments and blocks, used by the indexer and search_logs"""
+    writer = app.AsyncLogWriter(str(tmp_path), "test", batch_size=10, flush_interval=0.01,
+                                max_bytes=16 * 1024, block_bytes=1024)
+    monkeypatch.setattr(app, "log_writer", writer)
+    monkeypatch.setattr(app, "log_index_path", str(tmp_path / "search_index.db"))
+    yield writer
+    writer.stop()
+
+
+def submit(writer, records):
+    expected = writer.stats()["written"] + len(records)
+    for entry in records:
+        writer.submit(entry)
+    wait_for(lambda: writer.stats()["written"] == expected and writer.stats()["queue_depth"] == 0
+             and writer.stats()["pending_segments"] == 0 and writer.compress_queue.empty())
+
+
+def numbers(results):
+    return [int(result["text"].split("number ")[1][:5]) for result in results]
+
+
+def test_each_pass_indexes_only_new_records(writer):
+    submit(writer, [record(number) for number in range(300)])
+    conn = app._open_log_index()
+    try:
+        assert app.update_log_index(conn) == 300
+        assert app.update_log_index(conn) == 0
+
+        submit(writer, [record(number) for number in range(300, 420)])
+        assert app.update_log_index(conn) == 120
+        assert app.update_log_index(conn) == 0
+        # Every segment, rotated or active, is indexed up to its last block
+        progress = app._log_index_progress(conn)
+        assert all(app._block_indexed(progress, segment, len(segment["blocks"]) - 1)
+                   for segment in writer.segments())
+    finally:
+        conn.close()
+
+
+def test_rare_words_only_read_their_blocks(writer):
+    submit(writer, [record(number, extra="zebra" if number == 123 else "") for number in range(600)])
+    conn = app._open_log_index()
+    try:
+        app.update_log_index(conn)
+    finally:
+        conn.close()
+
+    result = app.search_logs("zeb")  # Query words match as prefixes
+    assert numbers(result["results"]) == [123]
+    assert result["scanned_blocks"] == 1
+    holding = 0
+    for segment in writer.segments():
+        with open(segment["path"], "rb") as f:
+            holding += sum(b"charlie" in writer.read_block(segment, block, f) for block in segment["blocks"])
+    assert app.search_logs("charlie", limit=500)["scanned_blocks"] == holding
+
+
+def test_records_not_indexed_yet_are_found(writer):
+    submit(writer, [record(number) for number in range(100)])
+    conn = app._open_log_index()
+    try:
+        app.update_log_index(conn)
+    finally:
+        conn.close()
+    submit(writer, [record(100, extra="newcomer")])  # Written after the last pass
+    assert numbers(app.search_logs("newcomer")["results"]) == [100]
+
+
+def test_pages_follow_the_cursor_newest_first(writer):
+    submit(writer, [record(number) for number in range(500)])
+    conn = app._open_log_index()
+    try:
+        app.update_log_index(conn)
+    finally:
+        conn.close()
+
+    seen, cursor = [], None
+    while True:
+        page = app.search_logs("bravo", limit=17, cursor=cursor)
+        assert len(page["results"]) <= 17
+        seen.extend(numbers(page["results"]))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [number for number in reversed(range(500)) if number % len(WORDS) == 1]
+
+    with pytest.raises(ValueError):
+        app.search_logs("bravo", cursor="not a cursor")
+
+
+def test_level_and_time_filters(writer):
+    now = time.time()
+    submit(writer, [record(number, levelname="ERROR" if number % 50 == 0 else "INFO",
+                           created=now - 3600 if number < 200 else now) for number in range(400)])
+    conn = app._open_log_index()
+    try:
+        app.update_log_index(conn)
+    finally:
+        conn.close()
+
+    assert numbers(app.search_logs(levels={"error"})["results"]) == [350, 300, 250, 200, 150, 100, 50, 0]
+    assert numbers(app.search_logs(levels={"error"}, start=now - 60)["results"]) == [350, 300, 250, 200]
+    recent_alpha = app.search_logs("alpha", levels={"info"}, end=now - 60, limit=500)["results"]
+    assert numbers(recent_alpha) == [number for number in reversed(range(200)) if number % 4 == 0 and number % 50]
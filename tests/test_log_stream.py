@@ -0,0 +1,88 @@
+"""Live log stream: server-side level and substring filters, cursors and the per-client rate limit"""
+import pytest
+
+import app
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    batches = []
+    monkeypatch.setattr(app.socketio, "emit", lambda event, data, to=None, **kwargs: batches.append((to, data)))
+    return batches
+
+
+def add(buffer, message, level="info"):
+    buffer.append({"timestamp": "2026-01-01 00:00:00", "message": message, "level": level})
+
+
+def test_level_and_substring_filters(sent):
+    buffer = app.LogBuffer(100)
+    stream = app.LogStream(buffer)
+    stream.subscribe("warnings", level="warning")
+    stream.subscribe("phrase", query="Connection Terminated")
+    stream.subscribe("literal", query="a.c")
+
+    add(buffer, "Cloudflared: connection terminated by edge")
+    add(buffer, "terminated: connection lost", level="error")
+    add(buffer, "abc is not a.c")
+    add(buffer, "abc", level="debug")
+    stream.flush()
+
+    messages = {sid: [record["message"] for record in data["logs"]] for sid, data in sent}
+    assert messages["warnings"] == ["terminated: connection lost"]
+    assert messages["phrase"] == ["Cloudflared: connection terminated by edge"]  # A phrase, not words in any order
+    assert messages["literal"] == ["abc is not a.c"]  # No regular expression syntax
+
+
+def test_invalid_subscriptions_are_rejected():
+    stream = app.LogStream(app.LogBuffer(10))
+    with pytest.raises(ValueError):
+        stream.subscribe("sid", level="verbose")
+    with pytest.raises(ValueError):
+        stream.subscribe("sid", query="x" * 201)
+    assert not stream.subscribers
+
+
+def test_cursor_resumes_and_reports_overwritten_records(sent):
+    buffer = app.LogBuffer(5)
+    stream = app.LogStream(buffer)
+    for i in range(3):
+        add(buffer, f"old {i}")
+    cursor = stream.subscribe("sid", after=buffer.last_seq())
+    stream.flush()
+    assert sent == []  # Nothing new since the cursor
+
+    for i in range(8):
+        add(buffer, f"new {i}")
+    stream.flush()
+    (_, data), = sent
+    assert data["missed"] == 3  # Overwritten in the 5-record ring before this flush
+    assert [record["message"] for record in data["logs"]] == [f"new {i}" for i in range(3, 8)]
+    assert data["cursor"] == cursor + 8
+
+
+def test_rate_limit_keeps_the_newest_records_and_counts_the_rest(sent):
+    buffer = app.LogBuffer(100)
+    stream = app.LogStream(buffer, rate=0, burst=5)
+    stream.subscribe("sid", after=0)
+
+    for i in range(8):
+        add(buffer, f"line {i}")
+    stream.flush()
+    (_, data), = sent
+    assert [record["message"] for record in data["logs"]] == [f"line {i}" for i in range(3, 8)]
+    assert data["suppressed"] == 3
+
+    # Out of tokens: the next batch only reports what it suppressed
+    for i in range(8, 12):
+        add(buffer, f"line {i}")
+    stream.flush()
+    assert sent[1][1]["logs"] == [] and sent[1][1]["suppressed"] == 4
+
+    # Tokens refill at `rate` per second
+    stream.rate = 2
+    stream.subscribers["sid"]["refilled_at"] -= 1
+    add(buffer, "line 12")
+    stream.flush()
+    assert [record["message"] for record in sent[2][1]["logs"]] == ["line 12"]
+    assert sent[2][1]["suppressed"] == 0
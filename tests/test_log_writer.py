@@ -0,0 +1,83 @@
+"""AsyncLogWriter queue policy: drops when full, bounded blocking, and the throughput counters"""
+import logging
+import time
+
+import pytest
+
+import app
+from tests.support import wait_for
+
+
+def record(number):
+    return logging.makeLogRecord({"name": "tunnel_monitor_web", "levelname": "INFO", "levelno": logging.INFO,
+                                  "msg": f"record {number}"})
+
+
+@pytest.fixture
+def stalled(tmp_path):
+    """A writer whose thread has stopped, so nothing drains its bounded queue"""
+    writers = []
+
+    def create(policy, capacity=5, block_timeout=1.0):
+        writer = app.AsyncLogWriter(str(tmp_path), f"test_{policy}", capacity=capacity, policy=policy,
+                                    block_timeout=block_timeout, flush_interval=0.01)
+        writer.stop()
+        writers.append(writer)
+        return writer
+
+    yield create
+    for writer in writers:
+        writer.stop()
+
+
+def test_drop_policy_discards_new_records_without_waiting(stalled):
+    writer = stalled("drop")
+    started = time.perf_counter()
+    for number in range(8):
+        writer.submit(record(number))
+    assert time.perf_counter() - started < 0.1
+
+    stats = writer.stats()
+    assert stats["enqueued"] == 5
+    assert stats["dropped"] == 3
+    assert (stats["queue_depth"], stats["queue_capacity"]) == (5, 5)
+    # The first five are queued, the overflow is lost
+    assert [writer.queue.get_nowait().getMessage() for _ in range(5)] == [f"record {n}" for n in range(5)]
+
+
+def test_block_policy_waits_up_to_the_timeout_then_drops(stalled):
+    writer = stalled("block", capacity=2, block_timeout=0.2)
+    writer.submit(record(0))
+    writer.submit(record(1))
+
+    started = time.perf_counter()
+    writer.submit(record(2))
+    waited = time.perf_counter() - started
+    assert 0.2 <= waited < 1.0
+    assert writer.stats()["dropped"] == 1
+
+    # Room made while a caller blocks lets its record in
+    writer.queue.get_nowait()
+    writer.submit(record(3))
+    assert writer.stats()["enqueued"] == 3
+
+
+def test_counters_report_throughput_and_batches(tmp_path):
+    writer = app.AsyncLogWriter(str(tmp_path), "test", batch_size=50, flush_interval=0.01)
+    try:
+        for number in range(500):
+            writer.submit(record(number))
+        wait_for(lambda: writer.stats()["written"] == 500)
+    finally:
+        writer.stop()
+    stats = writer.stats()
+    assert stats["dropped"] == 0 and stats["errors"] == 0
+    assert stats["batches"] >= 10 and stats["max_batch"] <= 50
+    assert stats["avg_batch"] == round(500 / stats["batches"], 2)
+    assert stats["bytes"] == stats["active_bytes"] > 0
+    assert stats["records_per_sec"] > 0
+
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        app.AsyncLogWriter(str(tmp_path), "test", policy="wait")
@@ -0,0 +1,56 @@
+"""Ping backends and their microbenchmark"""
+import time
+
+import app
+
+
+def test_parse_ping_output():
+    assert app._parse_ping_output("Reply from 1.1.1.1: bytes=32 time=15ms TTL=57") == 15.0
+    assert app._parse_ping_output("Reply from 1.1.1.1: bytes=32 time<1ms TTL=57") == 0.0
+
+
+def test_tcp_backend_times_a_refused_connection():
+    # Nothing listens on the probe port of the loopback address: the RST still proves the round trip
+    assert app._ping_host_tcp("127.0.0.1", 500) is not None
+    assert app._ping_host_tcp("name.invalid", 500) is None
+
+
+def test_benchmark_compares_backends_against_loopback():
+    """Samples/sec and CPU per sample of every available backend against 127.0.0.1"""
+    results = app.benchmark_ping_backends("127.0.0.1", samples=50, timeout=500, max_seconds=5)
+
+    print("\nbackend      samples/s  cpu ms/sample  ok/sent")
+    for name, result in results.items():
+        if result["available"]:
+            print(f"{name:<12} {result['samples_per_sec']:>9} {result['cpu_ms_per_sample']:>14} "
+                  f"{result['successful']:>3}/{result['samples']}")
+        else:
+            print(f"{name:<12} unavailable")
+
+    assert set(results) == set(app.PING_BACKENDS)
+    available = {name: result for name, result in results.items() if result["available"]}
+    assert "tcp" in available
+    for name, result in available.items():
+        assert result["samples"] > 0, name
+    assert available["tcp"]["successful"] == available["tcp"]["samples"]
+
+    native = [result["cpu_ms_per_sample"] for name, result in available.items()
+              if name != "subprocess" and result["successful"]]
+    if "subprocess" in available and available["subprocess"]["successful"] and native:
+        # The point of the in-process backends: no fork and exec per sample
+        assert min(native) < available["subprocess"]["cpu_ms_per_sample"]
+
+
+def test_benchmark_respects_its_time_budget(monkeypatch):
+    def slow_probe(host, timeout):
+        time.sleep(0.05)
+        return 1.0
+    monkeypatch.setattr(app, "PING_BACKENDS", {"tcp": slow_probe})
+    results = app.benchmark_ping_backends("127.0.0.1", samples=100, max_seconds=0.5)
+    assert 5 <= results["tcp"]["samples"] <= 12
+
+
+def test_benchmark_endpoint_only_probes_known_hosts(config):
+    client = app.app.test_client()
+    response = client.post('/api/ping-benchmark', json={"host": "example.com"})
+    assert response.status_code == 400
@@ -0,0 +1,87 @@
+"""RollingStats against a brute-force recomputation over the same sliding window"""
+import math
+import random
+import statistics
+
+import pytest
+
+import app
+
+
+def brute_force(results, window):
+    """Statistics recomputed from scratch: results are the probe outcomes so far (None for a lost probe)"""
+    replies = [value for value in results if value is not None][-window:]
+    outcomes = results[-window:]
+    jitter = 0.0
+    previous = None
+    for value in (value for value in results if value is not None):
+        if previous is not None:
+            jitter += (abs(value - previous) - jitter) / 16
+        previous = value
+    return {
+        "avg": statistics.mean(replies) if replies else 0,
+        "min": min(replies, default=0),
+        "max": max(replies, default=0),
+        "count": len(replies),
+        "stddev": statistics.pstdev(replies) if replies else 0,
+        "jitter": jitter,
+        "loss": outcomes.count(None) / len(outcomes) * 100 if outcomes else 0
+    }
+
+
+def assert_matches(stats, expected):
+    snapshot = stats.snapshot()
+    assert snapshot["count"] == expected["count"]
+    assert snapshot["min"] == expected["min"]
+    assert snapshot["max"] == expected["max"]
+    for key in ("avg", "jitter", "loss"):
+        assert snapshot[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-9), key
+    # sqrt(E[x^2] - E[x]^2) loses about half the digits to cancellation when the spread is tiny
+    assert snapshot["stddev"] == pytest.approx(expected["stddev"], rel=1e-6, abs=1e-4)
+
+
+@pytest.mark.parametrize("window", [1, 5, 60])
+def test_matches_brute_force_through_eviction_and_losses(window):
+    rng = random.Random(window)
+    stats = app.RollingStats(window)
+    results = []
+    for i in range(600):
+        # Plateaus, spikes and runs of lost probes exercise the min/max deques and the loss window
+        if rng.random() < 0.15 or 200 <= i < 210:
+            value = None
+        elif rng.random() < 0.1:
+            value = rng.choice([5.0, 500.0])
+        else:
+            value = round(rng.gauss(30, 8), 1)
+        stats.add(value)
+        results.append(value)
+        assert_matches(stats, brute_force(results, window))
+
+
+def test_monotonic_sequences_evict_the_extremes():
+    stats = app.RollingStats(3)
+    for value in (1.0, 2.0, 3.0, 4.0, 5.0):
+        stats.add(value)
+    assert (stats.snapshot()["min"], stats.snapshot()["max"]) == (3.0, 5.0)
+    for value in (4.0, 3.0, 2.0, 1.0):
+        stats.add(value)
+    assert (stats.snapshot()["min"], stats.snapshot()["max"]) == (1.0, 3.0)
+
+
+def test_only_lost_probes():
+    stats = app.RollingStats(4)
+    for _ in range(6):
+        stats.add(None)
+    assert stats.snapshot() == {"avg": 0, "min": 0, "max": 0, "count": 0, "stddev": 0, "jitter": 0, "loss": 100.0}
+    stats.add(10.0)
+    assert stats.snapshot()["loss"] == 75.0
+
+
+def test_resync_restores_exact_sums():
+    stats = app.RollingStats(10)
+    # Huge values passing through the window leave rounding error in the running sums until the next resync
+    for i in range(3 * app.RollingStats.RESYNC_EVERY):
+        stats.add(1e12 if i % 50 == 0 else 0.1 + (i % 7) * 1e-3)
+    replies = list(stats.values)
+    assert stats.sum == math.fsum(replies)
+    assert stats.sum_sq == math.fsum(value * value for value in replies)
@@ -0,0 +1,212 @@
+"""Process supervision against a fake cloudflared that crashes on demand"""
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+import pytest
+
+import app
+from tests.support import wait_for
+
+
+def test_restart_delay_backs_off_and_honours_the_policy():
+    assert app.restart_delay("never", 1, deque()) is None
+    assert app.restart_delay("on-failure", 0, deque([time.monotonic()])) is None
+
+    crashes = deque()
+    delays = []
+    for _ in range(8):
+        crashes.append(time.monotonic())
+        delays.append(app.restart_delay("always", 1, crashes))
+    assert delays == [0, 1, 2, 4, 8, 16, 30, 30]
+
+    # Crashes outside the window no longer count
+    old = deque([time.monotonic() - app.RESTART_WINDOW - 1] * 5 + [time.monotonic()])
+    assert app.restart_delay("always", 1, old) == 0
+    assert len(old) == 1
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX signals")
+def test_supervisor_records_sigkill_within_milliseconds(fake_cloudflared):
+    supervisor = app.TunnelSupervisor()
+    process = subprocess.Popen([fake_cloudflared, "tunnel", "--url", "http://localhost:8080"],
+                               stdout=subprocess.DEVNULL)
+    process.stopping = False
+    process.role = "standby"
+    supervisor.watch(process)
+
+    killed = time.monotonic()
+    process.kill()
+    assert supervisor.wait(5)
+    latency = time.monotonic() - killed
+
+    exit = supervisor.exits[-1]
+    assert exit["pid"] == process.pid
+    assert exit["signal"] == "SIGKILL"
+    assert exit["role"] == "standby"
+    assert not exit["expected"]
+    assert len(supervisor.crashes["standby"]) == 1
+    print(f"\nSIGKILL noticed after {latency * 1000:.1f} ms")
+    assert latency < 0.5
+
+
+def test_supervisor_ignores_deliberate_stops(fake_cloudflared):
+    supervisor = app.TunnelSupervisor()
+    process = subprocess.Popen([fake_cloudflared, "tunnel", "--url", "http://localhost:8080"],
+                               stdout=subprocess.DEVNULL)
+    process.stopping = True
+    process.role = "standby"
+    supervisor.watch(process)
+    process.terminate()
+
+    assert supervisor.wait(5)
+    assert supervisor.exits[-1]["expected"]
+    assert not supervisor.crashes["standby"]
+
+
+def test_managed_tunnel_restarts_after_a_crash(config, fake_cloudflared, tmp_path, monkeypatch):
+    crash_file = tmp_path / "crash"
+    monkeypatch.setenv("FAKE_CLOUDFLARED_CRASH_FILE", str(crash_file))
+    monkeypatch.setenv("FAKE_CLOUDFLARED_EXIT_CODE", "3")
+    config = dict(config, cloudflared_path=fake_cloudflared, restart_policy="on-failure",
+                  tunnels=[{"name": "web", "url": "http://localhost:8081"}])
+    manager = app.TunnelManager()
+    try:
+        manager.reconcile(config)
+        tunnel = manager.get("web")
+        wait_for(lambda: tunnel.status == "running")
+        first_url = tunnel.url
+        assert first_url.startswith("https://fake-")
+
+        crash_file.write_text("")
+        wait_for(lambda: tunnel.status == "restarting")
+        assert tunnel.last_exit["returncode"] == 3
+        assert tunnel.crash_count == 1
+        crash_file.unlink()
+
+        # First crash in the window: restarted on the next reconcile without delay
+        manager.reconcile(config)
+        wait_for(lambda: tunnel.status == "running")
+        assert tunnel.starts == 2
+        assert tunnel.url != first_url
+    finally:
+        manager.stop_all()
+
+
+def test_managed_tunnel_is_not_restarted_after_a_clean_exit_under_on_failure(config, fake_cloudflared, monkeypatch):
+    monkeypatch.setenv("FAKE_CLOUDFLARED_EXIT_AFTER", "0.2")
+    monkeypatch.setenv("FAKE_CLOUDFLARED_EXIT_CODE", "0")
+    config = dict(config, cloudflared_path=fake_cloudflared, restart_policy="on-failure",
+                  tunnels=[{"name": "web", "url": "http://localhost:8081"}])
+    manager = app.TunnelManager()
+    try:
+        manager.reconcile(config)
+        tunnel = manager.get("web")
+        wait_for(lambda: tunnel.status == "restarting")
+        manager.reconcile(config)
+        assert tunnel.status == "failed"
+        assert tunnel.starts == 1
+    finally:
+        manager.stop_all()
+
+
+@pytest.fixture
+def monitor(config, fake_cloudflared, monkeypatch):
+    """Run monitor_thread_func against the fake cloudflared; returns (start(**settings), recorded events)"""
+    events = []
+    emit_event = app.emit_event
+
+    def record(event_type, level=None, **fields):
+        events.append((time.monotonic(), event_type, fields))
+        return emit_event(event_type, level=level, **fields)
+
+    monkeypatch.setattr(app, "emit_event", record)
+    monkeypatch.setattr(app, "internet_available", lambda: True)
+    monkeypatch.setattr(app, "stop_event", threading.Event())
+    monkeypatch.setattr(app, "tunnel_supervisor", app.TunnelSupervisor())
+    monkeypatch.setattr(app, "tunnel_process", None)
+    monkeypatch.setattr(app, "standby_process", None)
+    monkeypatch.setattr(app, "STATS", dict(app.STATS))
+    monkeypatch.setattr(app, "failover", {"detected": None, "mode": None})
+    threads = []
+
+    def start(**settings):
+        app.save_config(dict(config, cloudflared_path=fake_cloudflared, check_interval=1, **settings))
+        thread = threading.Thread(target=app.monitor_thread_func, args=(app.load_config(),), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    yield start, events
+    app.stop_event.set()
+    app.stop_tunnel()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+def event_times(events, event_type):
+    return [at for at, recorded_type, _ in events if recorded_type == event_type]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX signals")
+def test_monitor_restarts_a_crashed_tunnel_with_backoff(monitor, tmp_path, monkeypatch):
+    start, events = monitor
+    crash_file = tmp_path / "crash"
+    monkeypatch.setenv("FAKE_CLOUDFLARED_CRASH_FILE", str(crash_file))
+    monkeypatch.setenv("FAKE_CLOUDFLARED_EXIT_CODE", "3")
+    start(restart_policy="on-failure")
+    wait_for(lambda: app.tunnel_supervisor.status == "running" and app.STATS["last_tunnel_url"])
+    first_pid = app.tunnel_process.pid
+
+    # First crash: restarted right away; the restarted process crashes too and is held back for a second
+    crash_file.write_text("")
+    wait_for(lambda: len(event_times(events, "restart_scheduled")) == 1)
+    scheduled = [fields for _, event_type, fields in events if event_type == "restart_scheduled"][0]
+    assert scheduled["delay"] == 1 and scheduled["crashes"] == 2
+    crash_file.unlink()
+
+    wait_for(lambda: len(event_times(events, "tunnel_started")) == 3 and app.tunnel_supervisor.status == "running")
+    exits = event_times(events, "tunnel_exited")
+    starts = event_times(events, "tunnel_started")
+    assert len(exits) == 2
+    assert starts[1] - exits[0] < 0.5  # Within milliseconds of the exit, not at the next check interval
+    assert starts[2] - exits[1] >= 1
+    assert app.tunnel_process.pid != first_pid
+    assert [exit["returncode"] for exit in app.tunnel_supervisor.exits] == [3, 3]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX signals")
+@pytest.mark.parametrize("policy, exit_code", [("on-failure", 0), ("never", 3)])
+def test_monitor_gives_up_as_the_restart_policy_says(monitor, monkeypatch, policy, exit_code):
+    start, events = monitor
+    monkeypatch.setenv("FAKE_CLOUDFLARED_EXIT_AFTER", "0.3")
+    monkeypatch.setenv("FAKE_CLOUDFLARED_EXIT_CODE", str(exit_code))
+    start(restart_policy=policy)
+    wait_for(lambda: app.tunnel_supervisor.status == "failed")
+    time.sleep(1.5)  # A further pass of the monitor loop must not start it again
+
+    assert app.tunnel_supervisor.status == "failed"
+    assert len(event_times(events, "tunnel_started")) == 1
+    abandoned = [fields for _, event_type, fields in events if event_type == "restart_abandoned"]
+    assert abandoned == [{"policy": policy, "returncode": exit_code}]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX signals")
+def test_monitor_promotes_the_standby_when_the_tunnel_crashes(monitor, tmp_path, monkeypatch):
+    start, events = monitor
+    start(restart_policy="always", tunnel_standby=True)
+    wait_for(lambda: app.tunnel_supervisor.status == "running" and app.process_alive(app.standby_process))
+    wait_for(lambda: app.standby_process.ready.is_set())
+    standby_pid = app.standby_process.pid
+
+    os.kill(app.tunnel_process.pid, signal.SIGKILL)
+    wait_for(lambda: event_times(events, "standby_promoted"))
+    wait_for(lambda: app.STATS["last_tunnel_url"] == f"https://fake-{standby_pid}.trycloudflare.com")
+    assert app.tunnel_process.pid == standby_pid
+    assert app.tunnel_supervisor.exits[0]["signal"] == "SIGKILL"
+    failover = [fields for _, event_type, fields in events if event_type == "tunnel_failover"]
+    assert failover[0]["mode"] == "standby"
+    # A new standby takes the promoted one's place
+    wait_for(lambda: app.process_alive(app.standby_process) and app.standby_process.pid != standby_pid)
@@ -0,0 +1,57 @@
+"""TimeSeriesRing: wrap-around, partial reads and the sample sequence number"""
+import app
+
+
+def fill(ring, start, stop):
+    for i in range(start, stop):
+        ring.append(float(i), i * 10.0, -i)
+
+
+def test_reads_before_the_ring_is_full():
+    ring = app.TimeSeriesRing(5, ("a", "b"))
+    assert ring.to_records() == []
+    fill(ring, 0, 3)
+    assert len(ring) == 3
+    assert ring.column("timestamp") == [0.0, 1.0, 2.0]
+    assert ring.to_records(last=2) == [{"timestamp": 1.0, "a": 10.0, "b": -1.0},
+                                      {"timestamp": 2.0, "a": 20.0, "b": -2.0}]
+    assert ring.to_columns(last=10) == {"timestamp": [0.0, 1.0, 2.0], "a": [0.0, 10.0, 20.0], "b": [0.0, -1.0, -2.0]}
+
+
+def test_wrap_around_overwrites_the_oldest_samples():
+    ring = app.TimeSeriesRing(5, ("a", "b"))
+    fill(ring, 0, 13)
+    assert len(ring) == 5
+    assert ring.head == 13 % 5
+    assert ring.column("timestamp") == [8.0, 9.0, 10.0, 11.0, 12.0]
+    assert ring.column("b") == [-8.0, -9.0, -10.0, -11.0, -12.0]
+
+
+def test_last_n_across_the_wrap_matches_a_plain_list():
+    ring = app.TimeSeriesRing(7, ("a", "b"))
+    samples = []
+    for i in range(30):
+        ring.append(float(i), i * 10.0, -i)
+        samples.append({"timestamp": float(i), "a": i * 10.0, "b": float(-i)})
+        kept = samples[-7:]
+        for last in (0, 1, 3, 6, 7, 8, None):
+            expected = kept if last is None else kept[len(kept) - min(last, len(kept)):]
+            assert ring.to_records(last=last) == expected
+
+
+def test_total_counts_every_append_and_drives_delta_seqs():
+    ring = app.TimeSeriesRing(4, ("a",))
+    seen = 0
+    for i in range(10):
+        ring.append(float(i), float(i))
+        assert ring.total == i + 1
+        # A consumer that saw `seen` samples asks for the new ones, as ping_payload does
+        new = ring.to_records(last=ring.total - seen)
+        assert [record["timestamp"] for record in new] == [float(n) for n in range(max(seen, ring.total - 4), ring.total)]
+        seen = ring.total if i % 3 == 0 else seen
+
+    ring.clear()
+    assert len(ring) == 0 and ring.to_records() == []
+    assert ring.total == 10  # Sequence numbers keep increasing across a clear
+    ring.append(10.0, 10.0)
+    assert ring.total == 11 and ring.to_records() == [{"timestamp": 10.0, "a": 10.0}]
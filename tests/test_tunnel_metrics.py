@@ -0,0 +1,174 @@
+"""cloudflared metrics scraping against a local stand-in for its --metrics endpoint"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import app
+from tests.support import wait_for
+
+# Recorded from cloudflared's /metrics, trimmed; {requests} and {errors} grow between scrapes
+RECORDED_METRICS = """# HELP build_info Build and version information
+# TYPE build_info gauge
+build_info{{goversion="go1.22.5",revision="2024.8.2",type="",version="2024.8.2"}} 1
+# HELP cloudflared_tunnel_concurrent_requests_per_tunnel Concurrent requests proxied through each tunnel
+# TYPE cloudflared_tunnel_concurrent_requests_per_tunnel gauge
+cloudflared_tunnel_concurrent_requests_per_tunnel 3
+# HELP cloudflared_tunnel_ha_connections Number of active ha connections
+# TYPE cloudflared_tunnel_ha_connections gauge
+cloudflared_tunnel_ha_connections 4
+# HELP cloudflared_tunnel_request_errors Count of error proxying to origin
+# TYPE cloudflared_tunnel_request_errors counter
+cloudflared_tunnel_request_errors {errors}
+# HELP cloudflared_tunnel_total_requests Amount of requests proxied through all the tunnels
+# TYPE cloudflared_tunnel_total_requests counter
+cloudflared_tunnel_total_requests {requests}
+# HELP go_goroutines Number of goroutines that currently exist.
+# TYPE go_goroutines gauge
+go_goroutines 187
+# HELP quic_client_smoothed_rtt Calculated smoothed RTT measured on a connection in millisec
+# TYPE quic_client_smoothed_rtt gauge
+quic_client_smoothed_rtt{{conn_index="0"}} 20
+quic_client_smoothed_rtt{{conn_index="1"}} 30
+quic_client_smoothed_rtt{{conn_index="2",edge_location="ams\\"08"}} 40
+quic_client_smoothed_rtt{{conn_index="3"}} 30
+"""
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.requests = 0
+        self.errors = 0
+        self.connections = set()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like cloudflared's Go server
+
+    def do_GET(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = RECORDED_METRICS.format(requests=server.requests, errors=server.errors).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    monkeypatch.setattr(app, "tunnel_metrics_session", session)
+    monkeypatch.setattr(app, "tunnel_metrics", dict(
+        app.tunnel_metrics, counters=None, last=None, error=None, scrapes=0, failures=0,
+        history=app.TimeSeriesRing(1800, (field for field, _, _ in app.TUNNEL_METRICS))
+    ))
+    yield server
+    server.shutdown()
+    server.server_close()
+    session.close()
+
+
+def test_parser_keeps_only_the_wanted_families():
+    text = RECORDED_METRICS.format(requests=10, errors=1).encode()
+    samples = app.parse_prometheus_text(text.splitlines(), ["cloudflared_tunnel_total_requests", "quic_client_smoothed_rtt"])
+    assert set(samples) == {"cloudflared_tunnel_total_requests", "quic_client_smoothed_rtt"}
+    assert samples["cloudflared_tunnel_total_requests"] == [({}, 10.0)]
+    rtts = samples["quic_client_smoothed_rtt"]
+    assert [value for _, value in rtts] == [20.0, 30.0, 40.0, 30.0]
+    assert rtts[2][0] == {"conn_index": "2", "edge_location": 'ams\\"08'}
+
+
+def test_scrapes_become_rates_over_one_keep_alive_connection(stand_in):
+    address = f"127.0.0.1:{stand_in.server_address[1]}"
+    stand_in.requests, stand_in.errors = 100, 5
+    first = app.scrape_tunnel_metrics(address)
+    assert first["requests_per_sec"] == 0.0  # No previous scrape to compare with
+    assert first["ha_connections"] == 4
+    assert first["concurrent_requests"] == 3
+    assert first["rtt_ms"] == 30.0
+
+    for _ in range(5):
+        stand_in.requests += 50
+        stand_in.errors += 1
+        sample = app.scrape_tunnel_metrics(address)
+        assert sample["requests_per_sec"] > 0
+        assert sample["errors_per_sec"] > 0
+
+    assert app.tunnel_metrics["history"].total == 6
+    assert len(stand_in.connections) == 1
+
+
+def test_counter_reset_after_a_restart_counts_from_zero(stand_in):
+    address = f"127.0.0.1:{stand_in.server_address[1]}"
+    stand_in.requests = 1000
+    app.scrape_tunnel_metrics(address)
+    stand_in.requests = 10  # cloudflared restarted
+    assert app.scrape_tunnel_metrics(address)["requests_per_sec"] > 0
+
+
+def test_unreachable_endpoint_raises(stand_in):
+    address = f"127.0.0.1:{stand_in.server_address[1]}"
+    stand_in.shutdown()
+    stand_in.server_close()
+    with pytest.raises(requests.RequestException):
+        app.scrape_tunnel_metrics(address, timeout=0.5)
+
+
+def test_api_returns_the_scraped_history(stand_in, config):
+    address = f"127.0.0.1:{stand_in.server_address[1]}"
+    for count in (100, 160):
+        stand_in.requests = count
+        app.scrape_tunnel_metrics(address)
+
+    data = app.app.test_client().get('/api/tunnel-metrics').get_json()
+    assert data['snapshot'] is True
+    assert data['seq'] == 2
+    assert len(data['history']) == 2
+    assert data['last']['ha_connections'] == 4
+    assert data['last']['requests_per_sec'] > 0
+
+
+def test_scrape_errors_are_published_once_until_they_clear(stand_in, monkeypatch):
+    published = []
+    monkeypatch.setattr(app.broadcast_bus, "publish",
+                        lambda topic, payload: published.append(payload) if topic == 'tunnel_metrics' else None)
+    monkeypatch.setattr(app, "TUNNEL_METRICS_INTERVAL", 0.01)
+    down = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    closed_address = f"127.0.0.1:{down.server_address[1]}"
+    down.server_close()  # Nothing listens there: every scrape fails the same way
+    process = SimpleNamespace(pid=1, returncode=None, metrics_address=closed_address)
+    monkeypatch.setattr(app, "tunnel_process", process)
+    monkeypatch.setattr(app, "tunnel_metrics_running", True)
+    thread = threading.Thread(target=app.tunnel_metrics_thread, daemon=True)
+    thread.start()
+    try:
+        wait_for(lambda: app.tunnel_metrics["failures"] >= 5)
+        (payload,) = published
+        assert payload["error"] and payload["samples"] == []
+        assert payload["base_seq"] == payload["seq"]  # Carries no samples, so clients do not resync
+
+        # Once cloudflared answers, the next sample clears the error
+        process.metrics_address = f"127.0.0.1:{stand_in.server_address[1]}"
+        wait_for(lambda: len(published) > 1)
+        assert published[1]["error"] is None
+        assert len(published[1]["samples"]) == 1
+    finally:
+        app.tunnel_metrics_running = False
+        thread.join()
@@ -0,0 +1,84 @@
+"""Incremental parsing of the tunnel URLs text file"""
+import os
+
+import app
+
+
+def _line(number, local_url="http://localhost:8080"):
+    return f"{local_url} - 2026-10-{1 + number % 28:02d} - 08:{number % 60:02d}:00 - https://t{number}.trycloudflare.com\n"
+
+
+def _urls(entries):
+    return [entry["generated_url"] for entry in entries]
+
+
+def test_refresh_parses_only_appended_complete_lines(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    with open(path, "w") as f:
+        f.write(_line(0) + _line(1))
+    view = app.TunnelUrlFile()
+    assert _urls(view.refresh(path)) == ["https://t0.trycloudflare.com", "https://t1.trycloudflare.com"]
+
+    with open(path, "a") as f:
+        f.write(_line(2) + _line(3)[:20])  # The last line is still being written
+    assert len(view.refresh(path)) == 3
+    offset = view.offset
+    with open(path, "a") as f:
+        f.write(_line(3)[20:])
+    assert _urls(view.refresh(path))[-1] == "https://t3.trycloudflare.com"
+    assert view.offset == offset + len(_line(3))
+
+
+def test_rotated_file_is_parsed_from_the_start(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    with open(path, "w") as f:
+        f.write(_line(0) + _line(1))
+    view = app.TunnelUrlFile()
+    view.refresh(path)
+
+    # A new file moved into place has a new inode, even if it is longer
+    replacement = str(tmp_path / "urls.new")
+    with open(replacement, "w") as f:
+        f.write(_line(5) + _line(6) + _line(7))
+    os.replace(replacement, path)
+    assert _urls(view.refresh(path)) == [f"https://t{number}.trycloudflare.com" for number in (5, 6, 7)]
+
+
+def test_truncated_file_is_parsed_from_the_start(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    with open(path, "w") as f:
+        f.write(_line(0) + _line(1) + _line(2))
+    view = app.TunnelUrlFile()
+    view.refresh(path)
+
+    with open(path, "w") as f:  # Same inode, smaller size
+        f.write(_line(9))
+    assert _urls(view.refresh(path)) == ["https://t9.trycloudflare.com"]
+
+
+def test_rewritten_file_is_parsed_from_the_start(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    with open(path, "w") as f:
+        f.write(_line(0) + _line(1))
+    view = app.TunnelUrlFile()
+    view.refresh(path)
+
+    # Same inode, rewritten in place and grown: only the bytes before the parsed offset reveal it
+    with open(path, "w") as f:
+        f.write(_line(10) + _line(11) + _line(12))
+    assert _urls(view.refresh(path)) == [f"https://t{number}.trycloudflare.com" for number in (10, 11, 12)]
+
+
+def test_missing_file_has_no_entries(tmp_path):
+    assert app.TunnelUrlFile().refresh(str(tmp_path / "missing.txt")) == []
+
+
+def test_tail_matches_a_full_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.TunnelUrlFile, "BLOCK_SIZE", 100)  # Lines are cut by most block boundaries
+    path = str(tmp_path / "urls.txt")
+    with open(path, "w") as f:
+        f.write("".join(_line(number) for number in range(500)))
+    view = app.TunnelUrlFile()
+    everything = list(reversed(app.TunnelUrlFile().refresh(path)))
+    for n in (1, 7, 100, 500, 600):
+        assert view.tail(path, n) == everything[:n]
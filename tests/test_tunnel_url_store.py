@@ -0,0 +1,126 @@
+"""Tunnel URL history in SQLite: legacy import, paging, filters and write failures"""
+import os
+
+import pytest
+
+import app
+
+
+def _entry(number, local_url="http://localhost:8080", date=None):
+    date = date or f"2026-10-{1 + number % 28:02d}"
+    url = f"https://t{number}.trycloudflare.com"
+    return {"local_url": local_url, "date": date, "time": "08:00:00", "generated_url": url,
+            "full_entry": f"{local_url} - {date} - 08:00:00 - {url}"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An empty store whose writer thread never flushes on its own; tests call flush()"""
+    return app.TunnelUrlStore(str(tmp_path / "history" / "tunnel_urls.db"), flush_interval=3600)
+
+
+def test_empty_store_imports_the_legacy_text_file(tmp_path):
+    text = tmp_path / "tunnel_urls.txt"
+    text.write_text("".join(_entry(number)["full_entry"] + "\n" for number in range(3)) + "not an entry\n")
+    store = app.TunnelUrlStore(str(tmp_path / "urls.db"), legacy_source=lambda: str(text), flush_interval=3600)
+
+    # The first write opens the store: the file is imported before the new entry is added and appended to it
+    store.add(_entry(3), str(text))
+    assert store.flush() == 1
+    page = store.page()
+    assert page["total"] == 4
+    assert [entry["generated_url"] for entry in page["entries"]] == [
+        f"https://t{number}.trycloudflare.com" for number in (3, 2, 1, 0)]
+    assert text.read_text().count("trycloudflare.com") == 4
+
+    # A store that already has rows does not import again
+    reopened = app.TunnelUrlStore(str(tmp_path / "urls.db"), legacy_source=lambda: str(text))
+    assert reopened.page()["total"] == 4
+
+
+def test_pages_are_newest_first_and_follow_the_cursor(store, tmp_path):
+    for number in range(25):
+        store.add(_entry(number), str(tmp_path / "urls.txt"))
+    store.flush()
+
+    seen, cursor = [], None
+    while True:
+        page = store.page(limit=10, cursor=cursor)
+        assert page["total"] == 25
+        seen.extend(entry["generated_url"] for entry in page["entries"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"https://t{number}.trycloudflare.com" for number in reversed(range(25))]
+
+
+def test_local_url_and_date_filters(store, tmp_path):
+    for number in range(12):
+        local_url = "http://localhost:3000" if number % 3 == 0 else "http://localhost:8080"
+        store.add(_entry(number, local_url=local_url, date=f"2026-10-{number + 1:02d}"), str(tmp_path / "urls.txt"))
+    store.flush()
+
+    page = store.page(local_url="http://localhost:3000")
+    assert page["total"] == 4
+    assert {entry["local_url"] for entry in page["entries"]} == {"http://localhost:3000"}
+
+    page = store.page(date_from="2026-10-03", date_to="2026-10-05")  # Inclusive on both ends
+    assert [entry["date"] for entry in page["entries"]] == ["2026-10-05", "2026-10-04", "2026-10-03"]
+
+    page = store.page(limit=1, local_url="http://localhost:8080", date_from="2026-10-06")
+    assert page["total"] == 5
+    assert page["entries"][0]["date"] == "2026-10-12"
+    assert page["next_cursor"] is not None
+
+
+def test_failed_sqlite_write_keeps_the_batch_queued(tmp_path):
+    blocker = tmp_path / "history"
+    blocker.write_text("a file where the database directory should be")
+    store = app.TunnelUrlStore(str(blocker / "tunnel_urls.db"), flush_interval=3600)
+    store.add(_entry(0), str(tmp_path / "urls.txt"))
+    store.add(_entry(1), str(tmp_path / "urls.txt"))
+
+    with pytest.raises(OSError):
+        store.flush()
+    assert len(store.pending) == 2
+    assert not (tmp_path / "urls.txt").exists()  # Nothing reaches the text file before SQLite
+
+    blocker.unlink()
+    assert store.flush() == 2
+    assert store.page()["total"] == 2
+    assert (tmp_path / "urls.txt").read_text().count("\n") == 2
+
+
+def test_failed_text_append_is_retried_without_duplicating_rows(store, tmp_path):
+    blocker = tmp_path / "text"
+    blocker.write_text("")
+    text_path = str(blocker / "urls.txt")
+    store.add(_entry(0), text_path)
+
+    with pytest.raises(OSError):
+        store.flush()
+    assert store.page()["total"] == 1  # SQLite, the source of truth, has it
+    assert not store.pending
+
+    blocker.unlink()
+    assert store.flush() == 0
+    assert store.page()["total"] == 1
+    with open(text_path) as f:
+        assert f.read() == _entry(0)["full_entry"] + "\n"
+
+
+def test_saved_urls_are_served_by_the_api(config):
+    for number in range(3):
+        assert app.save_tunnel_url(f"https://t{number}.trycloudflare.com", config)
+    app.tunnel_url_store.flush()
+
+    client = app.app.test_client()
+    body = client.get('/api/tunnel-urls?limit=2').get_json()
+    assert body['backend'] == 'sqlite'
+    assert body['total_count'] == 3
+    assert [entry['generated_url'] for entry in body['tunnel_urls']] == [
+        "https://t2.trycloudflare.com", "https://t1.trycloudflare.com"]
+    body = client.get(f"/api/tunnel-urls?limit=2&cursor={body['next_cursor']}").get_json()
+    assert [entry['generated_url'] for entry in body['tunnel_urls']] == ["https://t0.trycloudflare.com"]
+    assert body['next_cursor'] is None
+    assert os.path.exists(os.path.join(config["tunnel_urls_save_directory"], config["tunnel_urls_filename"]))
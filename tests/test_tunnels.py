@@ -0,0 +1,128 @@
+"""Additional tunnels: a 50-tunnel soak against the fake cloudflared and the /api/tunnels endpoints"""
+import threading
+import time
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+import app
+from tests.support import wait_for
+
+SOAK_TUNNELS = 50
+SOAK_IDLE_SECONDS = 5
+
+
+def tunnel_specs(count):
+    return [{"name": f"t{i}", "url": f"http://localhost:{9000 + i}"} for i in range(count)]
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = app.TunnelManager()
+    monkeypatch.setattr(app, "tunnel_manager", manager)
+    yield manager
+    manager.stop_all()
+
+
+@pytest.mark.slow
+def test_soak_50_tunnels(config, fake_cloudflared, manager):
+    config = dict(config, cloudflared_path=fake_cloudflared, tunnels=tunnel_specs(SOAK_TUNNELS))
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+
+    manager.reconcile(config)
+    wait_for(lambda: all(snapshot["status"] == "running" for snapshot in manager.snapshots()), timeout=60)
+    assert len({snapshot["url"] for snapshot in manager.snapshots()}) == SOAK_TUNNELS
+    children = [psutil.Process(tunnel.process.pid) for tunnel in manager.tunnels.values()]
+
+    cpu_before = process.cpu_times()
+    children_cpu_before = [child.cpu_times() for child in children]
+    time.sleep(SOAK_IDLE_SECONDS)
+    cpu = process.cpu_times()
+    children_cpu = [child.cpu_times() for child in children]
+    for _ in range(10):
+        manager.reconcile(config)  # Passes over healthy tunnels start nothing
+
+    # Per tunnel: an output reader and a supervisor waiter; shared writers (e.g. the URL store's) are not counted
+    waiters = {f"waiter-{tunnel.process.pid}" for tunnel in manager.tunnels.values()}
+    tunnel_threads = [thread for thread in threading.enumerate()
+                      if thread.name.startswith("tunnel-t") or thread.name in waiters]
+    rss_per_tunnel = (process.memory_info().rss - rss_before) / SOAK_TUNNELS
+    child_rss_per_tunnel = sum(child.memory_info().rss for child in children) / SOAK_TUNNELS
+    threads_per_tunnel = len(tunnel_threads) / SOAK_TUNNELS
+    cpu_per_tunnel = (cpu.user + cpu.system - cpu_before.user - cpu_before.system) / SOAK_IDLE_SECONDS / SOAK_TUNNELS
+    child_cpu_per_tunnel = sum(after.user + after.system - before.user - before.system
+                               for before, after in zip(children_cpu_before, children_cpu)) / SOAK_IDLE_SECONDS / SOAK_TUNNELS
+    # CPU is reported, not asserted: it includes every thread of the test process and depends on the machine
+    print(f"\n{SOAK_TUNNELS} tunnels, per tunnel: monitor {rss_per_tunnel / 1024:.0f} KiB RSS, "
+          f"{threads_per_tunnel:.1f} threads, {cpu_per_tunnel * 100:.3f}% CPU idle; "
+          f"cloudflared (fake) {child_rss_per_tunnel / 1024 / 1024:.1f} MiB RSS, {child_cpu_per_tunnel * 100:.3f}% CPU idle")
+
+    assert all(snapshot["starts"] == 1 for snapshot in manager.snapshots())
+    assert threads_per_tunnel == 2
+    assert rss_per_tunnel < 1024 * 1024
+
+    manager.stop_all()
+    assert not any(tunnel.alive() for tunnel in manager.tunnels.values())
+    wait_for(lambda: not any(thread.is_alive() for thread in tunnel_threads))
+
+
+def test_only_state_and_url_changes_are_published(config, monkeypatch):
+    bus = app.BroadcastBus()
+    monkeypatch.setattr(app, "broadcast_bus", bus)
+    tunnel = app.ManagedTunnel("t0", "http://localhost:9000", app.TunnelManager())
+    tunnel.process = process = SimpleNamespace(pid=1, returncode=None)
+    tunnel.status = "starting"
+
+    lines = [{"type": "output", "message": f"line {i}"} for i in range(100)]
+    tunnel._on_output(process, lines, config)
+    assert not bus.pending
+
+    url = {"type": "url", "message": "https://t0.trycloudflare.com", "url": "https://t0.trycloudflare.com"}
+    tunnel._on_output(process, [url], config)
+    assert set(bus.pending) == {"tunnel:t0", "events"}  # The tunnel_url event
+    assert bus.pending["tunnel:t0"]["status"] == "running"
+
+    bus.pending.clear()
+    tunnel._on_output(process, lines, config)
+    assert not bus.pending
+
+
+def test_settings_reject_invalid_tunnels(config):
+    client = app.app.test_client()
+    for tunnels in ({"name": "web"}, [{"name": "web"}], [{"name": "bad name!", "url": "http://localhost:1"}],
+                    tunnel_specs(1) * 2, [{"name": app.DEFAULT_TUNNEL_NAME, "url": "http://localhost:1"}]):
+        response = client.post('/api/settings', json={"tunnels": tunnels})
+        assert response.status_code == 400
+        assert response.get_json()["message"].startswith("Invalid tunnels: ")
+    assert app.load_config()["tunnels"] == config["tunnels"]
+
+    response = client.post('/api/settings', json={"tunnels": tunnel_specs(2)})
+    assert response.status_code == 200
+    assert app.load_config()["tunnels"] == tunnel_specs(2)
+
+
+def test_tunnel_endpoints(config, fake_cloudflared, manager):
+    config = dict(config, cloudflared_path=fake_cloudflared, tunnels=tunnel_specs(1))
+    manager.reconcile(config)
+    tunnel = manager.get("t0")
+    wait_for(lambda: tunnel.status == "running")
+    client = app.app.test_client()
+
+    names = [snapshot["name"] for snapshot in client.get('/api/tunnels').get_json()["tunnels"]]
+    assert names == [app.DEFAULT_TUNNEL_NAME, "t0"]
+
+    data = client.get('/api/tunnels/t0').get_json()["tunnel"]
+    assert data["url"] == tunnel.url
+    assert data["pid"] == tunnel.process.pid
+    assert any("trycloudflare.com" in line for line in data["output"])
+    assert client.get('/api/tunnels/missing').status_code == 404
+
+    pid = tunnel.process.pid
+    assert client.post('/api/tunnels/t0/restart').status_code == 200
+    assert tunnel.status == "stopped"
+    manager.reconcile(config)
+    wait_for(lambda: tunnel.status == "running")
+    assert tunnel.process.pid != pid
+    assert client.post('/api/tunnels/missing/restart').status_code == 404